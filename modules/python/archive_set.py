@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Verificação de vários arquivos ZIP numa única passada pela lista de palavras.
+
+Os cabeçalhos ZipCrypto de todos os arquivos ainda não resolvidos ficam numa
+tabela compacta (uma linha de 12 bytes e um byte de verificação por arquivo):
+o key schedule de cada candidata é calculado uma única vez e o filtro do
+cabeçalho é aplicado à tabela inteira de uma vez. Arquivos AES são testados
+um a um com o próprio verificador, em sub-lotes menores. Cada arquivo resolvido sai da tabela, e o
+trabalho termina quando não sobra nenhum.
+"""
+import time
+
+from verifiers import open_verifier
+from zipcrypto import ZipCryptoVerifier, ENCRYPTION_HEADER_SIZE, CRC_TABLE_NP, init_keys, init_keys_batch, np
+
+
+class ArchiveSet:
+    """
+    Verificador combinado de vários arquivos ZIP
+
+    Segue a interface dos verificadores em processo (check_batch devolve os
+    índices das senhas que acertaram), mas só devolve a candidata que resolve
+    o último arquivo pendente; os acertos intermediários são registrados no
+    SharedState, por arquivo, para os outros workers e para o resultado.
+    """
+
+    name = 'vários arquivos'
+
+    def __init__(self, zip_paths, verifiers, state=None):
+        self.zip_paths = zip_paths
+        self.verifiers = verifiers
+        self.state = state
+        self.entries = [entry for verifier in verifiers for entry in verifier.entries]
+        # O lote comum segue o ZipCrypto (lotes grandes para o filtro vetorizado); os
+        # arquivos AES testam cada lote em sub-lotes do próprio tamanho (ver _other_hits)
+        self.batch_size = max(verifier.batch_size for verifier in verifiers)
+        self.solved = [False] * len(verifiers)
+        # Senhas encontradas por este objeto (sem SharedState)
+        self.passwords = [None] * len(verifiers)
+        self._build_table()
+
+    @classmethod
+    def from_zips(cls, zip_paths, state=None):
+        """
+        Analisa cada arquivo ZIP uma única vez e monta o verificador combinado
+
+        Args:
+            zip_paths (tuple): Caminhos dos arquivos ZIP
+            state (SharedState): Estado compartilhado com um índice por arquivo (opcional)
+
+        Returns:
+            ArchiveSet: Verificador combinado
+
+        Raises:
+            ValueError: Algum arquivo não tem criptografia suportada pelo verificador em processo
+        """
+        verifiers = []
+        for zip_path in zip_paths:
+            verifier = open_verifier(zip_path)
+            if verifier is None:
+                raise ValueError(f"Criptografia de {zip_path} não suportada pelo verificador em processo")
+            verifiers.append(verifier)
+        return cls(tuple(zip_paths), verifiers, state)
+
+    def count(self, name):
+        """
+        Args:
+            name (str): Nome do verificador ('ZipCrypto' ou 'WinZip AES')
+
+        Returns:
+            int: Arquivos verificados com esse tipo de verificador
+        """
+        return sum(1 for verifier in self.verifiers if verifier.name == name)
+
+    def _build_table(self):
+        """Monta a tabela de cabeçalhos ZipCrypto e a lista de AES dos arquivos pendentes"""
+        self.crypto_archives = []
+        self.other_archives = []
+        for archive, verifier in enumerate(self.verifiers):
+            if self.solved[archive]:
+                continue
+            if isinstance(verifier, ZipCryptoVerifier):
+                self.crypto_archives.append(archive)
+            else:
+                self.other_archives.append(archive)
+
+        if np is not None and self.crypto_archives:
+            primaries = [self.verifiers[archive].primary for archive in self.crypto_archives]
+            self.headers = np.array([list(entry.header) for entry in primaries], dtype=np.uint32)
+            self.check_bytes = np.array([entry.check_byte for entry in primaries], dtype=np.uint32)
+
+    def _sync(self):
+        """
+        Retira da tabela os arquivos já resolvidos por outros workers
+
+        Returns:
+            bool: True se algum arquivo saiu da tabela
+        """
+        if self.state is None:
+            return False
+        changed = False
+        for archive in range(len(self.verifiers)):
+            if not self.solved[archive] and self.state.is_solved(archive):
+                self.solved[archive] = True
+                changed = True
+        return changed
+
+    def _check_headers(self, keys):
+        """
+        Aplica o filtro do byte de verificação de todos os arquivos ZipCrypto pendentes
+
+        Args:
+            keys (tuple): Vetores (key0, key1, key2) de init_keys_batch
+
+        Returns:
+            tuple: (linhas da tabela, índices das senhas) dos pares que passaram pelo filtro
+        """
+        table = CRC_TABLE_NP
+        # Cada linha é um arquivo e cada coluna uma senha do lote
+        shape = (len(self.crypto_archives), len(keys[0]))
+        k0, k1, k2 = (np.broadcast_to(k, shape) for k in keys)
+        p = None
+        for j in range(ENCRYPTION_HEADER_SIZE):
+            t = (k2 | 2) & 0xffff
+            p = (((t * (t ^ 1)) >> 8) & 0xff) ^ self.headers[:, j:j + 1]
+            k0 = table[(k0 ^ p) & 0xff] ^ (k0 >> 8)
+            k1 = (k1 + (k0 & 0xff)) * np.uint32(134775813) + np.uint32(1)
+            k2 = table[(k2 ^ (k1 >> 24)) & 0xff] ^ (k2 >> 8)
+        return np.nonzero(p == self.check_bytes[:, None])
+
+    def _crypto_hits(self, passwords, keys, stats):
+        """
+        Returns:
+            list: Pares (índice da senha, índice do arquivo) confirmados nos arquivos ZipCrypto
+        """
+        hits = []
+        if np is None:
+            # Sem NumPy: uma senha por vez, mas ainda com um único key schedule por senha
+            for i, password in enumerate(passwords):
+                if stats is not None:
+                    start = time.perf_counter()
+                password_keys = init_keys(password)
+                candidates = [archive for archive in self.crypto_archives
+                              if self.verifiers[archive].primary.check_header(password_keys)]
+                if stats is not None:
+                    checked = time.perf_counter()
+                    stats.add('header_check', checked - start)
+                for archive in candidates:
+                    if self.verifiers[archive].confirm(password, password_keys):
+                        hits.append((i, archive))
+                if stats is not None and candidates:
+                    stats.add('verify', time.perf_counter() - checked, len(candidates))
+            return hits
+
+        if stats is not None:
+            start = time.perf_counter()
+        if keys is None:
+            keys = init_keys_batch(passwords)
+        rows, columns = self._check_headers(keys)
+        if stats is not None:
+            checked = time.perf_counter()
+            stats.add('header_check', checked - start, len(passwords))
+        for row, i in zip(rows, columns):
+            archive = self.crypto_archives[row]
+            if self.verifiers[archive].confirm(passwords[i]):
+                hits.append((int(i), archive))
+        if stats is not None and len(rows):
+            stats.add('verify', time.perf_counter() - checked, len(rows))
+        return hits
+
+    def _other_hits(self, passwords, stats):
+        """
+        Testa o lote nos arquivos AES, em sub-lotes do tamanho de cada verificador
+
+        Entre um sub-lote e outro o estado compartilhado é consultado: um arquivo
+        resolvido por outro worker, ou o trabalho encerrado, interrompe o lote.
+
+        Returns:
+            list: Pares (índice da senha, índice do arquivo), no máximo um acerto por arquivo
+        """
+        hits = []
+        for archive in self.other_archives:
+            verifier = self.verifiers[archive]
+            for offset in range(0, len(passwords), verifier.batch_size):
+                if self.state is not None and (self.state.is_found() or self.state.is_solved(archive)):
+                    break
+                found = verifier.check_batch(passwords[offset:offset + verifier.batch_size], None, stats)
+                if found:
+                    hits.append((offset + found[0], archive))
+                    break
+        return hits
+
+    def check_batch(self, passwords, keys=None, stats=None):
+        """
+        Testa um lote de senhas contra todos os arquivos ainda não resolvidos
+
+        Args:
+            passwords (list): Senhas candidatas (bytes)
+            keys (tuple): Estado das chaves já calculado para o lote (ex.: índice pré-compilado)
+            stats (StageStats): Contadores de tempo das etapas (opcional)
+
+        Returns:
+            list: Índice da senha que resolveu o último arquivo pendente, ou lista vazia
+        """
+        changed = self._sync()
+        if not passwords or all(self.solved):
+            return []
+
+        hits = self._crypto_hits(passwords, keys, stats) if self.crypto_archives else []
+        hits.extend(self._other_hits(passwords, stats))
+
+        # A primeira candidata (na ordem da lista) que acerta cada arquivo é a registrada
+        completing = None
+        for i, archive in sorted(hits):
+            if self.solved[archive]:
+                continue
+            self.solved[archive] = True
+            self.passwords[archive] = passwords[i]
+            changed = True
+            if self.state is not None:
+                self.state.record_hit(passwords[i], archive)
+            if all(self.solved):
+                completing = i
+                break
+
+        if changed:
+            self._build_table()
+        return [completing] if completing is not None else []
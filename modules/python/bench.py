@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Suíte de benchmark: zip_cracker.py bench [opções]
+
+Gera localmente (uma vez, em --fixtures-dir) arquivos ZIP ZipCrypto e AES com
+números e tamanhos de entradas variados e listas de palavras com a senha em
+posições controladas, e executa o zip_cracker.py para cada combinação de
+arquivo, lista, motor e número de workers, repetindo cada uma --trials vezes.
+
+Cada execução roda num processo próprio; o consumo de CPU e o pico de memória
+vêm do wait4 (o processo e os workers que ele aguardou). As linhas saem em CSV
+com as mesmas colunas do results.csv (mais as métricas do benchmark) ou em
+JSON com os nomes de campos do server.js, e podem ser anexadas ao results.csv.
+"""
+import argparse
+import csv
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from fixtures import ENCRYPTIONS, FIXTURE_PASSWORD, archive_fixture, wordlist_fixture
+from process_pool import physical_core_count
+from wordlist_index import prepare_source
+
+CRACKER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'zip_cracker.py')
+
+DEFAULT_FIXTURES_DIR = '.bench-fixtures'
+
+# Intermediário que executa o zip_cracker.py e devolve o wait4 dele no stderr.
+# Roda num interpretador novo e enxuto porque o ru_maxrss de um filho começa no
+# tamanho do processo que o criou: criado direto pelo benchmark (com as listas
+# geradas em memória), todo filho pareceria ter o pico do benchmark.
+MEASURE_SCRIPT = '''
+import json, os, signal, subprocess, sys
+proc = subprocess.Popen(sys.argv[1:], stderr=subprocess.DEVNULL)
+signal.signal(signal.SIGTERM, lambda signum, frame: proc.terminate())
+_, status, usage = os.wait4(proc.pid, 0)
+json.dump([os.waitstatus_to_exitcode(status), usage.ru_utime, usage.ru_stime, usage.ru_maxrss], sys.stderr)
+'''
+
+# (campo, título): as oito primeiras colunas são as do results.csv (server.js)
+COLUMNS = [
+    ('zipFile', 'Arquivo ZIP'),
+    ('zipFileOriginal', 'Nome Original ZIP'),
+    ('wordList', 'Word List'),
+    ('wordListOriginal', 'Nome Original Word List'),
+    ('language', 'Linguagem'),
+    ('executionTime', 'Tempo de Execução (ms)'),
+    ('result', 'Resultado'),
+    ('timestamp', 'Data/Hora'),
+    ('engine', 'Motor'),
+    ('workers', 'Workers'),
+    ('trial', 'Tentativa'),
+    ('testedWords', 'Senhas Testadas'),
+    ('candidatesPerSecond', 'Senhas/s'),
+    ('timeToHit', 'Tempo até o Acerto (ms)'),
+    ('peakRssKb', 'Pico RSS (KB)'),
+    ('cpuPercent', 'CPU (%)'),
+]
+
+
+def parse_position(text):
+    """
+    Args:
+        text (str): Posição relativa da senha (0 a 1) ou 'ausente'
+
+    Returns:
+        float: Posição, ou None para listas sem a senha
+    """
+    if text in ('ausente', 'none'):
+        return None
+    value = float(text)
+    if not 0 <= value <= 1:
+        raise argparse.ArgumentTypeError(f"posição fora de 0..1: {text}")
+    return value
+
+
+def run_trial(zip_path, wordlist_path, engine, workers, timeout=None):
+    """
+    Executa o zip_cracker.py uma vez e mede o processo
+
+    Args:
+        zip_path (str): Arquivo ZIP
+        wordlist_path (str): Lista de palavras
+        engine (str): Motor de execução
+        workers (int): Número de processos ou threads
+        timeout (float): Tempo máximo em segundos (None para sem limite)
+
+    Returns:
+        tuple: (resultado JSON do zip_cracker.py ou None, segundos de parede,
+            segundos de CPU, pico de RSS em KB)
+    """
+    command = [sys.executable, '-c', MEASURE_SCRIPT, sys.executable, CRACKER_PATH, zip_path, wordlist_path,
+               '--engine', engine, '--workers', str(workers), '--no-cache']
+    start = time.time()
+    proc = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    # SIGTERM faz o zip_cracker.py encerrar os workers de forma ordenada
+    timer = threading.Timer(timeout, proc.send_signal, (signal.SIGTERM,)) if timeout else None
+    if timer is not None:
+        timer.start()
+    try:
+        output, measure = proc.communicate()
+    finally:
+        if timer is not None:
+            timer.cancel()
+    elapsed = time.time() - start
+
+    try:
+        returncode, user_time, system_time, peak_rss = json.loads(measure)
+    except ValueError:
+        returncode, user_time, system_time, peak_rss = proc.returncode or 1, 0.0, 0.0, 0
+
+    result = None
+    if returncode == 0:
+        try:
+            result = json.loads(output.decode().strip().splitlines()[-1])
+        except (ValueError, IndexError):
+            result = None
+    return result, elapsed, user_time + system_time, peak_rss
+
+
+def make_row(zip_path, wordlist_path, engine, workers, trial, result, elapsed, cpu_seconds, peak_rss):
+    """
+    Monta a linha de resultado de uma execução
+
+    Returns:
+        dict: Campos de COLUMNS
+    """
+    row = {
+        'zipFile': os.path.basename(zip_path),
+        'zipFileOriginal': os.path.basename(zip_path),
+        'wordList': os.path.basename(wordlist_path),
+        'wordListOriginal': os.path.basename(wordlist_path),
+        'language': 'python',
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
+        'engine': engine,
+        'workers': workers,
+        'trial': trial,
+        # ru_maxrss vem em KB no Linux: é o pico do maior processo (principal ou worker)
+        'peakRssKb': peak_rss,
+        'cpuPercent': round(100 * cpu_seconds / elapsed, 1) if elapsed > 0 else 0,
+    }
+    if result is None or result.get('error'):
+        row.update(executionTime=int(elapsed * 1000), result='Erro', testedWords=0,
+                   candidatesPerSecond=0, timeToHit=None)
+        return row
+
+    execution_ms = result['executionTime']
+    row.update(
+        executionTime=execution_ms,
+        result=result['password'] if result['success'] else 'Não encontrado',
+        testedWords=result['testedWords'],
+        candidatesPerSecond=round(result['testedWords'] * 1000 / execution_ms) if execution_ms else 0,
+        timeToHit=execution_ms if result['success'] else None,
+    )
+    return row
+
+
+def write_rows(rows, output, output_format):
+    """
+    Escreve as linhas em CSV ou JSON
+
+    Um CSV existente (como o results.csv) recebe as linhas ao final, com as
+    colunas do cabeçalho que ele já tem.
+
+    Args:
+        rows (list): Linhas (dicts de COLUMNS)
+        output (str): Arquivo de saída, ou None para o stdout
+        output_format (str): 'csv' ou 'json'
+    """
+    if output_format == 'json':
+        ordered = [{key: row[key] for key, _ in COLUMNS} for row in rows]
+        text = json.dumps(ordered, indent=2, ensure_ascii=False) + '\n'
+        if output is None:
+            sys.stdout.write(text)
+        else:
+            with open(output, 'w', encoding='utf-8') as fp:
+                fp.write(text)
+        return
+
+    titles = dict(COLUMNS)
+    records = [{titles[key]: value for key, value in row.items()} for row in rows]
+    header = [title for _, title in COLUMNS]
+    if output is None:
+        writer = csv.DictWriter(sys.stdout, fieldnames=header, lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(records)
+        return
+
+    append = os.path.exists(output) and os.path.getsize(output) > 0
+    if append:
+        with open(output, newline='', encoding='utf-8') as fp:
+            header = next(csv.reader(fp))
+    with open(output, 'a' if append else 'w', newline='', encoding='utf-8') as fp:
+        writer = csv.DictWriter(fp, fieldnames=header, extrasaction='ignore', lineterminator='\n')
+        if not append:
+            writer.writeheader()
+        writer.writerows(records)
+
+
+def print_summary(rows):
+    """Resume no stderr a mediana de cada configuração"""
+    groups = {}
+    for row in rows:
+        key = (row['zipFile'], row['wordList'], row['engine'], row['workers'])
+        groups.setdefault(key, []).append(row)
+    for (zip_file, word_list, engine, workers), group in groups.items():
+        rates = statistics.median(r['candidatesPerSecond'] for r in group)
+        hits = [r['timeToHit'] for r in group if r['timeToHit'] is not None]
+        hit = f"{statistics.median(hits):.0f}ms" if hits else "-"
+        rss = max(r['peakRssKb'] for r in group)
+        cpu = statistics.median(r['cpuPercent'] for r in group)
+        print(f"INFO: {zip_file} {word_list} {engine}x{workers}: {rates:.0f} senhas/s, "
+              f"acerto {hit}, pico {rss} KB, CPU {cpu:.0f}%", file=sys.stderr)
+
+
+def main(argv=None):
+    """
+    Args:
+        argv (list): Argumentos da linha de comando (sem o 'bench')
+
+    Returns:
+        int: Código de saída
+    """
+    parser = argparse.ArgumentParser(prog='zip_cracker.py bench',
+                                     description="Benchmark dos motores com arquivos e listas sintéticos")
+    parser.add_argument('--encryption', nargs='+', choices=ENCRYPTIONS, default=list(ENCRYPTIONS),
+                        help="Criptografias dos arquivos de teste")
+    parser.add_argument('--entries', nargs='+', type=int, default=[1, 16], metavar='N',
+                        help="Números de entradas por arquivo")
+    parser.add_argument('--entry-size', nargs='+', type=int, default=[1024, 65536], metavar='BYTES',
+                        help="Tamanhos de cada entrada descomprimida")
+    parser.add_argument('--lines', nargs='+', type=int, default=[1000, 10000], metavar='N',
+                        help="Tamanhos das listas de palavras (até 10^8)")
+    parser.add_argument('--position', nargs='+', type=parse_position, default=[0.5], metavar='P',
+                        help="Posições relativas da senha na lista (0 a 1, ou 'ausente')")
+    parser.add_argument('--engines', nargs='+', choices=('processes', 'threads', 'external'),
+                        default=['processes', 'threads'], help="Motores comparados")
+    parser.add_argument('--workers', nargs='+', type=int, metavar='N',
+                        help="Números de processos ou threads (padrão: 1 e o número de núcleos físicos)")
+    parser.add_argument('--trials', type=int, default=3, metavar='N', help="Repetições de cada combinação")
+    parser.add_argument('--timeout', type=float, metavar='s', help="Tempo máximo de cada execução")
+    parser.add_argument('--fixtures-dir', default=DEFAULT_FIXTURES_DIR, metavar='pasta',
+                        help="Onde guardar os arquivos e listas gerados (reaproveitados entre execuções)")
+    parser.add_argument('--format', choices=('csv', 'json'), help="Formato da saída (padrão: pela extensão)")
+    parser.add_argument('-o', '--output', metavar='arquivo',
+                        help="Arquivo de saída (um CSV existente, como o results.csv, recebe as linhas ao final)")
+    args = parser.parse_args(argv)
+
+    output_format = args.format
+    if output_format is None:
+        output_format = 'json' if args.output and args.output.endswith('.json') else 'csv'
+    workers = args.workers or sorted({1, physical_core_count()})
+    if args.trials < 1 or min(workers) < 1:
+        parser.error("--trials e --workers precisam ser pelo menos 1")
+
+    os.makedirs(args.fixtures_dir, exist_ok=True)
+    print(f"INFO: Gerando fixtures em {args.fixtures_dir} (senha: {FIXTURE_PASSWORD})", file=sys.stderr)
+    archives = [archive_fixture(args.fixtures_dir, encryption, entries, size)
+                for encryption in args.encryption for entries in args.entries for size in args.entry_size]
+    wordlists = [wordlist_fixture(args.fixtures_dir, lines, position)
+                 for lines in args.lines for position in args.position]
+    # Indexar as listas antes das medições: a primeira execução não paga a indexação
+    for wordlist_path in wordlists:
+        prepare_source(wordlist_path, background=False)
+
+    rows = []
+    try:
+        for zip_path in archives:
+            for wordlist_path in wordlists:
+                for engine in args.engines:
+                    for count in workers:
+                        for trial in range(1, args.trials + 1):
+                            measures = run_trial(zip_path, wordlist_path, engine, count, args.timeout)
+                            row = make_row(zip_path, wordlist_path, engine, count, trial, *measures)
+                            label = f"{row['zipFile']} {row['wordList']} {engine}x{count} (tentativa {trial})"
+                            if row['result'] == 'Erro':
+                                print(f"AVISO: Falha em {label}", file=sys.stderr)
+                            else:
+                                print(f"INFO: {label}: {row['executionTime']}ms, "
+                                      f"{row['candidatesPerSecond']} senhas/s", file=sys.stderr)
+                            rows.append(row)
+    except KeyboardInterrupt:
+        print(f"AVISO: Benchmark interrompido, gravando {len(rows)} execuções", file=sys.stderr)
+
+    print_summary(rows)
+    write_rows(rows, args.output, output_format)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
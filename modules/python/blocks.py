@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Distribuição de trabalho em blocos para o motor de threads.
+
+O produtor entrega blocos de candidatas (listas de senhas) numa fila limitada
+em número de blocos, e cada thread retira um bloco inteiro por vez: a fila e
+o sinal de parada são consultados uma vez por bloco, não por senha. As
+contagens ficam em contadores por thread, sem lock, somados só para o
+progresso e o resultado.
+
+O tamanho do bloco acompanha o custo medido por candidata, para que cada
+bloco leve cerca de TARGET_BLOCK_SECONDS: senhas AES ou de ferramentas
+externas (lentas) vão em blocos pequenos e ZipCrypto (rápidas) em blocos
+grandes, com pouca sobrecarga de fila e cancelamento rápido em ambos.
+"""
+import itertools
+
+# Duração desejada para o teste de um bloco, em segundos
+TARGET_BLOCK_SECONDS = 0.05
+
+# Limites do tamanho do bloco (em candidatas) e tamanho antes da primeira medição
+MIN_BLOCK_SIZE = 1
+MAX_BLOCK_SIZE = 8192
+INITIAL_BLOCK_SIZE = 16
+
+# Peso de cada nova medição na média móvel do custo por candidata
+COST_SMOOTHING = 0.25
+
+# Blocos na fila por thread: o bastante para nenhuma thread esperar pelo produtor
+BLOCKS_PER_WORKER = 4
+
+
+class BlockSizer:
+    """Tamanho do bloco ajustado pelo custo médio medido por candidata"""
+
+    def __init__(self, target=TARGET_BLOCK_SECONDS, minimum=MIN_BLOCK_SIZE, maximum=MAX_BLOCK_SIZE,
+                 initial=INITIAL_BLOCK_SIZE):
+        self.target = target
+        self.minimum = minimum
+        self.maximum = maximum
+        self.initial = initial
+        # Média móvel em segundos por candidata (None antes da primeira medição)
+        self.cost = None
+
+    def record(self, count, seconds):
+        """
+        Registra o tempo de teste de um bloco
+
+        Chamado pelas threads sem lock: uma medição perdida numa corrida só
+        atrasa um pouco a média.
+
+        Args:
+            count (int): Candidatas testadas
+            seconds (float): Duração do teste
+        """
+        if count <= 0:
+            return
+        cost = seconds / count
+        previous = self.cost
+        self.cost = cost if previous is None else previous + COST_SMOOTHING * (cost - previous)
+
+    def size(self):
+        """
+        Returns:
+            int: Candidatas no próximo bloco
+        """
+        cost = self.cost
+        if cost is None:
+            return self.initial
+        if cost <= 0:
+            return self.maximum
+        return max(self.minimum, min(self.maximum, int(self.target / cost)))
+
+
+def iter_blocks(candidates, sizer):
+    """
+    Agrupa candidatas em blocos do tamanho atual de sizer
+
+    Args:
+        candidates (iterable): Candidatas (bytes)
+        sizer (BlockSizer): Tamanho dos blocos, consultado a cada bloco
+
+    Yields:
+        list: Bloco de candidatas
+    """
+    iterator = iter(candidates)
+    while True:
+        block = list(itertools.islice(iterator, sizer.size()))
+        if not block:
+            return
+        yield block
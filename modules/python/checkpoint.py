@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Checkpoints periódicos para retomar ataques longos.
+
+O arquivo de checkpoint fica ao lado do ZIP e guarda a impressão digital do
+arquivo, o hash da lista de palavras e os intervalos de fatias já concluídas
+(mesclados, para o arquivo continuar pequeno). A gravação é atômica e só
+acontece a cada poucos segundos, sem interferir nos workers.
+"""
+import bisect
+import hashlib
+import json
+import os
+import sys
+import time
+import zipfile
+
+CHECKPOINT_VERSION = 1
+CHECKPOINT_SUFFIX = '.checkpoint.json'
+
+# Intervalo mínimo entre gravações do checkpoint, em segundos
+CHECKPOINT_INTERVAL = 5.0
+
+# Bytes do início dos dados de cada entrada usados na impressão digital
+# (cabeçalho de criptografia ZipCrypto ou salt + PV do AES)
+FINGERPRINT_DATA_SIZE = 32
+
+
+def checkpoint_path(zip_path):
+    """
+    Args:
+        zip_path (str): Caminho para o arquivo ZIP
+
+    Returns:
+        str: Caminho do checkpoint correspondente
+    """
+    return zip_path + CHECKPOINT_SUFFIX
+
+
+def fingerprint_checkpoint_path(zip_path, fingerprint):
+    """
+    Checkpoint identificado pela impressão digital do arquivo, na pasta do ZIP
+
+    Uploads recebem nomes novos: uma cópia do mesmo arquivo enviada de novo
+    encontra o checkpoint da execução anterior.
+
+    Args:
+        zip_path (str): Caminho para o arquivo ZIP
+        fingerprint (str): Impressão digital do arquivo (archive_fingerprint)
+
+    Returns:
+        str: Caminho do checkpoint
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(zip_path)), f".superzip-{fingerprint[:32]}{CHECKPOINT_SUFFIX}")
+
+
+def archive_fingerprint(zip_path):
+    """
+    Calcula uma impressão digital do arquivo ZIP a partir das entradas criptografadas
+
+    Usa nomes, CRCs, tamanhos, métodos e os primeiros bytes criptografados de cada
+    entrada, então cópias idênticas enviadas com outro nome têm a mesma impressão.
+
+    Args:
+        zip_path (str): Caminho para o arquivo ZIP
+
+    Returns:
+        str: Hash SHA-256 em hexadecimal
+    """
+    digest = hashlib.sha256()
+    with zipfile.ZipFile(zip_path) as zf, open(zip_path, 'rb') as fp:
+        for info in zf.infolist():
+            if not info.flag_bits & 0x1:
+                continue
+            digest.update(info.filename.encode('utf-8', errors='surrogateescape'))
+            digest.update(f"{info.CRC}:{info.compress_size}:{info.file_size}:"
+                          f"{info.compress_type}:{info.flag_bits}".encode())
+            fp.seek(info.header_offset + 26)
+            name_len, extra_len = int.from_bytes(fp.read(2), 'little'), int.from_bytes(fp.read(2), 'little')
+            fp.seek(info.header_offset + 30 + name_len + extra_len)
+            digest.update(fp.read(min(FINGERPRINT_DATA_SIZE, info.compress_size)))
+    return digest.hexdigest()
+
+
+class Checkpoint:
+    """Intervalos já concluídos de uma execução, com gravação periódica e atômica"""
+
+    def __init__(self, path, archive, wordlist, source_kind, shard_size, ranges=None, tested=0):
+        self.path = path
+        self.archive = archive
+        self.wordlist = wordlist
+        self.source_kind = source_kind
+        self.shard_size = shard_size
+        # Intervalos [início, fim) concluídos, ordenados e mesclados
+        self.ranges = ranges or []
+        self.tested = tested
+        self.last_save = time.time()
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path):
+        """
+        Lê um checkpoint do disco
+
+        Args:
+            path (str): Caminho do checkpoint
+
+        Returns:
+            Checkpoint: Checkpoint lido, ou None se não existir ou for inválido
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != CHECKPOINT_VERSION:
+                return None
+            return cls(path, data['archive'], data['wordlist'], data['source'], data['shardSize'],
+                       [tuple(r) for r in data['completed']], data.get('tested', 0))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"AVISO: Checkpoint ignorado ({str(e)})", file=sys.stderr)
+            return None
+
+    def matches(self, archive, keyspace):
+        """
+        Confere se o checkpoint pertence ao mesmo arquivo ZIP e à mesma lista
+
+        A fonte (texto ou índice) não entra na comparação: quem retoma usa a
+        mesma fonte da execução anterior (source_kind), já que os intervalos
+        só valem nela.
+
+        Args:
+            archive (str): Impressão digital do arquivo ZIP
+            keyspace (KeyspaceDigest): Espaço de busca da execução
+
+        Returns:
+            bool: True se puder ser retomado
+        """
+        return self.archive == archive and keyspace.matches(str(self.wordlist))
+
+    def is_done(self, start, end):
+        """
+        Args:
+            start (int): Início da fatia
+            end (int): Fim da fatia
+
+        Returns:
+            bool: True se o intervalo já foi totalmente processado
+        """
+        i = bisect.bisect_right(self.ranges, (start, float('inf'))) - 1
+        return i >= 0 and self.ranges[i][0] <= start and end <= self.ranges[i][1]
+
+    def add(self, start, end, lines):
+        """
+        Marca uma fatia como concluída, mesclando com intervalos vizinhos
+
+        Args:
+            start (int): Início da fatia
+            end (int): Fim da fatia
+            lines (int): Linhas da fatia (somadas ao total testado)
+        """
+        ranges = self.ranges
+        i = bisect.bisect_left(ranges, (start, end))
+        if i > 0 and ranges[i - 1][1] >= start:
+            i -= 1
+            start = ranges[i][0]
+            end = max(end, ranges[i][1])
+            del ranges[i]
+        while i < len(ranges) and ranges[i][0] <= end:
+            end = max(end, ranges[i][1])
+            del ranges[i]
+        ranges.insert(i, (start, end))
+        self.tested += lines
+        self.dirty = True
+
+    def save(self):
+        """Grava o checkpoint de forma atômica (arquivo temporário + rename)"""
+        data = {
+            'version': CHECKPOINT_VERSION,
+            'archive': self.archive,
+            # Um KeyspaceDigest grava o hash do conteúdo assim que ele fica pronto
+            'wordlist': str(self.wordlist),
+            'source': self.source_kind,
+            'shardSize': self.shard_size,
+            'completed': self.ranges,
+            'tested': self.tested,
+            'updatedAt': time.time()
+        }
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+        self.last_save = time.time()
+        self.dirty = False
+
+    def save_if_due(self):
+        """Grava o checkpoint se houve progresso e o intervalo mínimo já passou"""
+        if self.dirty and time.time() - self.last_save >= CHECKPOINT_INTERVAL:
+            try:
+                self.save()
+            except OSError as e:
+                print(f"AVISO: Não foi possível gravar o checkpoint: {str(e)}", file=sys.stderr)
+
+    def remove(self):
+        """Remove o checkpoint (execução concluída)"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,926 @@
+#!/usr/bin/env python3
+"""
+Modo distribuído: um coordenador divide o espaço de busca e empresta
+intervalos a nós worker em outras máquinas, por TCP.
+
+O coordenador planeja as fatias como o pool de processos (intervalos de bytes
+da lista, posições do índice ou índices da máscara) e as empresta em lotes a
+cada nó que pede trabalho. Cada nó roda o próprio ProcessPool sobre uma
+cópia reduzida do arquivo ZIP enviada pelo coordenador (só as entradas usadas
+pelo verificador) ou sobre um caminho compartilhado, e devolve cada fatia
+concluída. Empréstimos são renovados pelas mensagens do nó; quando um nó cai
+ou para de responder por mais que o prazo, as fatias voltam para a fila. Um
+nó sem trabalho rouba a metade final do maior empréstimo de outro nó, e o
+primeiro acerto encerra todos os nós imediatamente, depois de conferido
+com o verificador local do coordenador. Sem token o coordenador só escuta
+em endereços de loopback.
+
+Protocolo (JSON em linhas, todos com "v": versão do protocolo):
+    nó -> coordenador
+        {"type": "hello", "name": ..., "workers": 4, "token": ...}
+        {"type": "lease"}
+        {"type": "progress", "tested": 1000, "current": "senha"}
+        {"type": "done", "lease": 1, "shard": [início, fim]}
+        {"type": "released", "lease": 1, "shards": [[início, fim], ...]}
+        {"type": "hit", "password": "senha", "tested": 1000}
+        {"type": "error", "error": "mensagem"}
+    coordenador -> nó
+        {"type": "job", "archive": base64 | null, "zipPath": ..., "source": {...}, "rules": [...], "batchSize": 4096}
+        {"type": "lease", "lease": 1, "shards": [[início, fim], ...]}
+        {"type": "wait", "retry": 0.25}
+        {"type": "revoke", "lease": 1, "shards": [[início, fim], ...]}
+        {"type": "stop", "reason": "found" | "exhausted" | "cancelled"}
+        {"type": "error", "error": "mensagem"}
+"""
+import argparse
+import base64
+import collections
+import hmac
+import ipaddress
+import itertools
+import json
+import os
+import queue
+import socket
+import struct
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+
+from verifiers import open_verifier
+from process_pool import ProcessPool, physical_core_count
+from wordlist import ShardPlanner, shard_size_for
+from wordlist_index import open_source, prepare_source, wordlist_digest
+from zipcrypto import (LOCAL_HEADER_STRUCT, LOCAL_HEADER_SIGNATURE, CENTRAL_HEADER_STRUCT, CENTRAL_HEADER_SIGNATURE,
+                       END_RECORD_STRUCT, END_RECORD_SIGNATURE)
+from zip_cracker import prepare_keyspace, print_progress, flag_unconfirmed
+
+PROTOCOL_VERSION = 1
+
+DEFAULT_PORT = 7070
+
+# Sem mensagens do nó por esse tempo (s), seus empréstimos voltam para a fila
+DEFAULT_LEASE_TIMEOUT = 30.0
+
+# Intervalo entre mensagens de progresso do nó (que também renovam os empréstimos)
+HEARTBEAT_INTERVAL = 1.0
+
+# Fatias por worker do nó em cada empréstimo
+SHARDS_PER_LEASE_PER_WORKER = 2
+
+# Fatias enviadas ao pool local por worker (as demais podem ser roubadas)
+INFLIGHT_PER_WORKER = 2
+
+# Total de workers presumido ao dimensionar as fatias (os nós só chegam depois)
+PLANNED_WORKERS = 32
+
+# Fatias de máscara planejadas e ainda não concluídas (o espaço pode ser enorme)
+MASK_PENDING_SHARDS = 1024
+
+# Espera sugerida a um nó quando não há fatias livres no momento, em segundos
+WAIT_RETRY = 0.25
+
+CONNECT_TIMEOUT = 10.0
+
+# Espera pelas últimas contagens dos nós depois da ordem de parar, em segundos
+STOP_GRACE = 2.0
+
+# Posição do offset do cabeçalho local no registro do diretório central
+CENTRAL_OFFSET_POSITION = CENTRAL_HEADER_STRUCT.size - 4
+
+ZIP64_LIMIT = 0xffffffff
+
+
+def parse_address(text, default_host='127.0.0.1'):
+    """
+    Args:
+        text (str): 'host:porta', ':porta' ou 'host'
+        default_host (str): Host usado quando omitido
+
+    Returns:
+        tuple: (host, porta)
+
+    Raises:
+        ValueError: Porta inválida
+    """
+    host, _, port = text.rpartition(':') if ':' in text else (text, '', '')
+    port = int(port) if port else DEFAULT_PORT
+    if not 0 < port < 65536:
+        raise ValueError(f"Porta inválida: {port}")
+    return host or default_host, port
+
+
+def is_loopback(host):
+    """
+    Returns:
+        bool: True se o host só aceita conexões da própria máquina
+    """
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        # Nome de máquina: pode resolver para uma interface externa
+        return False
+
+
+def archive_stub(zip_path):
+    """
+    Monta uma cópia reduzida do arquivo ZIP com as entradas usadas pelo verificador
+
+    Os registros locais (cabeçalho e dados criptografados) e do diretório
+    central são copiados byte a byte, então o verificador do nó escolhe as
+    mesmas entradas e confere os mesmos bytes que o do coordenador.
+
+    Args:
+        zip_path (str): Caminho para o arquivo ZIP
+
+    Returns:
+        bytes: Arquivo ZIP reduzido
+
+    Raises:
+        ValueError: Sem verificador em processo ou arquivo ZIP64 (use um caminho compartilhado)
+    """
+    verifier = open_verifier(zip_path)
+    if verifier is None:
+        raise ValueError("Criptografia não suportada pelo verificador em processo")
+    # ZipCrypto confirma na entrada principal e filtra pelas secundárias; AES usa só a principal
+    entries = [verifier.primary] + list(getattr(verifier, 'secondary', ()))
+    offsets = {entry.info.header_offset for entry in entries}
+
+    with zipfile.ZipFile(zip_path) as zf:
+        start_dir = zf.start_dir
+        num_records = len(zf.filelist)
+        infos = [info for info in zf.infolist() if info.header_offset in offsets]
+
+    out = bytearray()
+    central = bytearray()
+    with open(zip_path, 'rb') as fp:
+        records = {}
+        fp.seek(start_dir)
+        for _ in range(num_records):
+            fixed = fp.read(CENTRAL_HEADER_STRUCT.size)
+            fields = CENTRAL_HEADER_STRUCT.unpack(fixed)
+            if fields[0] != CENTRAL_HEADER_SIGNATURE:
+                raise zipfile.BadZipFile("Diretório central inválido")
+            name_len, extra_len, comment_len, offset = fields[10], fields[11], fields[12], fields[16]
+            records[offset] = fixed + fp.read(name_len + extra_len + comment_len)
+
+        for info in infos:
+            if info.header_offset >= ZIP64_LIMIT or info.compress_size >= ZIP64_LIMIT \
+                    or info.header_offset not in records:
+                raise ValueError("Arquivos ZIP64 não podem ser enviados aos nós; use um caminho compartilhado")
+            fp.seek(info.header_offset)
+            local = fp.read(LOCAL_HEADER_STRUCT.size)
+            fields = LOCAL_HEADER_STRUCT.unpack(local)
+            if fields[0] != LOCAL_HEADER_SIGNATURE:
+                raise zipfile.BadZipFile(f"Cabeçalho local inválido para {info.filename}")
+            # O descritor de dados (bit 3) não é necessário: tamanhos e CRC vêm do diretório central
+            local += fp.read(fields[9] + fields[10] + info.compress_size)
+
+            record = bytearray(records[info.header_offset])
+            struct.pack_into('<L', record, CENTRAL_OFFSET_POSITION, len(out))
+            out += local
+            central += record
+
+    central_offset = len(out)
+    out += central
+    out += END_RECORD_STRUCT.pack(END_RECORD_SIGNATURE, 0, 0, len(infos), len(infos),
+                                  len(central), central_offset, 0)
+    return bytes(out)
+
+
+class Connection:
+    """Conexão TCP com mensagens JSON em linhas; envio protegido por lock"""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.rfile = sock.makefile('rb')
+        self.lock = threading.Lock()
+
+    def send(self, kind, **fields):
+        """
+        Args:
+            kind (str): Tipo da mensagem
+            **fields: Demais campos
+
+        Returns:
+            bool: False se a conexão já caiu
+        """
+        data = json.dumps({"v": PROTOCOL_VERSION, "type": kind, **fields}) + '\n'
+        with self.lock:
+            try:
+                self.sock.sendall(data.encode('utf-8'))
+                return True
+            except OSError:
+                return False
+
+    def receive(self):
+        """
+        Returns:
+            dict: Próxima mensagem válida, ou None quando a conexão termina
+        """
+        while True:
+            try:
+                line = self.rfile.readline()
+            except (OSError, ValueError):
+                return None
+            if not line:
+                return None
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                message = json.loads(line)
+            except ValueError:
+                print(f"AVISO: Mensagem inválida ignorada: {line[:80]!r}", file=sys.stderr)
+                continue
+            if message.get('v') != PROTOCOL_VERSION:
+                print(f"AVISO: Versão de protocolo desconhecida: {message.get('v')}", file=sys.stderr)
+                continue
+            return message
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class Lease:
+    """Fatias emprestadas a um nó até serem concluídas, devolvidas ou expirarem"""
+
+    def __init__(self, lease_id, node, shards, timeout):
+        self.id = lease_id
+        self.node = node
+        self.shards = list(shards)
+        self.timeout = timeout
+        # Um pedido de devolução por vez; sem nada devolvido, o empréstimo não é mais roubado
+        self.revoking = False
+        self.stealable = True
+        self.renew()
+
+    def renew(self):
+        self.deadline = time.time() + self.timeout
+
+
+class RemoteNode:
+    """Um nó worker conectado, visto pelo coordenador"""
+
+    def __init__(self, conn, address, hello):
+        self.conn = conn
+        self.address = f"{address[0]}:{address[1]}"
+        self.name = str(hello.get('name') or self.address)
+        self.workers = max(1, int(hello.get('workers') or 1))
+        self.tested = 0
+        self.current = ''
+        self.leases = {}
+        self.alive = True
+
+    def summary(self):
+        return {"name": self.name, "address": self.address, "workers": self.workers, "testedWords": self.tested}
+
+
+class Coordinator:
+    """Planeja as fatias e as empresta aos nós conectados"""
+
+    def __init__(self, address, job, source_spec, verifier, lease_timeout=DEFAULT_LEASE_TIMEOUT, token=None):
+        self.address = address
+        self.job = job
+        self.source_spec = source_spec
+        self.verifier = verifier
+        self.batch_size = verifier.batch_size
+        self.lease_timeout = lease_timeout
+        self.token = token
+        self.lock = threading.Lock()
+        self.pending = collections.deque()
+        self.leases = {}
+        self.nodes = []
+        self.lease_ids = itertools.count(1)
+        self.planner = None
+        # Candidatas das fatias concluídas (cada fatia contada uma vez)
+        self.completed = 0
+        self.multiplier = 1
+        self.found = None
+        self.found_by = None
+        self.stopped = threading.Event()
+        self.server = None
+
+    def listen(self):
+        """Abre o socket de escuta (antes de run, para erros de endereço aparecerem cedo)"""
+        self.server = socket.create_server(self.address)
+        self.server.settimeout(0.5)
+
+    def accept_loop(self):
+        while not self.stopped.is_set():
+            try:
+                sock, address = self.server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            sock.settimeout(None)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self.serve_node, args=(Connection(sock), address), daemon=True).start()
+
+    def serve_node(self, conn, address):
+        """Atende um nó do hello até a desconexão"""
+        hello = conn.receive()
+        if hello is None or hello.get('type') != 'hello':
+            conn.close()
+            return
+        if self.token is not None and not hmac.compare_digest(str(hello.get('token') or ''), self.token):
+            print(f"AVISO: Nó {address[0]}:{address[1]} recusado: token inválido", file=sys.stderr)
+            conn.send("error", error="Token inválido")
+            conn.close()
+            return
+
+        node = RemoteNode(conn, address, hello)
+        with self.lock:
+            if self.stopped.is_set():
+                conn.send("stop", reason=self.stop_reason())
+                conn.close()
+                return
+            self.nodes.append(node)
+        print(f"INFO: Nó {node.name} ({node.address}) conectado com {node.workers} workers", file=sys.stderr)
+        conn.send("job", **self.job)
+
+        try:
+            while True:
+                message = conn.receive()
+                if message is None:
+                    break
+                if message.get('type') == 'error':
+                    print(f"AVISO: Nó {node.name} falhou: {message.get('error')}", file=sys.stderr)
+                    break
+                self.on_message(node, message)
+        finally:
+            self.disconnect(node)
+            conn.close()
+
+    def on_message(self, node, message):
+        """Trata uma mensagem de um nó; as respostas são enviadas fora do lock"""
+        kind = message.get('type')
+        outgoing = []
+        if kind == 'hit':
+            # Fora do lock: um acerto falso (nó com defeito ou malicioso) não encerra o ataque
+            password = self.verified_password(node, message.get('password'))
+        with self.lock:
+            # Qualquer mensagem mostra que o nó está vivo
+            for lease in node.leases.values():
+                lease.renew()
+            if kind == 'lease':
+                outgoing.append((node.conn,) + self.grant(node))
+                outgoing.extend(self.steal(node) if outgoing[-1][1] == 'wait' else ())
+            elif kind == 'progress':
+                node.tested = int(message.get('tested') or 0)
+                node.current = str(message.get('current') or '')
+            elif kind == 'done':
+                self.complete_shard(message.get('lease'), tuple(message.get('shard') or ()))
+            elif kind == 'released':
+                self.release(message.get('lease'), [tuple(shard) for shard in message.get('shards') or ()])
+            elif kind == 'hit':
+                node.tested = int(message.get('tested') or node.tested)
+                if self.found is None and password is not None:
+                    self.found = password.decode('utf-8', errors='replace')
+                    self.found_by = node.name
+        for conn, reply, fields in outgoing:
+            conn.send(reply, **fields)
+
+    def verified_password(self, node, text):
+        """
+        Confere com o verificador local a senha anunciada por um nó
+
+        Args:
+            node (RemoteNode): Nó que anunciou o acerto
+            text (str): Senha recebida (bytes fora do UTF-8 como surrogates)
+
+        Returns:
+            bytes: Senha confirmada, ou None se estiver errada ou for inválida
+        """
+        try:
+            password = str(text).encode('utf-8', errors='surrogateescape')
+        except UnicodeEncodeError:
+            password = None
+        if password is None or not self.verifier.check_batch([password]):
+            print(f"AVISO: Senha anunciada pelo nó {node.name} não confere, ignorando", file=sys.stderr)
+            return None
+        return password
+
+    def grant(self, node):
+        """
+        Empresta ao nó as próximas fatias da fila (com o lock)
+
+        Returns:
+            tuple: (tipo, campos) da resposta
+        """
+        if self.stopped.is_set() or self.found is not None:
+            return "stop", {"reason": self.stop_reason()}
+        shards = []
+        while self.pending and len(shards) < node.workers * SHARDS_PER_LEASE_PER_WORKER:
+            shards.append(self.pending.popleft())
+        if not shards:
+            return "wait", {"retry": WAIT_RETRY}
+        lease = Lease(next(self.lease_ids), node, shards, self.lease_timeout)
+        self.leases[lease.id] = lease
+        node.leases[lease.id] = lease
+        return "lease", {"lease": lease.id, "shards": [list(shard) for shard in shards]}
+
+    def steal(self, thief):
+        """
+        Pede a devolução da metade final do maior empréstimo de outro nó (com o lock)
+
+        As fatias devolvidas voltam para o início da fila e o nó ocioso as
+        recebe no próximo pedido.
+
+        Returns:
+            list: Mensagens (conexão, tipo, campos) a enviar
+        """
+        candidates = [lease for lease in self.leases.values()
+                      if lease.node is not thief and lease.stealable and not lease.revoking and len(lease.shards) > 1]
+        if not candidates:
+            return []
+        lease = max(candidates, key=lambda l: len(l.shards))
+        lease.revoking = True
+        tail = lease.shards[(len(lease.shards) + 1) // 2:]
+        return [(lease.node.conn, "revoke", {"lease": lease.id, "shards": [list(shard) for shard in tail]})]
+
+    def release(self, lease_id, shards):
+        """Recoloca na fila as fatias que o nó devolveu (com o lock)"""
+        lease = self.leases.get(lease_id)
+        if lease is None:
+            return
+        lease.revoking = False
+        released = [shard for shard in shards if shard in lease.shards]
+        if not released:
+            # Tudo já estava em andamento no nó: não insistir neste empréstimo
+            lease.stealable = False
+            return
+        for shard in released:
+            lease.shards.remove(shard)
+        self.pending.extendleft(reversed(released))
+        print(f"INFO: Nó {lease.node.name} devolveu {len(released)} fatias para nós ociosos", file=sys.stderr)
+        if not lease.shards:
+            self.drop_lease(lease)
+
+    def complete_shard(self, lease_id, shard):
+        """Registra uma fatia concluída (com o lock)"""
+        if len(shard) != 2:
+            return
+        self.completed += self.planner.shard_lines.pop(shard[0], 0) * self.multiplier
+        lease = self.leases.get(lease_id)
+        if lease is not None and shard in lease.shards:
+            lease.shards.remove(shard)
+            if not lease.shards:
+                self.drop_lease(lease)
+        elif shard in self.pending:
+            # Empréstimo expirado e já reemitido: não testar a fatia de novo
+            self.pending.remove(shard)
+
+    def drop_lease(self, lease):
+        del self.leases[lease.id]
+        lease.node.leases.pop(lease.id, None)
+
+    def requeue(self, lease):
+        """Devolve à fila as fatias de um empréstimo perdido (com o lock)"""
+        self.pending.extendleft(reversed(lease.shards))
+        self.drop_lease(lease)
+        return len(lease.shards)
+
+    def disconnect(self, node):
+        with self.lock:
+            node.alive = False
+            shards = sum(self.requeue(lease) for lease in list(node.leases.values()))
+        if not self.stopped.is_set() and self.found is None:
+            print(f"AVISO: Nó {node.name} desconectado; {shards} fatias voltaram para a fila", file=sys.stderr)
+
+    def expire_leases(self):
+        """Reemite os empréstimos de nós que pararam de responder (com o lock)"""
+        now = time.time()
+        for lease in list(self.leases.values()):
+            if now > lease.deadline:
+                shards = self.requeue(lease)
+                print(f"AVISO: Empréstimo {lease.id} do nó {lease.node.name} expirou; "
+                      f"{shards} fatias reemitidas", file=sys.stderr)
+                # Um nó travado não deve continuar recebendo trabalho
+                lease.node.conn.close()
+
+    def tested(self):
+        """
+        Returns:
+            int: Senhas testadas: as contagens dos nós incluem fatias em andamento, mas
+                perdem o que um nó caído testou desde a última mensagem (com o lock)
+        """
+        return max(self.completed, sum(node.tested for node in self.nodes))
+
+    def stop_reason(self):
+        if self.found is not None:
+            return "found"
+        if self.planner is not None and self.planner.done and not self.pending and not self.leases:
+            return "exhausted"
+        return "cancelled"
+
+    def stop(self):
+        """Encerra todos os nós imediatamente e fecha o socket de escuta"""
+        with self.lock:
+            self.stopped.set()
+            reason = self.stop_reason()
+            nodes = [node for node in self.nodes if node.alive]
+        for node in nodes:
+            node.conn.send("stop", reason=reason)
+        if self.server is not None:
+            self.server.close()
+
+    def run(self, start_time, multiplier=1, events=None):
+        """
+        Planeja as fatias, atende os nós e acompanha o progresso até o acerto ou o fim
+
+        Args:
+            start_time (float): Início da execução
+            multiplier (int): Candidatas por palavra (número de regras)
+            events (EventChannel): Canal de eventos estruturados (opcional)
+
+        Returns:
+            dict: Resultado no formato de crack_zip, com o resumo de cada nó em "nodes"
+        """
+        error = None
+        self.multiplier = multiplier
+        with open_source(self.source_spec) as source:
+            shard_size = shard_size_for(source.data_size, PLANNED_WORKERS, self.batch_size)
+            max_pending = MASK_PENDING_SHARDS if self.source_spec[0] == 'mask' else None
+            self.planner = planner = ShardPlanner(source, self.pending.append, shard_size, max_pending=max_pending)
+            planner.start()
+            acceptor = threading.Thread(target=self.accept_loop, daemon=True)
+            acceptor.start()
+            host, port = self.server.getsockname()[:2]
+            print(f"INFO: Coordenador aguardando nós em {host}:{port}", file=sys.stderr)
+
+            announced = False
+            try:
+                while True:
+                    time.sleep(0.1)
+                    with self.lock:
+                        if planner.error is not None:
+                            raise planner.error
+                        self.expire_leases()
+                        if self.found is not None:
+                            break
+                        if planner.done and not self.pending and not self.leases:
+                            break
+                        nodes = [node for node in self.nodes if node.alive]
+                        tested = self.tested()
+                        current = max(nodes, key=lambda n: n.tested).current if nodes else ''
+                        queue_depth = len(self.pending) + sum(len(l.shards) for l in self.leases.values())
+                    if planner.done and not announced:
+                        print(f"INFO: Total de {planner.total_lines} palavras na lista "
+                              f"({planner.total_lines * multiplier} candidatas)", file=sys.stderr)
+                        announced = True
+                    print_progress(tested, planner.estimated_total() * multiplier, start_time,
+                                   sum(node.workers for node in nodes), current, events,
+                                   queue_depth=queue_depth)
+            except Exception as e:
+                print(f"ERRO ao processar lista de palavras: {str(e)}", file=sys.stderr)
+                error = str(e)
+            finally:
+                self.stop()
+                # Os nós respondem à ordem de parar com a contagem final antes de desconectar
+                deadline = time.time() + STOP_GRACE
+                while time.time() < deadline and any(node.alive for node in self.nodes):
+                    time.sleep(0.05)
+                planner.stop()
+                planner.join()
+                acceptor.join(timeout=1.0)
+            total_words = planner.estimated_total() * multiplier
+
+        with self.lock:
+            # Esgotado, todas as fatias foram concluídas: a contagem exata é a das fatias
+            tested = self.completed if self.stop_reason() == "exhausted" else self.tested()
+            nodes = [node.summary() for node in self.nodes]
+        if self.found is not None:
+            print(f"SUCESSO: Nó {self.found_by} encontrou a senha", file=sys.stderr)
+            if events is not None:
+                events.hit(self.found)
+        if events is None:
+            print(f"Progresso: 100%, Tempo restante: 0s, Testadas: {tested}, Threads: 0, "
+                  f"Senha: {self.found or 'Não encontrada'}", file=sys.stderr, flush=True)
+
+        result = {
+            "success": self.found is not None,
+            "password": self.found,
+            "executionTime": int((time.time() - start_time) * 1000),
+            "testedWords": tested,
+            "totalWords": total_words,
+            "threadsUsed": sum(node["workers"] for node in nodes),
+            "nodes": nodes
+        }
+        if error is not None and self.found is None:
+            result["error"] = error
+        return result
+
+
+def coordinate(zip_path, address, wordlist_path=None, rules_path=None, mask=None, charsets=(), min_length=None,
+               max_length=None, lease_timeout=DEFAULT_LEASE_TIMEOUT, token=None, push_archive=True, events=None):
+    """
+    Executa o ataque como coordenador de nós worker remotos
+
+    Args:
+        zip_path (str): Caminho para o arquivo ZIP
+        address (tuple): (host, porta) de escuta
+        wordlist_path (str): Lista de palavras (os nós precisam de uma cópia com o mesmo conteúdo)
+        rules_path (str): Arquivo de regras de transformação (opcional)
+        mask (str): Máscara de força bruta, usada no lugar da lista
+        charsets (tuple): Conjuntos personalizados ?1 a ?4 da máscara
+        min_length (int): Menor comprimento testado com a máscara
+        max_length (int): Maior comprimento testado com a máscara
+        lease_timeout (float): Segundos sem notícias de um nó até suas fatias serem reemitidas
+        token (str): Segredo exigido no hello dos nós (opcional)
+        push_archive (bool): Enviar aos nós a cópia reduzida do ZIP (False: os nós abrem zip_path)
+        events (EventChannel): Canal de eventos estruturados (opcional)
+
+    Returns:
+        dict: Resultado no formato de crack_zip, com o resumo de cada nó em "nodes"
+    """
+    start_time = time.time()
+
+    def failure(message):
+        print(f"ERRO: {message}", file=sys.stderr)
+        return {
+            "success": False,
+            "error": message,
+            "executionTime": int((time.time() - start_time) * 1000),
+            "testedWords": 0,
+            "totalWords": 0,
+            "threadsUsed": 0
+        }
+
+    try:
+        verifier = open_verifier(zip_path)
+        if verifier is None:
+            return failure("O modo distribuído requer criptografia suportada pelo verificador em processo")
+        if token is None and not is_loopback(address[0]):
+            return failure(f"Escutar em {address[0]} exige um token (--token ou $SUPERZIP_CLUSTER_TOKEN)")
+        archive = base64.b64encode(archive_stub(zip_path)).decode('ascii') if push_archive else None
+        source_spec, rules, keyspace = prepare_keyspace(wordlist_path, rules_path, mask, charsets,
+                                                        min_length, max_length)
+    except (OSError, ValueError, zipfile.BadZipFile) as e:
+        return failure(f"Erro ao preparar o ataque: {str(e)}")
+
+    if source_spec[0] == 'mask':
+        mask_text, mask_charsets, mask_min, mask_max = source_spec[1]
+        source = {"kind": "mask", "mask": mask_text, "charsets": list(mask_charsets),
+                  "minLength": mask_min, "maxLength": mask_max}
+    else:
+        # Os nós conferem a lista pelo hash do conteúdo: aqui ele é calculado na hora
+        source = {"kind": source_spec[0], "wordlistPath": os.path.abspath(wordlist_path),
+                  "digest": keyspace.content_digest(compute=True)}
+    job = {
+        "zipName": os.path.basename(zip_path),
+        "zipPath": os.path.abspath(zip_path),
+        "archive": archive,
+        "source": source,
+        "rules": rules,
+        "batchSize": verifier.batch_size,
+        "heartbeat": HEARTBEAT_INTERVAL
+    }
+
+    print(f"INFO: Usando verificador {verifier.name} em processo nos nós"
+          f"{' (cópia reduzida do ZIP enviada aos nós)' if archive else ''}", file=sys.stderr)
+    coordinator = Coordinator(address, job, source_spec, verifier, lease_timeout, token)
+    try:
+        coordinator.listen()
+    except OSError as e:
+        return failure(f"Não foi possível escutar em {address[0]}:{address[1]}: {str(e)}")
+    result = coordinator.run(start_time, len(rules) if rules else 1, events)
+    flag_unconfirmed(result, verifier)
+    return result
+
+
+def resolve_source(source, wordlist_path=None):
+    """
+    Abre localmente o espaço de busca descrito pelo coordenador
+
+    Args:
+        source (dict): Campo "source" da mensagem job
+        wordlist_path (str): Cópia local da lista (padrão: o mesmo caminho do coordenador)
+
+    Returns:
+        tuple: Fonte para open_source, com as mesmas fatias que o coordenador planejou
+
+    Raises:
+        OSError: Lista inacessível
+        ValueError: Lista diferente da do coordenador ou índice indisponível
+    """
+    if source['kind'] == 'mask':
+        return ('mask', (source['mask'], tuple(source['charsets']), source['minLength'], source['maxLength']))
+    path = wordlist_path or source['wordlistPath']
+    digest = wordlist_digest(path)
+    if digest != source['digest']:
+        raise ValueError(f"A lista {path} difere da lista do coordenador")
+    if source['kind'] == 'index':
+        # As fatias são posições no índice: o nó precisa do mesmo índice
+        spec = prepare_source(path, digest=digest, background=False)
+        if spec[0] != 'index':
+            raise ValueError("Não foi possível usar o índice pré-compilado da lista neste nó")
+        return spec
+    return ('text', path)
+
+
+class WorkerNode:
+    """Nó worker: pede empréstimos ao coordenador e testa as fatias no pool local"""
+
+    def __init__(self, conn, zip_path, source_spec, job, num_workers):
+        self.conn = conn
+        self.pool = ProcessPool(zip_path, source_spec, job['batchSize'], num_workers, job.get('rules'))
+        self.heartbeat = float(job.get('heartbeat') or HEARTBEAT_INTERVAL)
+        self.inbox = queue.Queue()
+        # Fatias recebidas e ainda não enviadas ao pool, em ordem: (empréstimo, fatia)
+        self.queued = collections.deque()
+        # Fatias enviadas ao pool -> empréstimo
+        self.inflight = {}
+        self.failed = False
+
+    def read_loop(self):
+        while True:
+            message = self.conn.receive()
+            self.inbox.put(message)
+            if message is None:
+                return
+
+    def handle(self, message):
+        """
+        Trata uma mensagem do coordenador
+
+        Returns:
+            str: Motivo do encerramento, ou None para continuar
+        """
+        if message is None:
+            self.failed = True
+            return "conexão encerrada pelo coordenador"
+        kind = message.get('type')
+        if kind == 'lease':
+            shards = [tuple(shard) for shard in message['shards']]
+            self.queued.extend((message['lease'], shard) for shard in shards)
+            self.requested = False
+        elif kind == 'wait':
+            self.requested = False
+            self.next_request = time.time() + float(message.get('retry') or WAIT_RETRY)
+        elif kind == 'revoke':
+            # Devolver só o que ainda não foi enviado ao pool local
+            wanted = {(message['lease'], tuple(shard)) for shard in message.get('shards') or ()}
+            released = [item for item in self.queued if item in wanted]
+            for item in released:
+                self.queued.remove(item)
+            self.conn.send("released", lease=message['lease'], shards=[list(shard) for _, shard in released])
+        elif kind == 'stop':
+            return {"found": "senha encontrada", "exhausted": "espaço de busca esgotado"}.get(
+                message.get('reason'), "trabalho cancelado")
+        elif kind == 'error':
+            self.failed = True
+            return f"erro do coordenador: {message.get('error')}"
+        return None
+
+    def run(self):
+        """
+        Returns:
+            int: Código de saída (0 quando encerrado pelo coordenador ou por um acerto)
+        """
+        pool = self.pool
+        state = pool.state
+        capacity = pool.num_workers * INFLIGHT_PER_WORKER
+        self.requested = False
+        self.next_request = 0.0
+        last_heartbeat = 0.0
+        reason = None
+        threading.Thread(target=self.read_loop, daemon=True).start()
+        pool.start()
+        print(f"INFO: Nó iniciado com {pool.num_workers} processos", file=sys.stderr)
+
+        try:
+            while reason is None:
+                try:
+                    reason = self.handle(self.inbox.get(timeout=0.05))
+                    while reason is None:
+                        reason = self.handle(self.inbox.get_nowait())
+                except queue.Empty:
+                    pass
+                if reason is not None:
+                    break
+
+                found = state.found_password()
+                if found is not None:
+                    self.conn.send("hit", password=found.decode('utf-8', errors='surrogateescape'),
+                                   tested=state.tested())
+                    print(f"SUCESSO: Senha encontrada neste nó", file=sys.stderr)
+                    reason = "senha encontrada neste nó"
+                    break
+                if not pool.active_workers():
+                    self.conn.send("error", error="Os processos worker do nó terminaram")
+                    self.failed = True
+                    reason = "processos worker terminaram"
+                    break
+
+                for shard in pool.completed_shards():
+                    lease = self.inflight.pop(shard, None)
+                    self.conn.send("done", lease=lease, shard=list(shard))
+
+                while self.queued and len(self.inflight) < capacity:
+                    lease, shard = self.queued.popleft()
+                    self.inflight[shard] = lease
+                    pool.submit(shard)
+
+                # Pedir o próximo empréstimo antes de a fila local esvaziar
+                now = time.time()
+                if not self.requested and len(self.queued) < pool.num_workers and now >= self.next_request:
+                    self.conn.send("lease")
+                    self.requested = True
+
+                if now - last_heartbeat >= self.heartbeat:
+                    self.conn.send("progress", tested=state.tested(),
+                                   current=state.current_password().decode('utf-8', errors='replace'))
+                    last_heartbeat = now
+        finally:
+            pool.stop()
+            self.conn.send("progress", tested=state.tested(),
+                           current=state.current_password().decode('utf-8', errors='replace'))
+            self.conn.close()
+        print(f"INFO: Nó encerrado: {reason} ({state.tested()} senhas testadas)", file=sys.stderr)
+        return 1 if self.failed else 0
+
+
+def run_worker(address, num_workers=None, wordlist_path=None, token=None, name=None, zip_path=None):
+    """
+    Conecta ao coordenador e trabalha até receber a ordem de parar
+
+    Args:
+        address (tuple): (host, porta) do coordenador
+        num_workers (int): Processos do pool local (padrão: núcleos físicos)
+        wordlist_path (str): Cópia local da lista (padrão: o caminho informado pelo coordenador)
+        token (str): Segredo esperado pelo coordenador (opcional)
+        name (str): Nome do nó nos logs do coordenador (padrão: hostname)
+        zip_path (str): Cópia local do ZIP, usada quando o coordenador não envia a reduzida
+
+    Returns:
+        int: Código de saída
+    """
+    try:
+        sock = socket.create_connection(address, timeout=CONNECT_TIMEOUT)
+    except OSError as e:
+        print(f"ERRO: Não foi possível conectar ao coordenador {address[0]}:{address[1]}: {str(e)}", file=sys.stderr)
+        return 1
+    sock.settimeout(None)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    conn = Connection(sock)
+    num_workers = num_workers or physical_core_count()
+    conn.send("hello", name=name or socket.gethostname(), workers=num_workers, token=token)
+
+    job = conn.receive()
+    if job is None or job.get('type') != 'job':
+        detail = job.get('error') or job.get('reason') if job else "conexão encerrada"
+        print(f"ERRO: Coordenador recusou o nó: {detail}", file=sys.stderr)
+        conn.close()
+        return 1
+    print(f"INFO: Conectado ao coordenador {address[0]}:{address[1]} para {job['zipName']}", file=sys.stderr)
+
+    with tempfile.TemporaryDirectory(prefix='superzip-node-') as directory:
+        try:
+            if job.get('archive'):
+                archive_path = os.path.join(directory, job['zipName'])
+                with open(archive_path, 'wb') as fp:
+                    fp.write(base64.b64decode(job['archive']))
+            else:
+                archive_path = zip_path or job['zipPath']
+            if open_verifier(archive_path) is None:
+                raise ValueError(f"Sem verificador em processo para {archive_path}")
+            source_spec = resolve_source(job['source'], wordlist_path)
+        except (OSError, ValueError, zipfile.BadZipFile) as e:
+            print(f"ERRO ao preparar o nó: {str(e)}", file=sys.stderr)
+            conn.send("error", error=str(e))
+            conn.close()
+            return 1
+        return WorkerNode(conn, archive_path, source_spec, job, num_workers).run()
+
+
+def worker_main(argv=None):
+    """Função principal de 'zip_cracker.py worker'"""
+    parser = argparse.ArgumentParser(prog='zip_cracker.py worker',
+                                     description="Nó worker do modo distribuído: testa as fatias emprestadas pelo coordenador")
+    parser.add_argument('address', metavar='host:porta', help=f"Endereço do coordenador (porta padrão: {DEFAULT_PORT})")
+    parser.add_argument('--workers', type=int, metavar='N', help="Processos do pool local (padrão: núcleos físicos)")
+    parser.add_argument('--wordlist', metavar='lista_palavras',
+                        help="Cópia local da lista (padrão: o mesmo caminho usado pelo coordenador)")
+    parser.add_argument('--zip', dest='zip_path', metavar='arquivo_zip',
+                        help="Cópia local do ZIP, quando o coordenador usa --shared-archive")
+    parser.add_argument('--name', help="Nome do nó nos logs do coordenador (padrão: hostname)")
+    parser.add_argument('--token', default=os.environ.get('SUPERZIP_CLUSTER_TOKEN'),
+                        help="Segredo exigido pelo coordenador (padrão: $SUPERZIP_CLUSTER_TOKEN)")
+    args = parser.parse_args(argv)
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers precisa ser pelo menos 1")
+    try:
+        address = parse_address(args.address)
+    except ValueError as e:
+        parser.error(str(e))
+    return run_worker(address, args.workers, args.wordlist, args.token, args.name, args.zip_path)
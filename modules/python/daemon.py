@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+Serviço persistente de quebra de senhas.
+
+Em vez de um processo Python por upload, o wrapper.js mantém este serviço
+aberto e conversa com ele por JSON-RPC em linhas: as requisições chegam pelo
+stdin e as respostas e eventos saem pelo canal de eventos (events.py), num
+descritor próprio passado em --events-fd (stdout se omitido). O pool de processos worker fica aquecido entre os
+trabalhos; trabalhos simultâneos dividem os workers de forma justa (as
+fatias são distribuídas em rodízio entre os trabalhos em execução) e os que
+excedem as vagas do pool aguardam na fila.
+
+Cada trabalho grava um checkpoint das fatias concluídas na pasta do ZIP,
+identificado pela impressão digital do arquivo; se o serviço (ou o Node)
+morrer, o mesmo arquivo enviado de novo com a mesma lista retoma de onde parou.
+
+Requisições:
+    {"id": 1, "method": "crack", "params": {"zipPath": ..., "wordlistPath": ...,
+        "rulesPath": ..., "mask": ..., "charsets": [...], "minLength": ..., "maxLength": ...,
+        "noCache": false, "resume": true}}   (noCache: não consultar nem atualizar o cache de
+        resultados; resume: false começa do início em vez de retomar o checkpoint)
+    {"id": 2, "method": "cancel", "params": {"job": 1}}
+    {"id": 3, "method": "status"}
+    {"id": 4, "method": "shutdown"}
+
+Respostas e eventos (todos com "v": versão do protocolo):
+    {"v": 1, "type": "queued", "id": 1, "position": 0}
+    {"v": 1, "type": "progress", "id": 1, "progress": 12.5, "remainingTime": 3.2, "tested": 100,
+        "total": 800, "rate": 5000, "workers": 4, "workerRates": [...], "queueDepth": 6, "current": "senha"}
+    {"v": 1, "type": "log", "id": 1, "level": "INFO", "message": "..."}
+    {"v": 1, "type": "hit", "id": 1, "password": "senha"}
+    {"v": 1, "type": "result", "id": 1, "result": {...}}   (mesmo formato do JSON de zip_cracker.py)
+    {"v": 1, "type": "error", "id": 2, "error": "mensagem"}
+"""
+import argparse
+import collections
+import itertools
+import json
+import signal
+import sys
+import threading
+import time
+
+from verifiers import open_verifier
+from process_pool import ServicePool
+from wordlist import ShardPlanner, shard_size_for
+from wordlist_index import open_source
+import zip_cracker
+from zip_cracker import (crack_zip, prepare_keyspace, progress_snapshot, cache_prepass, cache_result, open_checkpoint,
+                         flag_unconfirmed)
+from checkpoint import archive_fingerprint, fingerprint_checkpoint_path
+from result_cache import ResultCache
+from events import EventChannel, RateMeter
+from instrumentation import StageStats
+
+# Vagas de trabalhos executando ao mesmo tempo (os demais esperam na fila)
+DEFAULT_SLOTS = 8
+
+# Tarefas em andamento por worker: pouco acima de 1 para nenhum worker ficar
+# ocioso, mas baixo para um trabalho novo entrar no rodízio rapidamente
+TASKS_PER_WORKER = 2
+
+# Fatias planejadas e ainda não concluídas por trabalho
+PENDING_SHARDS_PER_WORKER = 4
+
+# Intervalo entre eventos de progresso de cada trabalho, em segundos
+PROGRESS_INTERVAL = 0.5
+
+
+class CrackJob:
+    """Um pedido de quebra de senha e seu estado dentro do serviço"""
+
+    def __init__(self, job_id, key, params):
+        self.id = job_id
+        # Chave interna única: o cliente pode reutilizar ids e os workers guardam trabalhos em cache
+        self.key = key
+        self.params = params
+        self.start_time = time.time()
+        self.verifier = None
+        self.source_spec = None
+        self.rules = None
+        self.multiplier = 1
+        # Cache de resultados do arquivo (None com noCache) e hash do espaço de busca
+        self.cache = None
+        self.fingerprint = None
+        self.keyspace = None
+        # Fatias concluídas, gravadas para retomar o trabalho (ver checkpoint.py)
+        self.checkpoint = None
+        self.exhausted = False
+        # Preenchidos quando o trabalho ganha uma vaga no pool
+        self.slot = None
+        self.state = None
+        self.source = None
+        self.planner = None
+        self.pending = collections.deque()
+        self.inflight = 0
+        self.fallback = False
+        self.finished = False
+        self.events = None
+        self.meter = RateMeter()
+        # Contadores de tempo das etapas, somados a cada tarefa devolvida pelos workers
+        self.stats = StageStats()
+
+    def tested(self):
+        skipped = self.planner.skipped_lines * self.multiplier if self.planner is not None else 0
+        return skipped + (self.state.tested() if self.state is not None else 0)
+
+    def total(self):
+        return self.planner.estimated_total() * self.multiplier if self.planner is not None else 0
+
+    def result(self, num_workers, error=None):
+        """
+        Returns:
+            dict: Resultado no formato de crack_zip
+        """
+        found = self.state.found_password() if self.state is not None else None
+        password = found.decode('utf-8', errors='replace') if found is not None else None
+        result = {
+            "success": password is not None,
+            "password": password,
+            "executionTime": int((time.time() - self.start_time) * 1000),
+            "testedWords": self.tested(),
+            "totalWords": self.total(),
+            "threadsUsed": num_workers,
+            "stages": self.stats.to_dict()
+        }
+        if error is not None and password is None:
+            result["error"] = error
+        return result
+
+
+class CrackService:
+    """Recebe trabalhos, reserva vagas no pool e distribui as fatias em rodízio"""
+
+    def __init__(self, num_workers=None, num_slots=DEFAULT_SLOTS, events=None):
+        self.pool = ServicePool(num_workers, num_slots)
+        self.events = events or EventChannel(sys.stdout, PROGRESS_INTERVAL)
+        self.lock = threading.Lock()
+        self.waiting = collections.deque()
+        self.running = {}
+        self.jobs = {}
+        self.free_slots = list(range(num_slots))
+        self.sequence = itertools.count()
+        self.fallback_lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.scheduler = threading.Thread(target=self.schedule, daemon=True)
+
+    def start(self):
+        self.pool.start()
+        self.scheduler.start()
+        print(f"INFO: Serviço iniciado com {self.pool.num_workers} processos e {len(self.free_slots)} vagas",
+              file=sys.stderr)
+
+    def handle(self, request):
+        """
+        Atende uma requisição recebida do cliente
+
+        Args:
+            request (dict): Requisição JSON-RPC
+        """
+        request_id = request.get('id')
+        method = request.get('method')
+        params = request.get('params') or {}
+        reply = self.events.bind(request_id)
+
+        if method == 'crack':
+            with self.lock:
+                if request_id is None or request_id in self.jobs:
+                    reply.emit("error", error="Identificador de trabalho ausente ou repetido")
+                    return
+                job = CrackJob(request_id, next(self.sequence), params)
+                job.events = reply
+                self.jobs[request_id] = job
+            # A preparação (ZIP, índice da lista) não pode travar o recebimento de requisições
+            threading.Thread(target=self.prepare, args=(job,), daemon=True).start()
+        elif method == 'cancel':
+            reply.emit("result", result={"cancelled": self.cancel(params.get('job'))})
+        elif method == 'status':
+            with self.lock:
+                status = {"workers": self.pool.active_workers(), "running": len(self.running),
+                          "queued": len(self.waiting)}
+            reply.emit("result", result=status)
+        elif method == 'shutdown':
+            reply.emit("result", result={"shutdown": True})
+            self.stopped.set()
+        else:
+            reply.emit("error", error=f"Método desconhecido: {method}")
+
+    def prepare(self, job):
+        """
+        Abre o arquivo ZIP e monta o espaço de busca de um trabalho, colocando-o na fila
+
+        Args:
+            job (CrackJob): Trabalho recebido
+        """
+        params = job.params
+        try:
+            job.verifier = open_verifier(params['zipPath'])
+            if job.verifier is None:
+                # Sem verificador em processo o trabalho usa as ferramentas externas
+                # (motor de threads, que usa estado global: um de cada vez)
+                self.run_fallback(job)
+                return
+            if not params.get('noCache'):
+                # Cópias do mesmo arquivo: senha já registrada, ou uma das encontradas recentemente
+                job.cache = ResultCache.for_archive(params['zipPath'])
+                job.fingerprint = archive_fingerprint(params['zipPath'])
+                hit = cache_prepass(job.cache, job.fingerprint, params['zipPath'], job.verifier)
+                if hit is not None:
+                    password, origin, tested = hit
+                    if origin == 'known':
+                        job.cache.record_password(job.fingerprint, password)
+                    print(f"SUCESSO: Trabalho {job.id} respondido pelo cache de resultados", file=sys.stderr)
+                    job.events.hit(password.decode('utf-8', errors='replace'))
+                    self.finish(job, cache_result(job.start_time, password.decode('utf-8', errors='replace'),
+                                                  origin, tested))
+                    return
+            job.source_spec, job.rules, job.keyspace = prepare_keyspace(
+                params.get('wordlistPath'), params.get('rulesPath'), params.get('mask'),
+                tuple(params.get('charsets') or ()), params.get('minLength'), params.get('maxLength'))
+            job.multiplier = len(job.rules) if job.rules else 1
+            if job.cache is not None and job.cache.is_exhausted(job.fingerprint, job.keyspace):
+                job.events.log("INFO", "Este espaço de busca já foi testado inteiro contra o arquivo, sem acerto")
+                self.finish(job, cache_result(job.start_time))
+                return
+            job.fingerprint = job.fingerprint or archive_fingerprint(params['zipPath'])
+            job.checkpoint, job.source_spec = open_checkpoint(
+                params['zipPath'], job.keyspace, job.source_spec, params.get('resume', True),
+                params.get('wordlistPath'), fingerprint_checkpoint_path(params['zipPath'], job.fingerprint))
+            if job.checkpoint.ranges:
+                job.events.log("INFO", f"Retomando do checkpoint ({job.checkpoint.tested} senhas já testadas)")
+        except Exception as e:
+            print(f"ERRO ao preparar o trabalho {job.id}: {str(e)}", file=sys.stderr)
+            job.events.log("ERRO", f"Erro ao preparar o ataque: {str(e)}")
+            self.finish(job, job.result(0, f"Erro ao preparar o ataque: {str(e)}"))
+            return
+
+        with self.lock:
+            if job.finished:
+                return
+            # Avisar antes de o escalonador poder começar a enviar progresso
+            position = len(self.waiting) if not self.free_slots else 0
+            job.events.emit("queued", position=position)
+            self.waiting.append(job)
+
+    def run_fallback(self, job):
+        """Executa um trabalho sem verificador em processo pelo crack_zip tradicional"""
+        params = job.params
+        job.fallback = True
+        with self.fallback_lock:
+            if job.finished:
+                return
+            job.events.log("INFO", "Criptografia não suportada pelo verificador em processo, usando ferramentas externas")
+            result = crack_zip(params['zipPath'], params.get('wordlistPath'), engine='threads',
+                               rules_path=params.get('rulesPath'), mask=params.get('mask'),
+                               charsets=tuple(params.get('charsets') or ()),
+                               min_length=params.get('minLength'), max_length=params.get('maxLength'),
+                               events=job.events, use_cache=not params.get('noCache'))
+        self.finish(job, result)
+
+    def cancel(self, job_id):
+        """
+        Cancela um trabalho na fila ou em execução
+
+        Args:
+            job_id: Identificador do trabalho (id da requisição crack)
+
+        Returns:
+            bool: True se o trabalho existia e ainda não tinha terminado
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.finished:
+                return False
+            if job in self.waiting:
+                self.waiting.remove(job)
+            elif job.fallback:
+                zip_cracker.stop_threads.set()
+            elif job.state is not None:
+                # O escalonador entrega o resultado quando as tarefas em andamento voltarem
+                job.state.cancel()
+                return True
+        self.finish(job, job.result(0, "Trabalho cancelado"))
+        return True
+
+    def finish(self, job, result):
+        """Entrega o resultado de um trabalho (uma única vez)"""
+        with self.lock:
+            if job.finished:
+                return
+            job.finished = True
+            self.jobs.pop(job.id, None)
+        if job.checkpoint is not None:
+            self.close_checkpoint(job, result)
+        job.events.result(result)
+
+    def close_checkpoint(self, job, result):
+        """Remove o checkpoint de um trabalho concluído ou grava o progresso de um interrompido"""
+        try:
+            if result.get("success") or job.exhausted:
+                job.checkpoint.remove()
+            elif job.checkpoint.dirty:
+                job.checkpoint.save()
+        except OSError as e:
+            print(f"AVISO: Não foi possível gravar o checkpoint do trabalho {job.id}: {str(e)}", file=sys.stderr)
+
+    def activate(self, job, slot):
+        """Coloca um trabalho da fila em uma vaga livre do pool"""
+        job.slot = slot
+        job.state = self.pool.slots[slot]
+        job.state.reset()
+        job.source = open_source(job.source_spec)
+        num_workers = self.pool.num_workers
+        checkpoint = job.checkpoint
+        if checkpoint is not None and checkpoint.shard_size:
+            # As fatias precisam ser as mesmas da execução anterior
+            shard_size = checkpoint.shard_size
+        else:
+            shard_size = shard_size_for(job.source.data_size, num_workers, job.verifier.batch_size)
+        skip = None
+        if checkpoint is not None:
+            checkpoint.shard_size = shard_size
+            skip = checkpoint.is_done
+        job.planner = ShardPlanner(job.source, job.pending.append, shard_size, skip,
+                                   max_pending=num_workers * PENDING_SHARDS_PER_WORKER)
+        job.planner.start()
+        self.running[slot] = job
+        print(f"INFO: Trabalho {job.id} iniciado na vaga {slot}", file=sys.stderr)
+        job.events.log("INFO", f"Usando verificador {job.verifier.name} em processo")
+
+    def release(self, job):
+        """Libera a vaga de um trabalho depois que todas as suas tarefas voltaram"""
+        job.planner.stop()
+        job.planner.join()
+        job.source.close()
+        del self.running[job.slot]
+        self.free_slots.append(job.slot)
+
+    def schedule(self):
+        """Laço do escalonador: recolhe tarefas concluídas, encerra trabalhos e distribui fatias"""
+        pool = self.pool
+        capacity = pool.num_workers * TASKS_PER_WORKER
+        inflight = 0
+        turn = 0
+        while not self.stopped.is_set():
+            for slot, job_key, shard, completed, stats in pool.completed_tasks(timeout=0.05):
+                inflight -= 1
+                job = self.running.get(slot)
+                if job is not None and job.key == job_key:
+                    job.inflight -= 1
+                    job.stats.merge(stats)
+                    lines = job.planner.shard_lines.pop(shard[0], None)
+                    # Só fatias testadas até o fim: uma interrompida volta inteira na retomada
+                    if completed and lines is not None and job.checkpoint is not None:
+                        job.checkpoint.add(shard[0], shard[1], lines * job.multiplier)
+
+            failed = []
+            with self.lock:
+                while self.waiting and self.free_slots:
+                    job = self.waiting.popleft()
+                    slot = self.free_slots.pop(0)
+                    try:
+                        self.activate(job, slot)
+                    except Exception as e:
+                        self.free_slots.append(slot)
+                        job.state = None
+                        failed.append((job, e))
+                jobs = list(self.running.values())
+            for job, e in failed:
+                self.finish(job, job.result(0, f"Erro ao iniciar o trabalho: {str(e)}"))
+
+            for job in jobs:
+                self.check_job(job)
+                if not job.finished:
+                    self.report_progress(job)
+                    if job.checkpoint is not None:
+                        job.checkpoint.save_if_due()
+                elif job.inflight == 0:
+                    with self.lock:
+                        self.release(job)
+
+            # Rodízio: uma fatia por trabalho a cada volta, até encher os workers
+            active = [job for job in jobs if not job.finished and not job.state.is_found()]
+            while inflight < capacity and active:
+                turn %= len(active)
+                job = active[turn]
+                if not job.pending:
+                    active.pop(turn)
+                    continue
+                shard = job.pending.popleft()
+                pool.submit((job.slot, job.key, job.params['zipPath'], job.source_spec,
+                             job.verifier.batch_size, job.rules, shard))
+                job.inflight += 1
+                inflight += 1
+                turn += 1
+
+    def check_job(self, job):
+        """Entrega o resultado de um trabalho em execução que terminou"""
+        if job.finished:
+            return
+        state = job.state
+        planner = job.planner
+        found = state.found_password()
+        if found is not None:
+            print(f"SUCESSO: Trabalho {job.id} encontrou a senha", file=sys.stderr)
+            # Retrato final atualizado: o canal o escreve antes do acerto e encerra o progresso
+            self.report_progress(job)
+            job.events.hit(found.decode('utf-8', errors='replace'))
+            result = job.result(self.pool.num_workers)
+            if not flag_unconfirmed(result, job.verifier) and job.cache is not None:
+                job.cache.record_password(job.fingerprint, found)
+            self.finish(job, result)
+        elif planner.error is not None:
+            state.cancel()
+            self.finish(job, job.result(self.pool.num_workers, f"Erro ao ler a lista: {str(planner.error)}"))
+        elif state.is_found():
+            # Cancelado: aguardar as tarefas em andamento para liberar a vaga
+            if job.inflight == 0:
+                self.finish(job, job.result(self.pool.num_workers, "Trabalho cancelado"))
+        elif planner.done and not job.pending and job.inflight == 0:
+            job.exhausted = True
+            if job.cache is not None:
+                job.cache.record_exhausted(job.fingerprint, job.keyspace)
+            self.finish(job, job.result(self.pool.num_workers))
+
+    def report_progress(self, job):
+        """Envia o progresso de um trabalho (o canal coalesce e limita a taxa)"""
+        snapshot = progress_snapshot(
+            job.tested(), job.total(), job.start_time, self.pool.num_workers,
+            job.state.current_password().decode('utf-8', errors='replace'),
+            job.meter.update(job.state.counters), len(job.pending) + job.inflight)
+        # Com o lock de finish: um cancelamento não pode receber progresso depois do resultado
+        with self.lock:
+            if not job.finished:
+                job.events.progress(snapshot)
+
+    def stop(self):
+        """Cancela os trabalhos e encerra o pool"""
+        self.stopped.set()
+        self.scheduler.join(timeout=2.0)
+        with self.lock:
+            pending = list(self.jobs.values())
+        for job in pending:
+            if job.state is not None:
+                job.state.cancel()
+            self.finish(job, job.result(self.pool.num_workers, "Serviço encerrado"))
+        self.pool.stop()
+
+
+def main():
+    """Função principal: lê requisições do stdin até EOF ou shutdown"""
+    parser = argparse.ArgumentParser(description="Serviço persistente de quebra de senha de arquivos ZIP")
+    parser.add_argument('--workers', type=int, help="Processos worker (padrão: núcleos físicos)")
+    parser.add_argument('--slots', type=int, default=DEFAULT_SLOTS,
+                        help="Trabalhos executando ao mesmo tempo (os demais aguardam na fila)")
+    parser.add_argument('--events-fd', type=int, metavar='fd',
+                        help="Descritor de arquivo para respostas e eventos (padrão: stdout)")
+    args = parser.parse_args()
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+
+    events = None
+    if args.events_fd is not None:
+        events = EventChannel.from_fd(args.events_fd, PROGRESS_INTERVAL)
+    service = CrackService(args.workers, args.slots, events)
+    service.start()
+    try:
+        for line in sys.stdin:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                service.events.emit("error", error=f"JSON inválido: {str(e)}")
+                continue
+            service.handle(request)
+            if service.stopped.is_set():
+                break
+    finally:
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Canal de eventos estruturados (JSON em linhas) para o wrapper.js.
+
+Cada linha é um objeto JSON com a versão do protocolo ("v") e o tipo do
+evento ("type"): progress, log, hit, result, queued e error. O canal usa um
+descritor de arquivo próprio, separado do stderr (logs para humanos) e do
+stdout, então nada que outro código imprima pode corromper o protocolo, e
+senhas com qualquer conteúdo chegam intactas.
+
+Os eventos de progresso são coalescidos: cada trabalho guarda só o retrato
+mais recente e no máximo um é escrito por intervalo, então um motor rápido
+não fica limitado pela saída de status. O acerto e o resultado encerram o
+progresso do trabalho: o último retrato pendente sai antes deles e nenhum
+sai depois.
+
+Na linha de comando, LogForwarder repassa ao canal, como eventos log, as
+linhas do stderr que começam com um nível (INFO, AVISO, ERRO, ...).
+"""
+import copy
+import json
+import os
+import threading
+import time
+
+EVENTS_VERSION = 1
+
+# Intervalo mínimo entre eventos de progresso de um mesmo trabalho, em segundos
+PROGRESS_INTERVAL = 0.25
+
+# Níveis das mensagens de log no stderr
+LOG_LEVELS = ('INFO', 'AVISO', 'ERRO', 'ALERTA', 'SUCESSO')
+
+
+class EventChannel:
+    """Escreve eventos JSON (um por linha) com controle de taxa do progresso"""
+
+    def __init__(self, stream, progress_interval=PROGRESS_INTERVAL):
+        self.stream = stream
+        self.progress_interval = progress_interval
+        self.job = None
+        self.lock = threading.Lock()
+        # Último retrato de progresso não escrito e hora da última escrita, por trabalho
+        self.latest = {}
+        self.last_write = {}
+        # Trabalhos com o progresso encerrado (acerto anunciado)
+        self.closed = set()
+
+    @classmethod
+    def from_fd(cls, fd, progress_interval=PROGRESS_INTERVAL):
+        """
+        Abre o canal em um descritor de arquivo herdado do processo pai
+
+        Args:
+            fd (int): Descritor (ex.: 3, passado pelo wrapper.js)
+            progress_interval (float): Intervalo mínimo entre eventos de progresso
+
+        Returns:
+            EventChannel: Canal pronto para uso
+        """
+        return cls(os.fdopen(fd, 'w', encoding='utf-8', buffering=1), progress_interval)
+
+    def bind(self, job):
+        """
+        Cria uma visão do canal cujos eventos levam o identificador do trabalho
+
+        Args:
+            job: Identificador do trabalho
+
+        Returns:
+            EventChannel: Visão que compartilha o stream, o lock e a coalescência
+        """
+        view = copy.copy(self)
+        view.job = job
+        return view
+
+    def _write(self, event_type, fields):
+        event = {"v": EVENTS_VERSION, "type": event_type}
+        if self.job is not None:
+            event["id"] = self.job
+        event.update(fields)
+        self.stream.write(json.dumps(event, separators=(',', ':')) + '\n')
+        self.stream.flush()
+
+    def emit(self, event_type, **fields):
+        """
+        Escreve um evento imediatamente
+
+        Args:
+            event_type (str): Tipo do evento
+            **fields: Campos do evento
+        """
+        with self.lock:
+            self._write(event_type, fields)
+
+    def progress(self, snapshot):
+        """
+        Registra um retrato de progresso, escrevendo-o só se o intervalo já passou
+
+        Args:
+            snapshot (dict): Campos do evento de progresso
+        """
+        now = time.time()
+        with self.lock:
+            if self.job in self.closed:
+                return
+            if now - self.last_write.get(self.job, 0) < self.progress_interval:
+                self.latest[self.job] = snapshot
+                return
+            self.latest.pop(self.job, None)
+            self.last_write[self.job] = now
+            self._write("progress", snapshot)
+
+    def flush_progress(self, close=False):
+        """
+        Escreve o último retrato pendente (antes do acerto ou do resultado)
+
+        Args:
+            close (bool): Encerrar o progresso do trabalho: retratos posteriores são descartados
+        """
+        with self.lock:
+            snapshot = self.latest.pop(self.job, None)
+            self.last_write.pop(self.job, None)
+            if snapshot is not None:
+                self._write("progress", snapshot)
+            if close:
+                self.closed.add(self.job)
+
+    def log(self, level, message):
+        """
+        Args:
+            level (str): INFO, AVISO, ERRO, ALERTA ou SUCESSO
+            message (str): Mensagem
+        """
+        self.emit("log", level=level, message=message)
+
+    def hit(self, password, archive=None):
+        """
+        Args:
+            password (str): Senha encontrada
+            archive (str): Arquivo ZIP da senha, no modo de vários arquivos (opcional)
+        """
+        # Com vários arquivos o ataque continua depois de cada acerto
+        self.flush_progress(close=archive is None)
+        if archive is None:
+            self.emit("hit", password=password)
+        else:
+            self.emit("hit", password=password, zipPath=archive)
+
+    def result(self, result):
+        """
+        Args:
+            result (dict): Resultado final (formato de crack_zip)
+        """
+        self.flush_progress(close=True)
+        self.emit("result", result=result)
+        with self.lock:
+            self.closed.discard(self.job)
+
+
+class LogForwarder:
+    """
+    Stream de texto que repassa ao canal de eventos as linhas de log do stderr
+
+    Cada linha continua indo para o stream original; as que começam com um
+    nível de LOG_LEVELS também viram eventos log. Só o processo que criou o
+    repassador escreve no canal (processos filhos herdam o objeto).
+    """
+
+    def __init__(self, stream, events):
+        self.stream = stream
+        self.events = events
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.pending = ''
+
+    def write(self, text):
+        count = self.stream.write(text)
+        if os.getpid() == self.pid:
+            with self.lock:
+                *lines, self.pending = (self.pending + text).split('\n')
+                for line in lines:
+                    self.forward(line)
+        return count
+
+    def forward(self, line):
+        """Envia uma linha completa como evento log, se ela tiver um nível"""
+        level = line.split(' ', 1)[0].rstrip(':')
+        if level not in LOG_LEVELS:
+            return
+        # "ERRO: mensagem" perde o prefixo; "ERRO ao ler: ..." segue inteira
+        prefix = level + ': '
+        self.events.log(level, line[len(prefix):] if line.startswith(prefix) else line)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class RateMeter:
+    """Mede a vazão total e por worker a partir de contadores acumulados"""
+
+    def __init__(self, window=1.0, first_window=0.1):
+        self.window = window
+        # A primeira medição sai mais cedo para o progresso não começar com taxa zero
+        self.first_window = first_window
+        self.last_time = time.time()
+        self.last_counters = None
+        self.rates = None
+
+    def update(self, counters):
+        """
+        Atualiza as taxas quando a janela mínima de medição já passou
+
+        Args:
+            counters (list): Senhas testadas acumuladas por worker (zero na criação do medidor)
+
+        Returns:
+            list: Senhas por segundo de cada worker (última medição)
+        """
+        now = time.time()
+        counters = list(counters)
+        if self.last_counters is None or len(counters) != len(self.last_counters):
+            self.last_counters = [0] * len(counters)
+        elapsed = now - self.last_time
+        if elapsed >= (self.window if self.rates is not None else self.first_window):
+            self.rates = [(c - p) / elapsed for c, p in zip(counters, self.last_counters)]
+            self.last_counters = counters
+            self.last_time = now
+        return self.rates if self.rates is not None else [0.0] * len(counters)
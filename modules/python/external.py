@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Backend de ferramentas externas (7z, unzip) para o que o verificador em
+processo não cobre (métodos de compressão ou criptografia desconhecidos).
+
+As ferramentas são procuradas no PATH uma única vez por processo. Para cada
+arquivo, uma calibração testa cada ferramenta com uma senha aleatória: só as
+que reconhecem a senha errada (e não um método não suportado) ficam, na
+ordem da mais rápida para a mais lenta.
+
+ExternalPool executa os testes num loop asyncio numa thread própria, com
+create_subprocess_exec (sem shell e sem escapar argumentos: a senha vai
+como bytes) e um semáforo que limita os processos filhos simultâneos. Quando
+uma senha acerta, os filhos ainda em execução são encerrados na hora.
+"""
+import asyncio
+import concurrent.futures
+import functools
+import os
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+# Testes por ferramenta na calibração (vale a mediana)
+CALIBRATION_RUNS = 3
+
+# Tempo máximo para encerrar o loop e os filhos ao fechar o pool, em segundos
+CLOSE_TIMEOUT = 5.0
+
+# Códigos de saída do unzip: aviso, erro (de dados) em alguma entrada e senha incorreta
+UNZIP_WARNING = 1
+UNZIP_ERROR = 2
+UNZIP_BAD_PASSWORD = 82
+
+# Mensagens do unzip para senha recusada numa entrada, ou para dados que não conferem
+# depois que a senha passou pelo byte de verificação
+UNZIP_WRONG_PASSWORD_MESSAGES = (b'incorrect password', b'bad CRC', b'invalid compressed data')
+
+
+def sevenzip_command(path, zip_path, password):
+    """Argumentos do teste com 7z"""
+    # '--' encerra as opções: um caminho começando com '-' não vira opção
+    return [path, 't', '-y', '-bd', b'-p' + password, '--', zip_path]
+
+
+def sevenzip_result(returncode, output):
+    """Interpreta a saída do 7z: True, False ou None (não concluiu)"""
+    if returncode == 0:
+        return True
+    # Também cobre o falso positivo do byte de verificação ("CRC Failed ... Wrong password?")
+    if b'Wrong password' in output:
+        return False
+    return None
+
+
+def unzip_command(path, zip_path, password):
+    """Argumentos do teste com unzip"""
+    return [path, '-qq', '-t', '-P', password, zip_path]
+
+
+def unzip_result(returncode, output):
+    """Interpreta o código de saída do unzip: True, False ou None (não concluiu)"""
+    if returncode == 0:
+        return True
+    if returncode == UNZIP_BAD_PASSWORD:
+        return False
+    # Passou pelo byte de verificação mas os dados não conferem (exit 2), ou senha
+    # recusada só em parte das entradas (exit 1). Outros códigos (arquivo ilegível,
+    # método não suportado, falta de memória, interrupção) não dizem nada da senha
+    if returncode in (UNZIP_WARNING, UNZIP_ERROR) and any(message in output for message in UNZIP_WRONG_PASSWORD_MESSAGES):
+        return False
+    return None
+
+
+# Ferramentas procuradas no PATH: nome -> (montagem do comando, interpretação da saída)
+TOOLS = {
+    '7zz': (sevenzip_command, sevenzip_result),
+    '7z': (sevenzip_command, sevenzip_result),
+    '7za': (sevenzip_command, sevenzip_result),
+    'unzip': (unzip_command, unzip_result),
+}
+
+
+class ExternalTool:
+    """Ferramenta externa encontrada no PATH"""
+
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        self.build_command, self.parse_result = TOOLS[name]
+        # Mediana da calibração, em segundos (None antes de calibrar)
+        self.seconds = None
+
+    def command(self, zip_path, password):
+        """
+        Args:
+            zip_path (str): Caminho absoluto do arquivo ZIP
+            password (bytes): Senha a testar
+
+        Returns:
+            list: Argumentos do processo (sem shell)
+        """
+        return self.build_command(self.path, zip_path, password)
+
+    def test(self, zip_path, password):
+        """
+        Testa uma senha de forma síncrona (para testes avulsos, fora do pool)
+
+        Args:
+            zip_path (str): Caminho para o arquivo ZIP
+            password (bytes): Senha a testar
+
+        Returns:
+            bool: True se acertou, False se a ferramenta recusou a senha, None se não concluiu
+        """
+        try:
+            result = subprocess.run(self.command(os.path.abspath(zip_path), password),
+                                    stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        except (OSError, ValueError):
+            # ValueError: senha com byte nulo não cabe num argumento
+            return None
+        return self.parse_result(result.returncode, result.stdout)
+
+
+@functools.lru_cache(maxsize=None)
+def probe_tools():
+    """
+    Procura as ferramentas externas no PATH (uma única vez por processo)
+
+    Returns:
+        tuple: ExternalTool de cada ferramenta encontrada, na ordem de TOOLS
+    """
+    tools = []
+    for name in TOOLS:
+        path = shutil.which(name)
+        if path is not None:
+            tools.append(ExternalTool(name, path))
+    return tuple(tools)
+
+
+class ExternalPool:
+    """
+    Testes de senha com ferramentas externas num loop asyncio próprio
+
+    check() pode ser chamado de qualquer thread e bloqueia até o resultado;
+    no máximo `concurrency` processos filhos rodam ao mesmo tempo.
+    """
+
+    def __init__(self, zip_path, tools=None, concurrency=None, fallback=None):
+        """
+        Args:
+            zip_path (str): Caminho para o arquivo ZIP
+            tools (iterable): Ferramentas a usar (padrão: probe_tools())
+            concurrency (int): Máximo de processos filhos simultâneos (padrão: número de CPUs)
+            fallback (callable): fallback(zip_path, password) síncrono usado quando nenhuma
+                ferramenta conclui (ex.: o módulo zipfile); roda no executor do loop e
+                devolve True, False ou None (não concluiu)
+        """
+        self.zip_path = os.path.abspath(zip_path)
+        self.tools = list(probe_tools() if tools is None else tools)
+        self.concurrency = concurrency or os.cpu_count() or 1
+        self.fallback = fallback
+        self.found = None
+        # Senhas sem resposta definitiva (nenhuma ferramenta nem o fallback concluiu)
+        self.inconclusive = 0
+        self.cancelled = False
+        self.tasks = set()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run_loop, name='external-pool', daemon=True)
+        self.thread.start()
+        # O semáforo pertence ao loop: criado dentro dele
+        self.semaphore = self._call(self._make_semaphore())
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def _call(self, coroutine):
+        """Executa uma corrotina no loop do pool e espera o resultado"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    async def _make_semaphore(self):
+        return asyncio.Semaphore(self.concurrency)
+
+    async def _run_tool(self, tool, password):
+        """
+        Returns:
+            tuple: (resultado da ferramenta, segundos), com o resultado como em ExternalTool.test
+        """
+        async with self.semaphore:
+            if self.cancelled:
+                return None, 0.0
+            start = time.perf_counter()
+            # A criação do processo não pode ser interrompida pelo cancelamento: o filho
+            # já iniciado ficaria sem ninguém para encerrá-lo e aguardá-lo
+            spawn = asyncio.ensure_future(asyncio.create_subprocess_exec(
+                *tool.command(self.zip_path, password),
+                stdin=asyncio.subprocess.DEVNULL, stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT, start_new_session=True))
+            try:
+                process = await asyncio.shield(spawn)
+                output, _ = await process.communicate()
+            except asyncio.CancelledError:
+                await self._kill(spawn)
+                raise
+            except (OSError, ValueError):
+                # ValueError: senha com byte nulo não cabe num argumento
+                return None, 0.0
+            return tool.parse_result(process.returncode, output), time.perf_counter() - start
+
+    async def _kill(self, spawn):
+        """Encerra o processo filho de um teste cancelado (senha encontrada ou pool fechado)"""
+        try:
+            process = await spawn
+        except (OSError, ValueError):
+            return
+        if process.returncode is None:
+            # O grupo inteiro: um processo auxiliar manteria a saída aberta e o wait() preso
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            await process.wait()
+
+    async def _check(self, password):
+        task = asyncio.current_task()
+        self.tasks.add(task)
+        try:
+            for tool in self.tools:
+                result, _ = await self._run_tool(tool, password)
+                if result is not None:
+                    break
+            else:
+                result = None
+                if self.fallback is not None and not self.cancelled:
+                    result = await self.loop.run_in_executor(None, self.fallback, self.zip_path, password)
+                if result is None and not self.cancelled:
+                    self.inconclusive += 1
+            if result and self.found is None:
+                self.found = password
+                self._cancel_tasks(task)
+            return bool(result)
+        finally:
+            self.tasks.discard(task)
+
+    def _cancel_tasks(self, keep=None):
+        self.cancelled = True
+        for task in self.tasks:
+            if task is not keep:
+                task.cancel()
+
+    async def _cancel(self):
+        self._cancel_tasks()
+
+    async def _calibrate(self, password):
+        working = []
+        for tool in self.tools:
+            timings = []
+            for _ in range(CALIBRATION_RUNS):
+                result, seconds = await self._run_tool(tool, password)
+                if result is not False:
+                    break
+                timings.append(seconds)
+            if len(timings) < CALIBRATION_RUNS:
+                print(f"AVISO: {tool.name} não conseguiu testar {os.path.basename(self.zip_path)}, ignorando",
+                      file=sys.stderr)
+                continue
+            tool.seconds = statistics.median(timings)
+            working.append(tool)
+        working.sort(key=lambda tool: tool.seconds)
+        self.tools = working
+
+    def calibrate(self):
+        """
+        Mantém só as ferramentas que recusam uma senha aleatória, da mais rápida para a mais lenta
+
+        Returns:
+            list: Ferramentas que ficaram, na ordem em que serão tentadas
+        """
+        # Uma senha de 24 caracteres aleatórios não tem chance prática de acertar
+        self._call(self._calibrate(os.urandom(12).hex().encode()))
+        if self.tools:
+            order = ', '.join(f"{tool.name} ({tool.seconds * 1000:.1f} ms)" for tool in self.tools)
+            print(f"INFO: Ferramentas externas por velocidade: {order}", file=sys.stderr)
+        else:
+            print(f"AVISO: Nenhuma ferramenta externa testa este arquivo, usando só o módulo zipfile",
+                  file=sys.stderr)
+        return self.tools
+
+    def check(self, password):
+        """
+        Testa uma senha (bloqueia a thread chamadora até o resultado)
+
+        Args:
+            password (bytes): Senha a testar
+
+        Returns:
+            bool: True se a senha acertou; False se errou ou o pool foi cancelado
+        """
+        if self.cancelled:
+            return False
+        try:
+            return self._call(self._check(password))
+        except (asyncio.CancelledError, concurrent.futures.CancelledError):
+            return False
+
+    def cancel(self):
+        """Cancela os testes em andamento e encerra os processos filhos"""
+        if not self.loop.is_closed():
+            asyncio.run_coroutine_threadsafe(self._cancel(), self.loop)
+
+    def close(self):
+        """Cancela o que estiver em andamento e encerra o loop"""
+        if self.loop.is_closed():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._cancel(), self.loop).result(CLOSE_TIMEOUT)
+            # Dar aos filhos cancelados a chance de serem encerrados e aguardados
+            deadline = time.monotonic() + CLOSE_TIMEOUT
+            while self.tasks and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(CLOSE_TIMEOUT)
+            if not self.thread.is_alive():
+                self.loop.close()
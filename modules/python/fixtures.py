@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Geração local de arquivos ZIP criptografados e listas de palavras sintéticas
+para o benchmark (ver bench.py).
+
+Os arquivos são escritos diretamente (cabeçalhos locais, diretório central e
+fim do diretório), com ZipCrypto ou WinZip AES (AES-256 e AE-1 por padrão), então não depende
+de ferramentas externas nem de bibliotecas de criptografia. O conteúdo é
+pseudoaleatório mas determinístico (semente fixa): o mesmo pedido gera sempre
+os mesmos bytes.
+"""
+import hashlib
+import hmac
+import os
+import random
+import struct
+import time
+import zlib
+
+from zipcrypto import (LOCAL_HEADER_STRUCT, LOCAL_HEADER_SIGNATURE, CENTRAL_HEADER_STRUCT, CENTRAL_HEADER_SIGNATURE,
+                       END_RECORD_STRUCT, END_RECORD_SIGNATURE, DEFLATED, AES_METHOD, init_keys, encrypt, np)
+from winzip_aes import AES_EXTRA_ID, AES_STRENGTHS, PBKDF2_ITERATIONS, PASSWORD_VERIFIER_SIZE, AUTH_CODE_SIZE
+
+# Senha das fixtures: maiúsculas e pontuação garantem que nenhuma palavra
+# sorteada para as listas (só minúsculas) coincida com ela
+FIXTURE_PASSWORD = 'SuperZip#2024'
+
+ENCRYPTIONS = ('zipcrypto', 'aes')
+
+# Versões mínimas para extrair: 2.0 (deflate/ZipCrypto) e 5.1 (AES)
+VERSION_ZIPCRYPTO = 20
+VERSION_AES = 51
+
+# WinZip AE-1 com chave de 256 bits (força 3), o padrão do 7-Zip e do WinZip
+AES_VERSION = 1
+AES_STRENGTH = 3
+
+# Linhas geradas por vez ao escrever listas grandes
+WORDLIST_CHUNK_LINES = 1000000
+WORD_LENGTH = 8
+
+
+def _xtime(a):
+    return ((a << 1) ^ (0x1b if a & 0x80 else 0)) & 0xff
+
+
+def _build_aes_tables():
+    """
+    Monta a S-box e as tabelas T do AES (cifragem apenas)
+
+    Returns:
+        tuple: (S-box, [Te0, Te1, Te2, Te3])
+    """
+    sbox = [0] * 256
+    sbox[0] = 0x63
+    p = q = 1
+    while True:
+        # p percorre o grupo multiplicativo (p * 3) e q = 1 / p
+        p = p ^ _xtime(p)
+        q ^= q << 1
+        q ^= q << 2
+        q ^= q << 4
+        q &= 0xff
+        if q & 0x80:
+            q ^= 0x09
+        x = q
+        for shift in range(1, 5):
+            x ^= ((q << shift) | (q >> (8 - shift))) & 0xff
+        sbox[p] = x ^ 0x63
+        if p == 1:
+            break
+
+    te0 = [(_xtime(s) << 24) | (s << 16) | (s << 8) | (_xtime(s) ^ s) for s in sbox]
+    tables = [te0]
+    for _ in range(3):
+        tables.append([((t >> 8) | (t << 24)) & 0xffffffff for t in tables[-1]])
+    return sbox, tables
+
+
+AES_SBOX, AES_TABLES = _build_aes_tables()
+
+
+class AesCtr:
+    """AES no modo CTR do WinZip (contador little-endian a partir de 1)"""
+
+    def __init__(self, key):
+        nk = len(key) // 4
+        self.rounds = nk + 6
+        words = list(struct.unpack(f'>{nk}L', key))
+        rcon = 1
+        for i in range(nk, 4 * (self.rounds + 1)):
+            t = words[i - 1]
+            if i % nk == 0:
+                t = ((t << 8) & 0xffffffff) | (t >> 24)
+                t = self._sub_word(t) ^ (rcon << 24)
+                rcon = _xtime(rcon)
+            elif nk > 6 and i % nk == 4:
+                t = self._sub_word(t)
+            words.append(words[i - nk] ^ t)
+        self.round_keys = words
+        self.counter = 1
+
+    @staticmethod
+    def _sub_word(t):
+        s = AES_SBOX
+        return (s[t >> 24] << 24) | (s[(t >> 16) & 0xff] << 16) | (s[(t >> 8) & 0xff] << 8) | s[t & 0xff]
+
+    def encrypt_block(self, block):
+        """
+        Args:
+            block (bytes): 16 bytes em claro
+
+        Returns:
+            bytes: 16 bytes cifrados
+        """
+        te0, te1, te2, te3 = AES_TABLES
+        s = AES_SBOX
+        w = self.round_keys
+        s0, s1, s2, s3 = struct.unpack('>4L', block)
+        s0 ^= w[0]
+        s1 ^= w[1]
+        s2 ^= w[2]
+        s3 ^= w[3]
+        for r in range(4, 4 * self.rounds, 4):
+            s0, s1, s2, s3 = (
+                te0[s0 >> 24] ^ te1[(s1 >> 16) & 0xff] ^ te2[(s2 >> 8) & 0xff] ^ te3[s3 & 0xff] ^ w[r],
+                te0[s1 >> 24] ^ te1[(s2 >> 16) & 0xff] ^ te2[(s3 >> 8) & 0xff] ^ te3[s0 & 0xff] ^ w[r + 1],
+                te0[s2 >> 24] ^ te1[(s3 >> 16) & 0xff] ^ te2[(s0 >> 8) & 0xff] ^ te3[s1 & 0xff] ^ w[r + 2],
+                te0[s3 >> 24] ^ te1[(s0 >> 16) & 0xff] ^ te2[(s1 >> 8) & 0xff] ^ te3[s2 & 0xff] ^ w[r + 3])
+        # Última rodada: sem MixColumns
+        r = 4 * self.rounds
+        out = []
+        for a, b, c, d, k in ((s0, s1, s2, s3, w[r]), (s1, s2, s3, s0, w[r + 1]),
+                              (s2, s3, s0, s1, w[r + 2]), (s3, s0, s1, s2, w[r + 3])):
+            out.append(((s[a >> 24] << 24) | (s[(b >> 16) & 0xff] << 16) |
+                        (s[(c >> 8) & 0xff] << 8) | s[d & 0xff]) ^ k)
+        return struct.pack('>4L', *out)
+
+    def process(self, data):
+        """
+        Cifra (ou decifra) dados continuando o fluxo do contador
+
+        Args:
+            data (bytes): Dados (múltiplos de 16 bytes, exceto no último bloco)
+
+        Returns:
+            bytes: Dados processados
+        """
+        out = bytearray(len(data))
+        for offset in range(0, len(data), 16):
+            stream = self.encrypt_block(self.counter.to_bytes(16, 'little'))
+            self.counter += 1
+            chunk = data[offset:offset + 16]
+            out[offset:offset + len(chunk)] = bytes(x ^ y for x, y in zip(chunk, stream))
+        return bytes(out)
+
+
+def _dos_datetime(timestamp):
+    t = time.localtime(timestamp)
+    dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+    dos_date = ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+    return dos_time, dos_date
+
+
+def _zipcrypto_payload(password, compressed, crc, rng):
+    """Cabeçalho de 12 bytes (o último é o byte de verificação) e dados, criptografados"""
+    header = bytes(rng.getrandbits(8) for _ in range(11)) + bytes([crc >> 24])
+    keys = init_keys(password)
+    payload, _ = encrypt(keys, header + compressed)
+    return payload
+
+
+def _aes_payload(password, compressed, rng, strength=AES_STRENGTH):
+    """Salt, PV, dados cifrados em AES-CTR e código de autenticação HMAC-SHA1"""
+    key_size, salt_size = AES_STRENGTHS[strength]
+    salt = bytes(rng.getrandbits(8) for _ in range(salt_size))
+    derived = hashlib.pbkdf2_hmac('sha1', password, salt, PBKDF2_ITERATIONS,
+                                  2 * key_size + PASSWORD_VERIFIER_SIZE)
+    ciphertext = AesCtr(derived[:key_size]).process(compressed)
+    auth_code = hmac.new(derived[key_size:2 * key_size], ciphertext, hashlib.sha1).digest()[:AUTH_CODE_SIZE]
+    return salt + derived[-PASSWORD_VERIFIER_SIZE:] + ciphertext + auth_code
+
+
+def _entry_content(rng, size):
+    """Texto pseudoaleatório compressível, como um arquivo comum"""
+    words = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(2, 9)))
+             for _ in range(512)]
+    parts = []
+    length = 0
+    while length < size:
+        line = ' '.join(rng.choice(words) for _ in range(12)) + '\n'
+        parts.append(line)
+        length += len(line)
+    return ''.join(parts).encode()[:size]
+
+
+def write_encrypted_zip(path, password, encryption, num_entries, entry_size, seed=0,
+                        aes_strength=AES_STRENGTH, aes_version=AES_VERSION):
+    """
+    Escreve um arquivo ZIP com todas as entradas criptografadas (deflate)
+
+    Args:
+        path (str): Arquivo de saída
+        password (str): Senha das entradas
+        encryption (str): 'zipcrypto' ou 'aes'
+        num_entries (int): Número de entradas
+        entry_size (int): Tamanho de cada entrada descomprimida, em bytes
+        seed (int): Semente do conteúdo, do salt e do cabeçalho de criptografia
+        aes_strength (int): Força da chave AES (1, 2 ou 3: 128, 192 ou 256 bits)
+        aes_version (int): 1 (AE-1) ou 2 (AE-2, sem CRC nos cabeçalhos)
+    """
+    if encryption not in ENCRYPTIONS:
+        raise ValueError(f"Criptografia desconhecida: {encryption}")
+    rng = random.Random(seed)
+    password = password.encode()
+    dos_time, dos_date = _dos_datetime(time.time())
+    central = []
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as fp:
+        for n in range(num_entries):
+            name = f'arquivo-{n:04d}.txt'.encode()
+            content = _entry_content(rng, entry_size)
+            crc = zlib.crc32(content)
+            compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+            compressed = compressor.compress(content) + compressor.flush()
+
+            if encryption == 'aes':
+                payload = _aes_payload(password, compressed, rng, aes_strength)
+                version, method = VERSION_AES, AES_METHOD
+                extra = struct.pack('<HHH2sBH', AES_EXTRA_ID, 7, aes_version, b'AE', aes_strength, DEFLATED)
+                if aes_version == 2:
+                    # No AE-2 a integridade fica só com o HMAC
+                    crc = 0
+            else:
+                payload = _zipcrypto_payload(password, compressed, crc, rng)
+                version, method, extra = VERSION_ZIPCRYPTO, DEFLATED, b''
+
+            offset = fp.tell()
+            fields = (version, 0x1, method, dos_time, dos_date, crc, len(payload), len(content))
+            fp.write(LOCAL_HEADER_STRUCT.pack(LOCAL_HEADER_SIGNATURE, *fields, len(name), len(extra)))
+            fp.write(name + extra + payload)
+            central.append((fields, name, extra, offset))
+
+        directory_offset = fp.tell()
+        for fields, name, extra, offset in central:
+            fp.write(CENTRAL_HEADER_STRUCT.pack(CENTRAL_HEADER_SIGNATURE, fields[0], *fields,
+                                                len(name), len(extra), 0, 0, 0, 0, offset))
+            fp.write(name + extra)
+        directory_size = fp.tell() - directory_offset
+        fp.write(END_RECORD_STRUCT.pack(END_RECORD_SIGNATURE, 0, 0, num_entries, num_entries,
+                                        directory_size, directory_offset, 0))
+    os.replace(tmp_path, path)
+
+
+def _random_words(rng, count):
+    """
+    Gera palavras aleatórias de WORD_LENGTH letras minúsculas, uma por linha
+
+    Returns:
+        bytes: Linhas terminadas em '\\n'
+    """
+    if np is not None:
+        matrix = rng.integers(ord('a'), ord('z') + 1, size=(count, WORD_LENGTH + 1), dtype=np.uint8)
+        matrix[:, WORD_LENGTH] = ord('\n')
+        return matrix.tobytes()
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    return ''.join(''.join(rng.choices(letters, k=WORD_LENGTH)) + '\n' for _ in range(count)).encode()
+
+
+def write_wordlist(path, num_lines, password, position, seed=0):
+    """
+    Escreve uma lista de palavras aleatórias com a senha numa posição controlada
+
+    Args:
+        path (str): Arquivo de saída
+        num_lines (int): Total de linhas
+        password (str): Senha inserida na lista
+        position (float): Posição relativa da senha (0 = primeira linha, 1 = última),
+            ou None para uma lista sem a senha (varredura completa)
+        seed (int): Semente das palavras
+    """
+    rng = np.random.default_rng(seed) if np is not None else random.Random(seed)
+    target = None
+    if position is not None:
+        target = min(num_lines - 1, int(position * num_lines))
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as fp:
+        for start in range(0, num_lines, WORDLIST_CHUNK_LINES):
+            count = min(WORDLIST_CHUNK_LINES, num_lines - start)
+            chunk = _random_words(rng, count)
+            if target is not None and start <= target < start + count:
+                cut = (target - start) * (WORD_LENGTH + 1)
+                chunk = chunk[:cut] + password.encode() + b'\n' + chunk[cut + WORD_LENGTH + 1:]
+            fp.write(chunk)
+    os.replace(tmp_path, path)
+
+
+def archive_fixture(directory, encryption, num_entries, entry_size):
+    """
+    Devolve o arquivo ZIP de teste pedido, gerando-o apenas na primeira vez
+
+    Args:
+        directory (str): Pasta das fixtures
+        encryption (str): 'zipcrypto' ou 'aes'
+        num_entries (int): Número de entradas
+        entry_size (int): Tamanho de cada entrada, em bytes
+
+    Returns:
+        str: Caminho do arquivo
+    """
+    path = os.path.join(directory, f'{encryption}-{num_entries}x{entry_size}.zip')
+    if not os.path.exists(path):
+        write_encrypted_zip(path, FIXTURE_PASSWORD, encryption, num_entries, entry_size)
+    return path
+
+
+def wordlist_fixture(directory, num_lines, position):
+    """
+    Devolve a lista de palavras de teste pedida, gerando-a apenas na primeira vez
+
+    Args:
+        directory (str): Pasta das fixtures
+        num_lines (int): Total de linhas
+        position (float): Posição relativa da senha, ou None para uma lista sem ela
+
+    Returns:
+        str: Caminho da lista
+    """
+    label = 'ausente' if position is None else f'p{round(position * 100)}'
+    path = os.path.join(directory, f'palavras-{num_lines}-{label}.txt')
+    if not os.path.exists(path):
+        write_wordlist(path, num_lines, FIXTURE_PASSWORD, position)
+    return path
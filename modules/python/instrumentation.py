@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Instrumentação do caminho crítico e ganchos opcionais de profiling.
+
+StageStats acumula, por etapa, o número de chamadas, os itens processados, o
+tempo total e máximo e um histograma de durações em potências de 2 (µs). Cada
+worker (processo ou thread) tem o seu, sem locks; ao final os objetos são
+somados com merge() e o resumo vai para o JSON de resultado ("stages").
+
+Registrar uma chamada só guarda a duração numa lista: a agregação é feita em
+blocos (vetorizada com NumPy, quando disponível), então mesmo as etapas
+registradas por senha (AES, ferramentas externas) pagam pouco pela medição.
+
+Etapas registradas:
+    read          leitura/decodificação da lista (ou geração das candidatas da máscara)
+    rules         aplicação das regras de transformação
+    enqueue_wait  espera do produtor para enfileirar blocos de senhas (motor de threads)
+    dequeue_wait  espera dos workers por trabalho (fila de blocos ou de fatias)
+    header_check  key schedule e filtro barato (byte de verificação, PV do AES)
+    verify        confirmação completa dos candidatos que passaram pelo filtro
+
+run_profiled executa um worker sob cProfile ou tracemalloc e grava o perfil
+em um arquivo por worker.
+"""
+import cProfile
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional: sem ele os blocos são agregados em Python
+    np = None
+
+# Buckets do histograma: durações abaixo de 2^b µs, até 2^23 µs (~8 s) no último
+HISTOGRAM_BUCKETS = 24
+
+# Durações guardadas por etapa antes de agregar o bloco
+FLUSH_SAMPLES = 4096
+
+PROFILERS = ('cprofile', 'tracemalloc')
+
+# Linhas do resumo em texto do tracemalloc (o snapshot completo também é gravado)
+TRACEMALLOC_TOP = 25
+TRACEMALLOC_FRAMES = 10
+
+# Workers (threads) executando sob tracemalloc no processo
+_tracing_lock = threading.Lock()
+_tracing_workers = 0
+
+
+class StageStats:
+    """Contadores e histogramas de tempo por etapa, acumulados localmente por worker"""
+
+    def __init__(self):
+        # etapa -> [chamadas, itens, tempo total, tempo máximo, histograma]
+        self.stages = {}
+        # etapa -> durações ainda não agregadas, e itens além de um por chamada
+        self.samples = {}
+        self.extra_items = {}
+
+    def add(self, stage, seconds, items=1):
+        """
+        Registra uma chamada de uma etapa
+
+        Args:
+            stage (str): Nome da etapa
+            seconds (float): Duração
+            items (int): Senhas (ou fatias) processadas na chamada
+        """
+        samples = self.samples.get(stage)
+        if samples is None:
+            samples = self.samples[stage] = []
+        samples.append(seconds)
+        if items != 1:
+            self.extra_items[stage] = self.extra_items.get(stage, 0) + items - 1
+        if len(samples) >= FLUSH_SAMPLES:
+            self._flush(stage)
+
+    def _flush(self, stage):
+        """Agrega as durações pendentes de uma etapa"""
+        samples = self.samples.pop(stage, None)
+        if not samples:
+            return
+        entry = self.stages.get(stage)
+        if entry is None:
+            entry = self.stages[stage] = [0, 0, 0.0, 0.0, [0] * HISTOGRAM_BUCKETS]
+        entry[0] += len(samples)
+        entry[1] += len(samples) + self.extra_items.pop(stage, 0)
+        if np is not None:
+            durations = np.array(samples)
+            entry[2] += float(durations.sum())
+            entry[3] = max(entry[3], float(durations.max()))
+            # Bucket b: durações em [2^(b-1), 2^b) µs, como int(µs).bit_length()
+            _, exponents = np.frexp(np.floor(durations * 1e6))
+            buckets = np.bincount(np.clip(exponents, 0, HISTOGRAM_BUCKETS - 1), minlength=HISTOGRAM_BUCKETS)
+            entry[4] = [a + int(b) for a, b in zip(entry[4], buckets)]
+            return
+        histogram = entry[4]
+        for seconds in samples:
+            histogram[min(int(seconds * 1e6).bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+        entry[2] += sum(samples)
+        entry[3] = max(entry[3], max(samples))
+
+    def flush(self):
+        """Agrega todas as durações pendentes"""
+        for stage in list(self.samples):
+            self._flush(stage)
+
+    def timed(self, stage, batches):
+        """
+        Percorre um gerador de lotes medindo o tempo para produzir cada um
+
+        Args:
+            stage (str): Nome da etapa
+            batches (iterable): Lotes cujo primeiro elemento é a lista de candidatas
+
+        Yields:
+            Os mesmos lotes
+        """
+        iterator = iter(batches)
+        while True:
+            start = time.perf_counter()
+            try:
+                batch = next(iterator)
+            except StopIteration:
+                return
+            self.add(stage, time.perf_counter() - start, len(batch[0]))
+            yield batch
+
+    def merge(self, other):
+        """
+        Soma os contadores de outro StageStats (ex.: de outro worker)
+
+        Args:
+            other (StageStats): Contadores a somar (None é ignorado)
+
+        Returns:
+            StageStats: O próprio objeto
+        """
+        if other is None:
+            return self
+        self.flush()
+        other.flush()
+        for stage, (calls, items, total, peak, histogram) in other.stages.items():
+            entry = self.stages.get(stage)
+            if entry is None:
+                self.stages[stage] = [calls, items, total, peak, list(histogram)]
+                continue
+            entry[0] += calls
+            entry[1] += items
+            entry[2] += total
+            entry[3] = max(entry[3], peak)
+            entry[4] = [a + b for a, b in zip(entry[4], histogram)]
+        return self
+
+    def to_dict(self):
+        """
+        Returns:
+            dict: Por etapa: chamadas, itens, tempo total (ms), médio e máximo (µs) e
+                histograma (limite superior exclusivo em µs -> chamadas, só os não vazios)
+        """
+        self.flush()
+        summary = {}
+        for stage, (calls, items, total, peak, histogram) in self.stages.items():
+            summary[stage] = {
+                "calls": calls,
+                "items": items,
+                "totalMs": round(total * 1000, 3),
+                "meanUs": round(total * 1e6 / calls, 3) if calls else 0,
+                "maxUs": round(peak * 1e6, 3),
+                "histogram": {str(1 << b): n for b, n in enumerate(histogram) if n},
+            }
+        return summary
+
+
+def merge_stats(stats_list):
+    """
+    Args:
+        stats_list (iterable): StageStats de cada worker
+
+    Returns:
+        StageStats: Soma de todos
+    """
+    total = StageStats()
+    for stats in stats_list:
+        total.merge(stats)
+    return total
+
+
+def run_profiled(profile, name, func, *args):
+    """
+    Executa func(*args), opcionalmente sob um profiler, gravando o perfil ao final
+
+    Args:
+        profile (tuple): (profiler, pasta) com profiler em PROFILERS, ou None para executar direto
+        name (str): Nome do worker, usado no nome do arquivo (ex.: 'worker-0')
+        func (callable): Função do worker
+
+    Returns:
+        O retorno de func
+    """
+    if profile is None:
+        return func(*args)
+    profiler, directory = profile
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{name}-{os.getpid()}')
+
+    if profiler == 'cprofile':
+        prof = cProfile.Profile()
+        try:
+            return prof.runcall(func, *args)
+        finally:
+            prof.dump_stats(path + '.prof')
+            print(f"INFO: Perfil do {name} gravado em {path}.prof", file=sys.stderr)
+
+    # tracemalloc vale para o processo inteiro: com threads, o primeiro worker
+    # liga o rastreamento e o último a terminar grava o perfil de todos
+    global _tracing_workers
+    with _tracing_lock:
+        if _tracing_workers == 0:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        _tracing_workers += 1
+    try:
+        return func(*args)
+    finally:
+        with _tracing_lock:
+            _tracing_workers -= 1
+            last = _tracing_workers == 0
+            if last:
+                snapshot = tracemalloc.take_snapshot()
+                current, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+        if last:
+            snapshot.dump(path + '.tracemalloc')
+            with open(path + '.txt', 'w', encoding='utf-8') as fp:
+                fp.write(f"Memória rastreada: atual {current} bytes, pico {peak} bytes\n\n")
+                for stat in snapshot.statistics('lineno')[:TRACEMALLOC_TOP]:
+                    fp.write(f"{stat}\n")
+            print(f"INFO: Perfil de memória do {name} gravado em {path}.txt", file=sys.stderr)
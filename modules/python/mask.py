@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Modo máscara: força bruta incremental sobre um espaço de busca indexável.
+
+Uma máscara como ?l?l?d?d?d define um conjunto de caracteres por posição e
+toda senha candidata corresponde a um número inteiro (contagem em base mista,
+com a última posição variando mais rápido). Os workers recebem intervalos
+[início, fim) de índices em vez de senhas, o progresso sai direto da
+aritmética dos índices e um checkpoint guarda apenas intervalos numéricos.
+
+Candidatas consecutivas compartilham o prefixo, então o estado das chaves
+PKZIP de cada prefixo é calculado uma única vez por lote e só o sufixo que
+muda é processado.
+
+Conjuntos de caracteres:
+    ?l  a-z          ?u  A-Z          ?d  0-9
+    ?h  0-9a-f       ?H  0-9A-F       ?s  espaço e pontuação
+    ?a  ?l?u?d?s     ?b  0x00-0xff    ??  o próprio '?'
+    ?1 a ?4 conjuntos personalizados (que podem usar os conjuntos acima)
+
+Qualquer outro caractere da máscara é fixo naquela posição.
+"""
+import hashlib
+import string
+
+from zipcrypto import KEY0_INIT, KEY1_INIT, KEY2_INIT, update_keys_batch, np
+
+BUILTIN_CHARSETS = {
+    'l': string.ascii_lowercase.encode(),
+    'u': string.ascii_uppercase.encode(),
+    'd': string.digits.encode(),
+    'h': b'0123456789abcdef',
+    'H': b'0123456789ABCDEF',
+    's': b' ' + string.punctuation.encode(),
+    'b': bytes(range(256)),
+}
+BUILTIN_CHARSETS['a'] = (BUILTIN_CHARSETS['l'] + BUILTIN_CHARSETS['u'] +
+                         BUILTIN_CHARSETS['d'] + BUILTIN_CHARSETS['s'])
+
+# Conjuntos personalizados aceitos (?1 a ?4)
+MAX_CUSTOM_CHARSETS = 4
+
+
+class MaskError(ValueError):
+    """Máscara ou conjunto de caracteres inválido"""
+
+
+def _expand_charset(text, custom=None):
+    """
+    Converte um conjunto de caracteres (com ?l, ?d, ... e literais) em bytes
+
+    Args:
+        text (str): Definição do conjunto
+        custom (list): Conjuntos personalizados já expandidos (para ?1 a ?4)
+
+    Returns:
+        list: Um bytes por posição quando custom é informado (máscara), ou
+            um único bytes com todos os caracteres (conjunto personalizado)
+    """
+    raw = text.encode('utf-8', errors='surrogateescape')
+    positions = []
+    i = 0
+    while i < len(raw):
+        c = raw[i:i + 1]
+        i += 1
+        if c != b'?':
+            positions.append(c)
+            continue
+        if i >= len(raw):
+            raise MaskError(f"'?' sem conjunto no fim de '{text}'")
+        name = chr(raw[i])
+        i += 1
+        if name == '?':
+            positions.append(b'?')
+        elif name in BUILTIN_CHARSETS:
+            positions.append(BUILTIN_CHARSETS[name])
+        elif custom is not None and name.isdigit() and 1 <= int(name) <= MAX_CUSTOM_CHARSETS:
+            charset = custom[int(name) - 1]
+            if not charset:
+                raise MaskError(f"Conjunto personalizado ?{name} não foi definido")
+            positions.append(charset)
+        else:
+            raise MaskError(f"Conjunto desconhecido '?{name}' em '{text}'")
+
+    if custom is not None:
+        return positions
+    # Conjunto personalizado: todos os caracteres, sem repetição, na ordem dada
+    return bytes(dict.fromkeys(b''.join(positions)))
+
+
+def parse_mask(mask, charsets=()):
+    """
+    Interpreta a máscara
+
+    Args:
+        mask (str): Máscara (ex.: '?l?l?d?d?d')
+        charsets (tuple): Conjuntos personalizados ?1 a ?4 (None para os não usados)
+
+    Returns:
+        list: Caracteres possíveis (bytes) de cada posição
+    """
+    if len(charsets) > MAX_CUSTOM_CHARSETS:
+        raise MaskError(f"No máximo {MAX_CUSTOM_CHARSETS} conjuntos personalizados")
+    custom = [_expand_charset(c) if c else b'' for c in charsets]
+    custom += [b''] * (MAX_CUSTOM_CHARSETS - len(custom))
+    positions = _expand_charset(mask, custom)
+    if not positions:
+        raise MaskError("Máscara vazia")
+    return positions
+
+
+class MaskSegment:
+    """Candidatas de um comprimento fixo (prefixo da máscara)"""
+
+    def __init__(self, offset, positions):
+        self.offset = offset
+        self.positions = positions
+        self.length = len(positions)
+        self.count = 1
+        for chars in positions:
+            self.count *= len(chars)
+        if np is not None:
+            self.tables = [np.frombuffer(chars, dtype=np.uint8) for chars in positions]
+
+    def generate(self, first, last):
+        """
+        Gera as candidatas de índices locais [first, last)
+
+        Args:
+            first (int): Primeiro índice dentro do segmento
+            last (int): Fim exclusivo
+
+        Returns:
+            tuple: (candidatas, estado de chaves ou None)
+        """
+        if np is None:
+            return self._generate_python(first, last), None
+
+        # Percorre a árvore de prefixos nível a nível: no nível d existem apenas os
+        # prefixos distintos do lote (índices first // passo .. (last - 1) // passo),
+        # cada um calculado uma vez a partir do pai. Os índices ficam relativos ao
+        # primeiro prefixo do nível, então cabem em int64 mesmo com espaços enormes.
+        count = last - first
+        stride = self.count
+        keys = (np.full(1, KEY0_INIT, dtype=np.uint32),
+                np.full(1, KEY1_INIT, dtype=np.uint32),
+                np.full(1, KEY2_INIT, dtype=np.uint32))
+        parents = []
+        columns = []
+        for table in self.tables:
+            size = len(table)
+            stride //= size
+            lo = first // stride
+            hi = (last - 1) // stride
+            t = np.arange(hi - lo + 1, dtype=np.int64) + lo % size
+            parent = t // size
+            chars = table[t % size]
+            keys = update_keys_batch((keys[0][parent], keys[1][parent], keys[2][parent]), chars)
+            parents.append(parent)
+            columns.append(chars)
+
+        # Reconstrói os bytes de cada candidata subindo pela árvore
+        matrix = np.empty((count, self.length), dtype=np.uint8)
+        node = np.arange(count)
+        for position in range(self.length - 1, -1, -1):
+            matrix[:, position] = columns[position][node]
+            node = parents[position][node]
+        blob = matrix.tobytes()
+        width = self.length
+        candidates = [blob[i:i + width] for i in range(0, count * width, width)]
+        return candidates, keys
+
+    def _generate_python(self, first, last):
+        """Versão sem NumPy: contador em base mista incrementado a cada candidata"""
+        positions = self.positions
+        digits = [0] * self.length
+        rest = first
+        for position in range(self.length - 1, -1, -1):
+            rest, digits[position] = divmod(rest, len(positions[position]))
+        current = bytearray(chars[d] for chars, d in zip(positions, digits))
+
+        candidates = []
+        for _ in range(last - first):
+            candidates.append(bytes(current))
+            # Só as posições que mudam (o sufixo) são reescritas
+            position = self.length - 1
+            while position >= 0:
+                digits[position] += 1
+                if digits[position] < len(positions[position]):
+                    current[position] = positions[position][digits[position]]
+                    break
+                digits[position] = 0
+                current[position] = positions[position][0]
+                position -= 1
+        return candidates
+
+
+class Mask:
+    """
+    Espaço de busca de uma máscara, com a mesma interface de fatias e lotes
+    das listas de palavras (ver wordlist.Wordlist)
+    """
+
+    def __init__(self, mask, charsets=(), min_length=None, max_length=None):
+        self.mask = mask
+        self.charsets = tuple(charsets)
+        positions = parse_mask(mask, self.charsets)
+
+        max_length = len(positions) if max_length is None else max_length
+        min_length = max_length if min_length is None else min_length
+        if not 1 <= min_length <= max_length <= len(positions):
+            raise MaskError(f"Comprimentos inválidos ({min_length} a {max_length}) "
+                            f"para uma máscara de {len(positions)} posições")
+        self.min_length = min_length
+        self.max_length = max_length
+
+        # Com intervalo de comprimentos, os segmentos (mais curtos primeiro) são
+        # concatenados num único espaço de índices
+        self.segments = []
+        offset = 0
+        for length in range(min_length, max_length + 1):
+            segment = MaskSegment(offset, positions[:length])
+            self.segments.append(segment)
+            offset += segment.count
+
+        # As fatias são intervalos de índices, como no índice pré-compilado
+        self.size = offset
+        self.count = offset
+        self.data_size = offset * max_length
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def spec(self):
+        """
+        Returns:
+            tuple: Descrição da fonte para wordlist_index.open_source (pode ser enviada aos workers)
+        """
+        return ('mask', (self.mask, self.charsets, self.min_length, self.max_length))
+
+    def digest(self):
+        """
+        Returns:
+            str: Hash SHA-256 que identifica o espaço de busca (para o checkpoint)
+        """
+        positions = parse_mask(self.mask, self.charsets)[:self.max_length]
+        key = b'\n'.join([b'%d' % self.min_length] + positions)
+        return hashlib.sha256(key).hexdigest()
+
+    def shards(self, shard_size):
+        """
+        Divide o espaço de busca em intervalos de índices
+
+        Args:
+            shard_size (int): Tamanho aproximado de cada fatia em bytes de senhas
+
+        Yields:
+            tuple: (primeiro índice, fim exclusivo, número de candidatas)
+        """
+        step = max(1, shard_size // self.max_length)
+        for start in range(0, self.count, step):
+            end = min(start + step, self.count)
+            yield start, end, end - start
+
+    def batches(self, start, end, batch_size):
+        """
+        Gera as candidatas de um intervalo de índices em lotes
+
+        Args:
+            start (int): Primeiro índice
+            end (int): Fim exclusivo
+            batch_size (int): Candidatas por lote
+
+        Yields:
+            tuple: (candidatas, None, estado de chaves pré-calculado ou None)
+        """
+        for segment in self.segments:
+            first = max(start, segment.offset)
+            last = min(end, segment.offset + segment.count)
+            # Lotes não atravessam segmentos: dentro de um segmento o comprimento é fixo
+            for batch_start in range(first, last, batch_size):
+                batch_end = min(batch_start + batch_size, last)
+                candidates, keys = segment.generate(batch_start - segment.offset,
+                                                    batch_end - segment.offset)
+                yield candidates, None, keys
@@ -0,0 +1,505 @@
+#!/usr/bin/env python3
+"""
+Motor de execução com múltiplos processos.
+
+Cada processo worker abre o arquivo ZIP e a lista de palavras uma única vez,
+recebe fatias da lista (intervalos, em vez de uma senha por vez) e
+comunica contagens e acertos através de memória compartilhada, sem passar
+pelo GIL do processo principal.
+"""
+import multiprocessing
+import os
+import queue
+import sys
+import time
+
+from verifiers import open_verifier
+from archive_set import ArchiveSet
+from wordlist import lines_until
+from wordlist_index import open_source
+from rules import RuleSet
+from instrumentation import StageStats, run_profiled
+
+# Tamanho máximo de senha que pode ser devolvida pela memória compartilhada
+MAX_PASSWORD_SIZE = 1024
+
+# Tamanho da senha exibida no progresso ("Tentando: ...")
+MAX_CURRENT_SIZE = 256
+
+
+def physical_core_count():
+    """
+    Conta os núcleos físicos da máquina (ignorando hyper-threading)
+
+    Returns:
+        int: Número de núcleos físicos, ou os lógicos se não for possível determinar
+    """
+    logical = os.cpu_count() or 1
+    try:
+        cores = set()
+        physical_id = core_id = None
+        with open('/proc/cpuinfo', 'r') as f:
+            for line in f:
+                if line.startswith('physical id'):
+                    physical_id = line.split(':', 1)[1].strip()
+                elif line.startswith('core id'):
+                    core_id = line.split(':', 1)[1].strip()
+                elif not line.strip():
+                    if core_id is not None:
+                        cores.add((physical_id, core_id))
+                    physical_id = core_id = None
+        if core_id is not None:
+            cores.add((physical_id, core_id))
+        if cores:
+            return max(1, min(len(cores), logical))
+    except OSError:
+        pass
+    return logical
+
+
+class SharedState:
+    """
+    Sinal de parada, contadores por worker e senhas encontradas em memória compartilhada
+
+    Com vários arquivos (modo em lote) cada um tem sua senha; o trabalho só
+    termina quando todos forem resolvidos (ou for cancelado).
+    """
+
+    def __init__(self, num_workers, ctx=multiprocessing, num_archives=1):
+        self.found = ctx.Value('i', 0)
+        self.counters = ctx.Array('Q', num_workers, lock=False)
+        self.num_archives = num_archives
+        # Protegidos pelo lock de found
+        self.solved = ctx.Array('b', num_archives, lock=False)
+        self.passwords = ctx.Array('c', MAX_PASSWORD_SIZE * num_archives, lock=False)
+        self.password_lens = ctx.Array('i', num_archives, lock=False)
+        self.current = ctx.Array('c', MAX_CURRENT_SIZE, lock=False)
+        self.current_len = ctx.Value('i', 0, lock=False)
+
+    def reset(self):
+        """Zera contadores e sinais para reutilizar o estado em outro trabalho"""
+        with self.found.get_lock():
+            self.found.value = 0
+            self.solved[:] = [0] * self.num_archives
+            self.password_lens[:] = [0] * self.num_archives
+        self.counters[:] = [0] * len(self.counters)
+        self.current_len.value = 0
+
+    def cancel(self):
+        """Sinaliza aos workers que o trabalho foi cancelado (não sobrescreve um acerto)"""
+        with self.found.get_lock():
+            if not self.found.value:
+                self.found.value = -1
+
+    def tested(self):
+        """
+        Returns:
+            int: Total de senhas testadas somando os contadores de todos os workers
+        """
+        return sum(self.counters)
+
+    def is_found(self):
+        """
+        Returns:
+            bool: True se todas as senhas foram encontradas ou o trabalho foi cancelado
+        """
+        return self.found.value != 0
+
+    def is_solved(self, archive=0):
+        """
+        Args:
+            archive (int): Índice do arquivo
+
+        Returns:
+            bool: True se a senha do arquivo já foi encontrada
+        """
+        return bool(self.solved[archive])
+
+    def record_hit(self, password, archive=0):
+        """
+        Registra a senha encontrada de um arquivo (apenas o primeiro acerto é mantido)
+
+        Args:
+            password (bytes): Senha correta
+            archive (int): Índice do arquivo
+        """
+        with self.found.get_lock():
+            if self.found.value or self.solved[archive]:
+                return
+            size = min(len(password), MAX_PASSWORD_SIZE)
+            offset = archive * MAX_PASSWORD_SIZE
+            self.passwords[offset:offset + size] = password[:size]
+            self.password_lens[archive] = size
+            self.solved[archive] = 1
+            if all(self.solved):
+                self.found.value = 1
+
+    def set_current(self, password):
+        """
+        Publica a última senha testada, apenas para exibição (sem lock)
+
+        Args:
+            password (bytes): Senha testada
+        """
+        size = min(len(password), MAX_CURRENT_SIZE)
+        self.current[:size] = password[:size]
+        self.current_len.value = size
+
+    def current_password(self):
+        """
+        Returns:
+            bytes: Última senha publicada por algum worker
+        """
+        return bytes(self.current[:self.current_len.value])
+
+    def found_password(self, archive=0):
+        """
+        Args:
+            archive (int): Índice do arquivo
+
+        Returns:
+            bytes: Senha encontrada para o arquivo, ou None
+        """
+        if not self.solved[archive]:
+            return None
+        offset = archive * MAX_PASSWORD_SIZE
+        return bytes(self.passwords[offset:offset + self.password_lens[archive]])
+
+
+def test_shard(worker_id, verifier, source, rule_set, shard, batch_size, state, stats=None):
+    """
+    Testa todas as senhas de uma fatia, lote a lote
+
+    Args:
+        worker_id (int): Índice do worker nos contadores compartilhados
+        verifier (ZipCryptoVerifier | AesVerifier | ArchiveSet): Verificador em processo
+        source (Wordlist | WordlistIndex | Mask): Fonte de senhas já aberta
+        rule_set (RuleSet): Regras compiladas
+        shard (tuple): Intervalo (início, fim) da fonte
+        batch_size (int): Linhas por lote enviado ao verificador
+        state (SharedState): Estado compartilhado do trabalho
+        stats (StageStats): Contadores de tempo das etapas (None cria um descartável)
+
+    Returns:
+        bool: True se a fatia foi testada inteira sem acerto nem cancelamento
+    """
+    counters = state.counters
+    if stats is None:
+        stats = StageStats()
+    for words, lines, keys in stats.timed('read', source.batches(shard[0], shard[1], batch_size)):
+        if state.is_found():
+            return False
+        tested = len(lines) if lines is not None else len(words)
+
+        # Cada regra gera um lote inteiro, que é a unidade de trabalho do verificador
+        for batch, batch_keys in stats.timed('rules', rule_set.apply(words, keys)):
+            hits = verifier.check_batch(batch, batch_keys, stats)
+            if hits:
+                state.record_hit(batch[hits[0]])
+                counters[worker_id] += lines_until(lines, hits[0]) if lines is not None else hits[0] + 1
+                return False
+            counters[worker_id] += tested
+            if batch:
+                state.set_current(batch[-1])
+            if state.is_found():
+                return False
+    return not state.is_found()
+
+
+def pool_worker(worker_id, zip_path, source_spec, batch_size, rules, shard_queue, done_queue, state,
+                stats_queue=None):
+    """
+    Processo worker: lê as próprias senhas das fatias recebidas e as testa em lotes
+
+    Os contadores de tempo das etapas ficam no próprio worker e são enviados
+    uma única vez, ao final, pela stats_queue.
+
+    Args:
+        worker_id (int): Índice do worker nos contadores compartilhados
+        zip_path (str | tuple): Caminho para o arquivo ZIP, ou tupla de caminhos no modo de vários arquivos
+        source_spec (tuple): Fonte de senhas (ver wordlist_index.prepare_source)
+        batch_size (int): Linhas por lote enviado ao verificador
+        rules (list): Regras de transformação (str), ou None para a lista pura
+        shard_queue (Queue): Fila de fatias (início, fim); None sinaliza o fim
+        done_queue (Queue): Fila onde as fatias concluídas são devolvidas
+        state (SharedState): Estado compartilhado entre os processos
+        stats_queue (Queue): Fila onde o worker devolve seus StageStats ao terminar
+    """
+    try:
+        if isinstance(zip_path, tuple):
+            verifier = ArchiveSet.from_zips(zip_path, state)
+        else:
+            verifier = open_verifier(zip_path)
+    except ValueError as e:
+        print(f"ERRO: Worker {worker_id}: {e}", file=sys.stderr)
+        verifier = None
+    if verifier is None:
+        print(f"ERRO: Worker {worker_id} não conseguiu montar o verificador", file=sys.stderr)
+        return
+
+    # As regras são compiladas uma única vez por worker
+    rule_set = RuleSet(rules if rules else [':'])
+    stats = StageStats()
+    parent = os.getppid()
+
+    try:
+        with open_source(source_spec) as source:
+            while not state.is_found():
+                start = time.perf_counter()
+                try:
+                    shard = shard_queue.get(timeout=0.1)
+                except queue.Empty:
+                    stats.add('dequeue_wait', time.perf_counter() - start, 0)
+                    if os.getppid() != parent:
+                        # Processo principal morto (ex.: SIGKILL): não ficar órfão
+                        break
+                    continue
+                stats.add('dequeue_wait', time.perf_counter() - start)
+                if shard is None:
+                    break
+
+                if test_shard(worker_id, verifier, source, rule_set, shard, batch_size, state, stats):
+                    # Fatia inteira testada: registrar para o checkpoint
+                    done_queue.put(shard)
+    finally:
+        if stats_queue is not None:
+            stats_queue.put(stats)
+
+
+class ProcessPool:
+    """Conjunto de processos worker alimentado por fatias da lista de palavras"""
+
+    def __init__(self, zip_path, source_spec, batch_size, num_workers=None, rules=None, profile=None):
+        self.num_workers = num_workers or physical_core_count()
+        # Uma tupla de caminhos testa vários arquivos na mesma passada, com uma senha por arquivo
+        num_archives = len(zip_path) if isinstance(zip_path, tuple) else 1
+        self.state = SharedState(self.num_workers, num_archives=num_archives)
+        # As fatias são só pares de inteiros: a fila não precisa de limite
+        self.shard_queue = multiprocessing.Queue()
+        self.done_queue = multiprocessing.Queue()
+        self.stats_queue = multiprocessing.Queue()
+        self.processes = []
+        self.zip_path = zip_path
+        self.source_spec = source_spec
+        self.batch_size = batch_size
+        self.rules = rules
+        # (profiler, pasta) para executar cada worker sob cProfile/tracemalloc, ou None
+        self.profile = profile
+        self.stats = StageStats()
+
+    def start(self):
+        for worker_id in range(self.num_workers):
+            process = multiprocessing.Process(
+                target=run_profiled,
+                args=(self.profile, f'worker-{worker_id}', pool_worker,
+                      worker_id, self.zip_path, self.source_spec, self.batch_size, self.rules,
+                      self.shard_queue, self.done_queue, self.state, self.stats_queue),
+                daemon=True
+            )
+            process.start()
+            self.processes.append(process)
+
+    def active_workers(self):
+        return sum(1 for p in self.processes if p.is_alive())
+
+    def submit(self, shard):
+        """
+        Envia uma fatia (início, fim) da lista aos workers
+
+        Args:
+            shard (tuple): Intervalo de bytes alinhado a quebras de linha
+        """
+        self.shard_queue.put(shard)
+
+    def completed_shards(self):
+        """
+        Retira da fila as fatias concluídas pelos workers desde a última chamada
+
+        Returns:
+            list: Fatias (início, fim) concluídas
+        """
+        shards = []
+        while True:
+            try:
+                shards.append(self.done_queue.get_nowait())
+            except queue.Empty:
+                return shards
+
+    def collect_stats(self):
+        """
+        Soma os contadores que os workers já devolveram
+
+        Returns:
+            StageStats: Contadores de todos os workers que terminaram até agora
+        """
+        while True:
+            try:
+                self.stats.merge(self.stats_queue.get_nowait())
+            except queue.Empty:
+                return self.stats
+
+    def finish(self):
+        """Sinaliza o fim das fatias para todos os workers"""
+        for _ in self.processes:
+            self.shard_queue.put(None)
+
+    def join(self, timeout=None):
+        """
+        Aguarda os workers terminarem
+
+        Args:
+            timeout (float): Tempo máximo de espera por worker (None espera indefinidamente)
+        """
+        for process in self.processes:
+            process.join(timeout)
+
+    def stop(self, drain=None):
+        """
+        Encerra os workers imediatamente e libera as filas
+
+        Args:
+            drain (callable): Chamado depois que os workers param e antes de as
+                filas serem fechadas (ex.: recolher as fatias concluídas)
+        """
+        with self.state.found.get_lock():
+            if not self.state.found.value:
+                self.state.found.value = -1
+        for process in self.processes:
+            # Ler os contadores já enviados evita que um worker fique preso no envio ao sair
+            self.collect_stats()
+            process.join(timeout=1.0)
+            if process.is_alive():
+                process.terminate()
+        if drain is not None:
+            drain()
+        self.collect_stats()
+        for q in (self.shard_queue, self.done_queue, self.stats_queue):
+            q.cancel_join_thread()
+            q.close()
+
+
+# Trabalhos abertos (verificador e fonte) mantidos em cache por worker do serviço
+SERVICE_JOB_CACHE_SIZE = 4
+
+
+def service_worker(worker_id, task_queue, done_queue, slots):
+    """
+    Processo worker permanente do serviço: atende fatias de vários trabalhos
+
+    Cada tarefa traz o trabalho a que pertence; verificador, fonte e regras de
+    cada trabalho são abertos uma vez e mantidos em um pequeno cache, então
+    fatias seguidas do mesmo trabalho não repetem essa preparação.
+
+    Args:
+        worker_id (int): Índice do worker nos contadores compartilhados
+        task_queue (Queue): Tarefas (vaga, trabalho, zip, fonte, lote, regras, fatia); None encerra
+        done_queue (Queue): Retorno (vaga, trabalho, fatia, concluída, StageStats) de cada tarefa
+        slots (list): SharedState de cada vaga de trabalho
+    """
+    jobs = {}
+    try:
+        while True:
+            start = time.perf_counter()
+            task = task_queue.get()
+            if task is None:
+                break
+            slot, job_id, zip_path, source_spec, batch_size, rules, shard = task
+            # Os contadores de cada tarefa voltam com ela e são somados no trabalho
+            stats = StageStats()
+            stats.add('dequeue_wait', time.perf_counter() - start)
+            state = slots[slot]
+            completed = False
+            try:
+                if not state.is_found():
+                    job = jobs.pop(job_id, None)
+                    if job is None:
+                        verifier = open_verifier(zip_path)
+                        if verifier is None:
+                            raise ValueError("Criptografia não suportada pelo verificador em processo")
+                        job = (verifier, open_source(source_spec), RuleSet(rules if rules else [':']))
+                    # Reinserir mantém o dicionário em ordem de uso (o primeiro é o mais antigo)
+                    jobs[job_id] = job
+                    while len(jobs) > SERVICE_JOB_CACHE_SIZE:
+                        oldest = next(iter(jobs))
+                        jobs.pop(oldest)[1].close()
+                    verifier, source, rule_set = job
+                    completed = test_shard(worker_id, verifier, source, rule_set, shard, batch_size, state, stats)
+            except Exception as e:
+                print(f"ERRO: Worker {worker_id} falhou no trabalho {job_id}: {str(e)}", file=sys.stderr)
+                state.cancel()
+            done_queue.put((slot, job_id, shard, completed, stats))
+    finally:
+        for _, source, _ in jobs.values():
+            source.close()
+
+
+class ServicePool:
+    """
+    Processos worker permanentes compartilhados por vários trabalhos
+
+    O estado compartilhado precisa existir antes de os processos serem criados,
+    então o pool reserva um número fixo de vagas; cada trabalho em execução
+    ocupa uma vaga e os demais aguardam na fila do serviço.
+    """
+
+    def __init__(self, num_workers=None, num_slots=8):
+        self.num_workers = num_workers or physical_core_count()
+        self.slots = [SharedState(self.num_workers) for _ in range(num_slots)]
+        self.task_queue = multiprocessing.Queue()
+        self.done_queue = multiprocessing.Queue()
+        self.processes = []
+
+    def start(self):
+        for worker_id in range(self.num_workers):
+            process = multiprocessing.Process(
+                target=service_worker,
+                args=(worker_id, self.task_queue, self.done_queue, self.slots),
+                daemon=True
+            )
+            process.start()
+            self.processes.append(process)
+
+    def active_workers(self):
+        return sum(1 for p in self.processes if p.is_alive())
+
+    def submit(self, task):
+        """
+        Envia uma tarefa (vaga, trabalho, zip, fonte, lote, regras, fatia) aos workers
+
+        Args:
+            task (tuple): Tarefa no formato lido por service_worker
+        """
+        self.task_queue.put(task)
+
+    def completed_tasks(self, timeout=None):
+        """
+        Retira da fila as tarefas devolvidas pelos workers
+
+        Args:
+            timeout (float): Tempo máximo de espera pela primeira tarefa (None não espera)
+
+        Returns:
+            list: Tuplas (vaga, trabalho, fatia, concluída, StageStats)
+        """
+        tasks = []
+        try:
+            if timeout:
+                tasks.append(self.done_queue.get(timeout=timeout))
+            while True:
+                tasks.append(self.done_queue.get_nowait())
+        except queue.Empty:
+            return tasks
+
+    def stop(self):
+        """Cancela todas as vagas e encerra os workers"""
+        for state in self.slots:
+            state.cancel()
+        for _ in self.processes:
+            self.task_queue.put(None)
+        for process in self.processes:
+            process.join(timeout=1.0)
+            if process.is_alive():
+                process.terminate()
+        for q in (self.task_queue, self.done_queue):
+            q.cancel_join_thread()
+            q.close()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Cache persistente de resultados por impressão digital do arquivo ZIP.
+
+Cópias idênticas de um arquivo enviadas com outro nome têm a mesma impressão
+digital (checkpoint.archive_fingerprint: nomes, CRCs e cabeçalhos das
+entradas criptografadas). Para cada impressão o cache guarda a senha
+encontrada e os espaços de busca (hash da lista com as regras, ou da
+máscara) já esgotados sem acerto. Guarda também as senhas encontradas mais
+recentemente, testadas contra qualquer arquivo antes do ataque completo.
+
+O cache é um arquivo JSON na pasta do ZIP (ao lado dos uploads). Cada
+alteração relê o arquivo sob lock e grava de forma atômica, para que
+execuções simultâneas não percam os registros umas das outras.
+"""
+import json
+import os
+import sys
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Sem fcntl (Windows) a gravação continua atômica, só sem o lock
+    fcntl = None
+
+CACHE_VERSION = 1
+CACHE_FILE_NAME = '.superzip-results.json'
+LOCK_SUFFIX = '.lock'
+
+# Senhas encontradas mantidas para a pré-passada (as mais recentes)
+KNOWN_PASSWORDS_MAX = 256
+
+# Espaços de busca esgotados guardados por arquivo (os mais recentes)
+EXHAUSTED_MAX = 64
+
+
+def encode_password(password):
+    """Senha (bytes) como texto JSON, preservando bytes que não são UTF-8"""
+    return password.decode('utf-8', errors='surrogateescape')
+
+
+def decode_password(text):
+    """Inverso de encode_password"""
+    return text.encode('utf-8', errors='surrogateescape')
+
+
+class ResultCache:
+    """Senhas encontradas e espaços de busca esgotados por impressão digital"""
+
+    def __init__(self, path, archives=None, passwords=None):
+        self.path = path
+        # impressão digital -> {"password": str | None, "exhausted": [hashes], "updatedAt": float}
+        self.archives = archives or {}
+        # Senhas encontradas, da mais recente para a mais antiga
+        self.passwords = passwords or []
+
+    @classmethod
+    def for_archive(cls, zip_path):
+        """
+        Args:
+            zip_path (str): Caminho para o arquivo ZIP
+
+        Returns:
+            ResultCache: Cache da pasta do arquivo
+        """
+        return cls.load(os.path.join(os.path.dirname(os.path.abspath(zip_path)), CACHE_FILE_NAME))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Lê o cache do disco
+
+        Args:
+            path (str): Caminho do arquivo de cache
+
+        Returns:
+            ResultCache: Cache lido (vazio se não existir ou for inválido)
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != CACHE_VERSION:
+                return cls(path)
+            return cls(path, dict(data['archives']), list(data['passwords']))
+        except FileNotFoundError:
+            return cls(path)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"AVISO: Cache de resultados ignorado ({str(e)})", file=sys.stderr)
+            return cls(path)
+
+    def password(self, fingerprint):
+        """
+        Returns:
+            bytes: Senha registrada para o arquivo, ou None
+        """
+        entry = self.archives.get(fingerprint)
+        if entry is None or entry.get('password') is None:
+            return None
+        return decode_password(entry['password'])
+
+    def is_exhausted(self, fingerprint, keyspace):
+        """
+        Args:
+            fingerprint (str): Impressão digital do arquivo
+            keyspace (KeyspaceDigest): Espaço de busca
+
+        Returns:
+            bool: True se o espaço de busca já foi testado inteiro contra o arquivo sem acerto
+        """
+        entry = self.archives.get(fingerprint)
+        return entry is not None and any(keyspace.matches(d) for d in entry.get('exhausted', ()))
+
+    def known_passwords(self):
+        """
+        Returns:
+            list: Senhas encontradas (bytes), da mais recente para a mais antiga
+        """
+        return [decode_password(text) for text in self.passwords]
+
+    def record_password(self, fingerprint, password):
+        """
+        Registra a senha de um arquivo e a coloca no início das senhas conhecidas
+
+        Args:
+            fingerprint (str): Impressão digital do arquivo
+            password (bytes): Senha encontrada
+        """
+        text = encode_password(password)
+
+        def change(cache):
+            entry = cache.archives.setdefault(fingerprint, {})
+            entry['password'] = text
+            entry['updatedAt'] = time.time()
+            cache.passwords = ([text] + [p for p in cache.passwords if p != text])[:KNOWN_PASSWORDS_MAX]
+
+        self.update(change)
+
+    def record_exhausted(self, fingerprint, keyspace):
+        """
+        Registra um espaço de busca testado inteiro contra o arquivo sem acerto
+
+        Args:
+            fingerprint (str): Impressão digital do arquivo
+            keyspace (KeyspaceDigest): Espaço de busca (lista e regras, ou máscara)
+        """
+        keyspace_digest = str(keyspace)
+
+        def change(cache):
+            entry = cache.archives.setdefault(fingerprint, {})
+            exhausted = [d for d in entry.get('exhausted', []) if d != keyspace_digest]
+            entry['exhausted'] = (exhausted + [keyspace_digest])[-EXHAUSTED_MAX:]
+            entry['updatedAt'] = time.time()
+
+        self.update(change)
+
+    def update(self, change):
+        """
+        Aplica uma alteração sobre a versão mais recente do disco e grava o cache
+
+        Args:
+            change (callable): Recebe o ResultCache relido e o altera
+        """
+        lock = None
+        try:
+            if fcntl is not None:
+                lock = open(self.path + LOCK_SUFFIX, 'a')
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            current = ResultCache.load(self.path)
+            change(current)
+            self.archives, self.passwords = current.archives, current.passwords
+            self.save()
+        except OSError as e:
+            print(f"AVISO: Não foi possível gravar o cache de resultados: {str(e)}", file=sys.stderr)
+        finally:
+            if lock is not None:
+                lock.close()
+
+    def save(self):
+        """Grava o cache de forma atômica (arquivo temporário + rename)"""
+        data = {
+            'version': CACHE_VERSION,
+            'archives': self.archives,
+            'passwords': self.passwords
+        }
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Motor de regras de transformação de senhas (subconjunto da sintaxe do hashcat).
+
+Cada linha do arquivo de regras é compilada uma única vez em uma sequência de
+transformações sobre bytes; sequências de $X/^X viram um único acréscimo e
+sequências de sXY viram uma única tabela para bytes.translate. As senhas
+transformadas são geradas sob demanda, lote a lote, sem expandir a lista em
+disco. Toda regra gera exatamente uma senha por palavra, então o total de
+candidatas é conhecido de antemão (palavras x regras).
+
+Funções suportadas:
+    :       nada            l   minúsculas        u   maiúsculas
+    c       Capitaliza      C   cAPITALIZA inverso t   inverte maiúsculas
+    TN      inverte posição N                      r   inverte a palavra
+    d       duplica         f   espelha            {   rotaciona à esquerda
+    }       rotaciona à direita
+    $X      acrescenta X    ^X  prefixa X
+    [       remove o 1º     ]   remove o último    DN  remove posição N
+    'N      trunca em N     iNX insere X em N      oNX sobrescreve N com X
+    sXY     troca X por Y   @X  remove todo X
+    zN      repete o 1º N vezes                    ZN  repete o último N vezes
+
+Posições usam 0-9 e depois A-Z (10-35). Espaços entre funções são ignorados
+e linhas começando com # são comentários. Linhas com sintaxe inválida são
+avisadas e ignoradas ao carregar o arquivo.
+"""
+import hashlib
+import sys
+
+# Funções sem argumentos
+SIMPLE_FUNCTIONS = {
+    ':': None,
+    'l': lambda w: w.lower(),
+    'u': lambda w: w.upper(),
+    'c': lambda w: w[:1].upper() + w[1:].lower(),
+    'C': lambda w: w[:1].lower() + w[1:].upper(),
+    't': lambda w: w.swapcase(),
+    'r': lambda w: w[::-1],
+    'd': lambda w: w + w,
+    'f': lambda w: w + w[::-1],
+    '{': lambda w: w[1:] + w[:1],
+    '}': lambda w: w[-1:] + w[:-1],
+    '[': lambda w: w[1:],
+    ']': lambda w: w[:-1],
+}
+
+# Funções com argumentos: quantidade de bytes consumidos após o nome
+ARGUMENT_COUNTS = {
+    '$': 1, '^': 1, '@': 1, 's': 2,
+    'T': 1, 'D': 1, "'": 1, 'z': 1, 'Z': 1,
+    'i': 2, 'o': 2,
+}
+
+IDENTITY_TABLE = bytes(range(256))
+
+
+class RuleError(ValueError):
+    """Regra com sintaxe inválida"""
+
+
+def _position(rule, char):
+    """
+    Converte um caractere de posição (0-9, A-Z) em número
+
+    Args:
+        rule (str): Regra sendo compilada (para a mensagem de erro)
+        char (str): Caractere de posição
+
+    Returns:
+        int: Posição
+    """
+    if char.isdigit():
+        return int(char)
+    if 'A' <= char <= 'Z':
+        return ord(char) - ord('A') + 10
+    raise RuleError(f"Posição inválida '{char}' na regra '{rule}'")
+
+
+def _positional(op, n, x):
+    """Cria a transformação de uma função com posição"""
+    if op == 'T':
+        return lambda w: w[:n] + w[n:n + 1].swapcase() + w[n + 1:]
+    if op == 'D':
+        return lambda w: w[:n] + w[n + 1:]
+    if op == "'":
+        return lambda w: w[:n]
+    if op == 'z':
+        return lambda w: w[:1] * n + w
+    if op == 'Z':
+        return lambda w: w + w[-1:] * n
+    if op == 'i':
+        return lambda w: w[:n] + x + w[n:] if n <= len(w) else w
+    return lambda w: w[:n] + x + w[n + 1:] if n < len(w) else w
+
+
+def _parse(rule):
+    """
+    Separa uma regra em funções (nome, argumentos)
+
+    Args:
+        rule (str): Linha do arquivo de regras
+
+    Returns:
+        list: Pares (função, argumentos)
+    """
+    ops = []
+    i = 0
+    while i < len(rule):
+        op = rule[i]
+        i += 1
+        if op.isspace():
+            continue
+        if op in SIMPLE_FUNCTIONS:
+            ops.append((op, ''))
+        elif op in ARGUMENT_COUNTS:
+            size = ARGUMENT_COUNTS[op]
+            args = rule[i:i + size]
+            if len(args) != size:
+                raise RuleError(f"Argumentos faltando para '{op}' na regra '{rule}'")
+            ops.append((op, args))
+            i += size
+        else:
+            raise RuleError(f"Função desconhecida '{op}' na regra '{rule}'")
+    return ops
+
+
+def compile_rule(rule):
+    """
+    Compila uma regra em uma função bytes -> bytes
+
+    Args:
+        rule (str): Linha do arquivo de regras
+
+    Returns:
+        callable: Transformação, ou None se a regra não altera a palavra
+    """
+    steps = []
+    pending_table = None
+    pending_suffix = b''
+    pending_prefix = b''
+
+    def flush():
+        nonlocal pending_table, pending_suffix, pending_prefix
+        if pending_table is not None:
+            table = pending_table
+            steps.append(lambda w: w.translate(table))
+            pending_table = None
+        if pending_prefix or pending_suffix:
+            prefix, suffix = pending_prefix, pending_suffix
+            steps.append(lambda w: prefix + w + suffix)
+            pending_prefix = pending_suffix = b''
+
+    for op, args in _parse(rule):
+        raw = args.encode('latin1', errors='strict') if args else b''
+        if op == ':':
+            continue
+        if op == 's':
+            # Trocas de um byte por outro se compõem numa única tabela
+            if pending_prefix or pending_suffix:
+                flush()
+            table = bytearray(pending_table or IDENTITY_TABLE)
+            source, target = raw[0], raw[1]
+            pending_table = bytes(target if b == source else b for b in table)
+        elif op == '$':
+            if pending_table is not None:
+                flush()
+            pending_suffix += raw
+        elif op == '^':
+            if pending_table is not None:
+                flush()
+            pending_prefix = raw + pending_prefix
+        else:
+            flush()
+            if op in SIMPLE_FUNCTIONS:
+                steps.append(SIMPLE_FUNCTIONS[op])
+            elif op == '@':
+                steps.append(lambda w, x=raw: w.replace(x, b''))
+            else:
+                steps.append(_positional(op, _position(rule, args[0]), raw[1:]))
+    flush()
+
+    if not steps:
+        return None
+    if len(steps) == 1:
+        return steps[0]
+
+    def apply(w, steps=tuple(steps)):
+        for step in steps:
+            w = step(w)
+        return w
+    return apply
+
+
+def load_rules(path):
+    """
+    Lê um arquivo de regras, ignorando linhas vazias, comentários e regras inválidas
+
+    Args:
+        path (str): Caminho do arquivo de regras
+
+    Returns:
+        list: Regras válidas (str), na ordem do arquivo
+    """
+    rules = []
+    with open(path, 'r', encoding='latin1') as f:
+        for number, line in enumerate(f, 1):
+            line = line.rstrip('\r\n')
+            if not line.strip() or line.startswith('#'):
+                continue
+            try:
+                compile_rule(line)
+            except RuleError as e:
+                print(f"AVISO: Linha {number} de {path} ignorada: {str(e)}", file=sys.stderr)
+                continue
+            rules.append(line)
+    return rules
+
+
+def rules_digest(rules):
+    """
+    Args:
+        rules (list): Regras (str)
+
+    Returns:
+        str: Hash SHA-256 das regras (identifica o espaço de busca no checkpoint)
+    """
+    return hashlib.sha256('\n'.join(rules).encode('latin1')).hexdigest()
+
+
+class RuleSet:
+    """Conjunto de regras compiladas aplicado lote a lote"""
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.compiled = [compile_rule(rule) for rule in self.rules]
+
+    def __len__(self):
+        return len(self.compiled)
+
+    def apply(self, words, keys=None):
+        """
+        Gera, regra a regra, as senhas transformadas de um lote de palavras
+
+        Args:
+            words (list): Palavras base (bytes)
+            keys (tuple): Estado de chaves pré-calculado para as palavras sem transformação
+
+        Yields:
+            tuple: (senhas transformadas, estado de chaves ou None)
+        """
+        for transform in self.compiled:
+            if transform is None:
+                yield words, keys
+            else:
+                yield [transform(w) for w in words], None
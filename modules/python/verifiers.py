@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+Escolha do verificador em processo adequado à criptografia do arquivo ZIP.
+"""
+from zipcrypto import ZipCryptoVerifier
+from winzip_aes import AesVerifier
+
+
+def open_verifier(zip_path):
+    """
+    Monta o verificador em processo mais barato para o arquivo ZIP
+
+    ZipCrypto tem prioridade sobre AES quando o arquivo mistura os dois, já que
+    o teste por senha é muito mais barato.
+
+    Args:
+        zip_path (str): Caminho para o arquivo ZIP
+
+    Returns:
+        ZipCryptoVerifier | AesVerifier: Verificador, ou None se nenhum se aplicar
+    """
+    verifier = ZipCryptoVerifier.from_zip(zip_path)
+    if verifier is None:
+        verifier = AesVerifier.from_zip(zip_path)
+    return verifier
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Verificador WinZip AES (AE-1/AE-2) executado em processo.
+
+O campo extra 0x9901 de cada entrada indica a força da chave; o salt e o valor
+de verificação de senha (PV) de 2 bytes são lidos uma única vez. Para cada
+senha candidata derivamos as chaves com PBKDF2-HMAC-SHA1 e comparamos o PV;
+só os acertos (~1/65536) passam pela autenticação HMAC-SHA1 dos dados.
+"""
+import hashlib
+import hmac
+import struct
+import time
+import zipfile
+
+from zipcrypto import LOCAL_HEADER_STRUCT, LOCAL_HEADER_SIGNATURE, AES_METHOD
+
+# Identificador do campo extra do WinZip AES
+AES_EXTRA_ID = 0x9901
+
+# Força da chave -> (tamanho da chave AES, tamanho do salt)
+AES_STRENGTHS = {
+    1: (16, 8),
+    2: (24, 12),
+    3: (32, 16),
+}
+
+PBKDF2_ITERATIONS = 1000
+PASSWORD_VERIFIER_SIZE = 2
+AUTH_CODE_SIZE = 10
+
+# Blocos lidos ao autenticar os dados (mantém a memória constante)
+READ_CHUNK_SIZE = 1024 * 1024
+
+# PBKDF2 é caro: lotes pequenos mantêm o cancelamento rápido
+DEFAULT_BATCH_SIZE = 64
+
+
+def parse_aes_extra(extra):
+    """
+    Procura o campo extra 0x9901 e extrai seus parâmetros
+
+    Args:
+        extra (bytes): Campo extra da entrada
+
+    Returns:
+        tuple: (versão AE, força da chave, método de compressão real), ou None
+    """
+    offset = 0
+    while offset + 4 <= len(extra):
+        header_id, size = struct.unpack_from('<HH', extra, offset)
+        offset += 4
+        if header_id == AES_EXTRA_ID and size >= 7:
+            version, vendor, strength, method = struct.unpack_from('<H2sBH', extra, offset)
+            if vendor == b'AE':
+                return version, strength, method
+        offset += size
+    return None
+
+
+class AesEntry:
+    """Dados de uma entrada WinZip AES necessários para testar senhas"""
+
+    def __init__(self, zip_info, version, key_size, salt, verifier, data_offset, data_size, auth_code):
+        self.info = zip_info
+        self.version = version
+        self.key_size = key_size
+        self.salt = salt
+        self.verifier = verifier
+        self.data_offset = data_offset
+        self.data_size = data_size
+        self.auth_code = auth_code
+
+    @classmethod
+    def from_zip_info(cls, fp, zip_info):
+        """
+        Lê o salt, o PV e o código de autenticação de uma entrada AES
+
+        Args:
+            fp (file): Arquivo ZIP aberto em modo binário
+            zip_info (ZipInfo): Entrada do diretório central
+
+        Returns:
+            AesEntry: Entrada pronta para verificação, ou None se não for AES
+        """
+        params = parse_aes_extra(zip_info.extra)
+        if params is None or params[1] not in AES_STRENGTHS:
+            return None
+        version, strength, _ = params
+        key_size, salt_size = AES_STRENGTHS[strength]
+
+        fp.seek(zip_info.header_offset)
+        fields = LOCAL_HEADER_STRUCT.unpack(fp.read(LOCAL_HEADER_STRUCT.size))
+        signature, name_len, extra_len = fields[0], fields[9], fields[10]
+        if signature != LOCAL_HEADER_SIGNATURE:
+            raise zipfile.BadZipFile(f"Cabeçalho local inválido para {zip_info.filename}")
+
+        start = zip_info.header_offset + LOCAL_HEADER_STRUCT.size + name_len + extra_len
+        data_size = zip_info.compress_size - salt_size - PASSWORD_VERIFIER_SIZE - AUTH_CODE_SIZE
+        if data_size < 0:
+            raise zipfile.BadZipFile(f"Entrada AES truncada: {zip_info.filename}")
+
+        fp.seek(start)
+        salt = fp.read(salt_size)
+        verifier = fp.read(PASSWORD_VERIFIER_SIZE)
+        data_offset = start + salt_size + PASSWORD_VERIFIER_SIZE
+        fp.seek(data_offset + data_size)
+        auth_code = fp.read(AUTH_CODE_SIZE)
+
+        return cls(zip_info, version, key_size, salt, verifier, data_offset, data_size, auth_code)
+
+    def derive(self, password):
+        """
+        Deriva chave AES, chave HMAC e PV a partir da senha
+
+        Args:
+            password (bytes): Senha candidata
+
+        Returns:
+            bytes: Material derivado (2 * tamanho da chave + 2 bytes)
+        """
+        return hashlib.pbkdf2_hmac('sha1', password, self.salt, PBKDF2_ITERATIONS,
+                                   2 * self.key_size + PASSWORD_VERIFIER_SIZE)
+
+    def authenticate(self, zip_path, derived):
+        """
+        Confere o HMAC-SHA1 dos dados criptografados (lidos em blocos)
+
+        Args:
+            zip_path (str): Caminho para o arquivo ZIP
+            derived (bytes): Material derivado por derive()
+
+        Returns:
+            bool: True se o código de autenticação conferir
+        """
+        mac = hmac.new(derived[self.key_size:2 * self.key_size], digestmod=hashlib.sha1)
+        remaining = self.data_size
+        with open(zip_path, 'rb') as fp:
+            fp.seek(self.data_offset)
+            while remaining > 0:
+                chunk = fp.read(min(READ_CHUNK_SIZE, remaining))
+                if not chunk:
+                    return False
+                mac.update(chunk)
+                remaining -= len(chunk)
+        return hmac.compare_digest(mac.digest()[:AUTH_CODE_SIZE], self.auth_code)
+
+
+class AesVerifier:
+    """
+    Testa senhas contra uma entrada WinZip AES comparando o PV e, nos acertos,
+    o código de autenticação HMAC-SHA1
+    """
+
+    name = 'WinZip AES'
+    batch_size = DEFAULT_BATCH_SIZE
+    # O HMAC autentica até entradas vazias
+    confirmable = True
+
+    def __init__(self, zip_path, entries):
+        self.zip_path = zip_path
+        self.entries = entries
+        # A entrada com menos dados deixa a autenticação HMAC mais barata
+        self.primary = min(entries, key=lambda e: e.data_size)
+
+    @classmethod
+    def from_zip(cls, zip_path):
+        """
+        Analisa o arquivo ZIP uma única vez e monta o verificador
+
+        Args:
+            zip_path (str): Caminho para o arquivo ZIP
+
+        Returns:
+            AesVerifier: Verificador, ou None se não houver entradas AES
+        """
+        with zipfile.ZipFile(zip_path) as zf:
+            infos = [f for f in zf.infolist() if f.flag_bits & 0x1 and f.compress_type == AES_METHOD]
+        if not infos:
+            return None
+
+        with open(zip_path, 'rb') as fp:
+            entries = [AesEntry.from_zip_info(fp, info) for info in infos]
+        entries = [e for e in entries if e is not None]
+        if not entries:
+            return None
+        return cls(zip_path, entries)
+
+    def check(self, password, stats=None):
+        """
+        Testa uma senha: filtro pelo PV e confirmação pelo HMAC
+
+        Args:
+            password (bytes): Senha candidata
+            stats (StageStats): Contadores de tempo das etapas (opcional)
+
+        Returns:
+            bool: True se a senha estiver correta
+        """
+        entry = self.primary
+        if stats is not None:
+            start = time.perf_counter()
+        derived = entry.derive(password)
+        matched = derived[-PASSWORD_VERIFIER_SIZE:] == entry.verifier
+        if stats is not None:
+            checked = time.perf_counter()
+            stats.add('header_check', checked - start)
+        if not matched:
+            return False
+        matched = entry.authenticate(self.zip_path, derived)
+        if stats is not None:
+            stats.add('verify', time.perf_counter() - checked)
+        return matched
+
+    def check_batch(self, passwords, keys=None, stats=None):
+        """
+        Testa um lote de senhas
+
+        Args:
+            passwords (list): Senhas candidatas (bytes)
+            keys (tuple): Ignorado (chaves PKZIP não se aplicam ao AES)
+            stats (StageStats): Contadores de tempo das etapas (opcional)
+
+        Returns:
+            list: Índices (em ordem crescente) das senhas corretas
+        """
+        return [i for i, password in enumerate(passwords) if self.check(password, stats)]
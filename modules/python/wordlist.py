@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Leitura da lista de palavras em uma única passada sobre um mmap.
+
+As linhas são localizadas direto nos bytes do arquivo e distribuídas em
+fatias (intervalos de bytes) alinhadas a quebras de linha. Cada worker lê as
+próprias senhas da sua fatia; a contagem total sai da mesma varredura que
+define as fatias, então o ataque começa antes de o arquivo ser todo contado.
+
+Linhas vazias (ou só com espaços) não são senhas e ficam fora da contagem,
+como no índice pré-compilado. O total do texto ainda inclui as linhas
+repetidas, que o índice conta uma vez só.
+"""
+import mmap
+import os
+import re
+import threading
+
+# Limites do tamanho de cada fatia em bytes
+MIN_SHARD_SIZE = 4 * 1024
+MAX_SHARD_SIZE = 1024 * 1024
+
+# Codificações usadas para gerar variantes de linhas com bytes não ASCII
+LEGACY_ENCODINGS = ['latin1', 'cp1252']
+
+# Linha vazia depois de strip() (os mesmos espaços ASCII que bytes.strip remove)
+BLANK_LINE = re.compile(rb'^[ \t\r\x0b\x0c]*$', re.MULTILINE)
+
+
+def encoding_variants(line):
+    """
+    Gera as variantes de codificação de uma linha
+
+    Linhas ASCII não têm variantes. Para as demais, além dos bytes originais
+    testamos a linha lida como UTF-8 e gravada em codificações legadas, e lida
+    em codificações legadas e gravada como UTF-8.
+
+    Args:
+        line (bytes): Linha da lista (já sem espaços nas pontas)
+
+    Returns:
+        list: Senhas candidatas (bytes), sem repetição, começando pela original
+    """
+    if line.isascii():
+        return [line]
+
+    variants = [line]
+    try:
+        text = line.decode('utf-8')
+        for encoding in LEGACY_ENCODINGS:
+            try:
+                variants.append(text.encode(encoding))
+            except UnicodeEncodeError:
+                pass
+    except UnicodeDecodeError:
+        pass
+
+    for encoding in LEGACY_ENCODINGS:
+        variants.append(line.decode(encoding, errors='ignore').encode('utf-8'))
+
+    return list(dict.fromkeys(variants))
+
+
+def shard_size_for(file_size, num_workers, batch_size):
+    """
+    Escolhe o tamanho das fatias para equilibrar o trabalho entre os workers
+
+    Args:
+        file_size (int): Tamanho da lista em bytes
+        num_workers (int): Número de workers
+        batch_size (int): Senhas por lote do verificador
+
+    Returns:
+        int: Tamanho de fatia em bytes
+    """
+    # Algumas fatias por worker para balancear, e fatias pequenas quando o
+    # verificador é lento (lotes pequenos) para não atrasar o cancelamento
+    size = min(MAX_SHARD_SIZE, file_size // max(1, num_workers * 8), batch_size * 64)
+    return max(MIN_SHARD_SIZE, size)
+
+
+class Wordlist:
+    """Lista de palavras mapeada em memória"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        self.data_size = self.size
+        # mmap não aceita arquivos vazios
+        if self.size:
+            self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.data = b''
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def shards(self, shard_size=MAX_SHARD_SIZE):
+        """
+        Percorre o arquivo uma vez dividindo-o em fatias alinhadas a quebras de linha
+
+        Args:
+            shard_size (int): Tamanho aproximado de cada fatia em bytes
+
+        Yields:
+            tuple: (início, fim, número de linhas não vazias da fatia)
+        """
+        data = self.data
+        size = self.size
+        start = 0
+        while start < size:
+            end = start + shard_size
+            if end >= size:
+                end = size
+            else:
+                newline = data.find(b'\n', end - 1)
+                end = size if newline < 0 else newline + 1
+
+            # mmap não tem count(): contar numa cópia da fatia (limitada a MAX_SHARD_SIZE).
+            # Os trechos entre quebras de linha incluem um vazio depois da última
+            # quebra, que a expressão também encontra e assim se desconta
+            chunk = data[start:end]
+            lines = chunk.count(b'\n') + 1 - len(BLANK_LINE.findall(chunk))
+
+            yield start, end, lines
+            start = end
+
+    def lines(self, start, end):
+        """
+        Lê as linhas de uma fatia direto dos bytes
+
+        Args:
+            start (int): Início da fatia
+            end (int): Fim da fatia
+
+        Returns:
+            list: Linhas não vazias da fatia (bytes, sem espaços nas pontas)
+        """
+        return [line for line in (line.strip() for line in self.data[start:end].split(b'\n')) if line]
+
+    def batches(self, start, end, batch_size):
+        """
+        Divide uma fatia em lotes de senhas candidatas
+
+        Args:
+            start (int): Início da fatia
+            end (int): Fim da fatia
+            batch_size (int): Linhas por lote
+
+        Yields:
+            tuple: (candidatas, linhas de origem, estado de chaves pré-calculado ou None)
+        """
+        lines = self.lines(start, end)
+        for offset in range(0, len(lines), batch_size):
+            chunk = lines[offset:offset + batch_size]
+            yield expand_lines(chunk), chunk, None
+
+
+def expand_lines(lines):
+    """
+    Transforma linhas em senhas candidatas, ignorando linhas vazias
+
+    Args:
+        lines (list): Linhas (bytes)
+
+    Returns:
+        list: Senhas candidatas (bytes), incluindo variantes de codificação
+    """
+    candidates = []
+    for line in lines:
+        if not line:
+            continue
+        if line.isascii():
+            candidates.append(line)
+        else:
+            candidates.extend(encoding_variants(line))
+    return candidates
+
+
+def lines_until(lines, candidate_index):
+    """
+    Conta quantas linhas foram consumidas até a senha candidata de índice informado
+
+    Args:
+        lines (list): Linhas (bytes) que deram origem às candidatas
+        candidate_index (int): Índice em expand_lines(lines)
+
+    Returns:
+        int: Número de linhas testadas até a candidata (inclusive)
+    """
+    seen = 0
+    for consumed, line in enumerate(lines, 1):
+        if not line:
+            continue
+        seen += 1 if line.isascii() else len(encoding_variants(line))
+        if seen > candidate_index:
+            return consumed
+    return len(lines)
+
+
+class ShardPlanner(threading.Thread):
+    """
+    Thread que varre a lista uma vez, entrega as fatias aos workers e
+    acumula a contagem de linhas enquanto o ataque já está em andamento
+    """
+
+    def __init__(self, wordlist, submit, shard_size, skip=None, max_pending=None):
+        super().__init__(daemon=True)
+        self.wordlist = wordlist
+        self.submit = submit
+        self.shard_size = shard_size
+        self.skip = skip
+        # Limite de fatias entregues e ainda não concluídas (None = sem limite);
+        # necessário quando o espaço de busca é grande demais para ser enfileirado
+        self.max_pending = max_pending
+        self.total_lines = 0
+        self.skipped_lines = 0
+        # Linhas de cada fatia entregue (por início), até ela ser concluída
+        self.shard_lines = {}
+        self.planned_bytes = 0
+        self.done = False
+        self.error = None
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            for start, end, lines in self.wordlist.shards(self.shard_size):
+                if self.stopped.is_set():
+                    break
+                if self.skip is not None and self.skip(start, end):
+                    # Fatia concluída numa execução anterior (checkpoint)
+                    self.skipped_lines += lines
+                else:
+                    while self.max_pending and len(self.shard_lines) >= self.max_pending:
+                        if self.stopped.wait(0.05):
+                            return
+                    self.shard_lines[start] = lines
+                    self.submit((start, end))
+                self.total_lines += lines
+                self.planned_bytes = end
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+
+    def stop(self):
+        self.stopped.set()
+
+    def estimated_total(self):
+        """
+        Returns:
+            int: Total de linhas não vazias (exato ao fim da varredura, estimado antes
+                disso ou se ela foi interrompida; exato desde o início para índices e
+                máscaras). No texto as linhas repetidas também contam, e o índice as
+                conta uma vez só
+        """
+        if not self.planned_bytes or self.planned_bytes >= self.wordlist.size:
+            return self.total_lines
+        return self.total_lines * self.wordlist.size // self.planned_bytes
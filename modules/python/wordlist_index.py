@@ -0,0 +1,556 @@
+#!/usr/bin/env python3
+"""
+Cache de índices binários pré-compilados para listas de palavras.
+
+Na primeira vez que uma lista é usada geramos um índice com as senhas
+candidatas já expandidas e sem repetição, um vetor de offsets, a contagem
+total e (com NumPy) o estado das chaves PKZIP após cada senha. O índice fica
+ao lado dos uploads, identificado pelo hash do conteúdo, e as execuções
+seguintes apenas o mapeiam em memória. O diretório é limitado por tamanho,
+removendo primeiro os índices usados há mais tempo.
+
+A geração roda num processo separado, em segundo plano: a execução que
+encontra a lista sem índice testa direto do texto e as seguintes já usam o
+índice pronto. O hash do conteúdo também é calculado por esse processo, e
+não antes do ataque (ver KeyspaceDigest).
+"""
+import hashlib
+import itertools
+import json
+import mmap
+import os
+import struct
+import subprocess
+import sys
+import threading
+import time
+from array import array
+
+from wordlist import Wordlist, expand_lines
+from zipcrypto import init_keys_batch, np
+from mask import Mask
+
+# Formato do arquivo: cabeçalho | offsets (uint64) | chaves (3 x uint32, opcional) | senhas
+INDEX_MAGIC = b'ZCIDX001'
+INDEX_HEADER = struct.Struct('<8sQQ')
+FLAG_KEYS = 0x1
+
+INDEX_DIR_NAME = '.wordlist-index'
+INDEX_SUFFIX = '.idx'
+
+# Listas maiores que isso não são indexadas (a deduplicação precisa de memória)
+INDEX_MAX_SOURCE_SIZE = 256 * 1024 * 1024
+
+# Tamanho máximo do diretório de índices antes de remover os menos usados
+INDEX_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# Marca de um índice em geração; mais antiga que isso, o gerador é dado como morto
+BUILDING_SUFFIX = '.building'
+BUILDING_STALE_SECONDS = 3600
+
+# Senhas por lote ao pré-calcular as chaves
+KEYS_BATCH_SIZE = 65536
+
+HASH_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Hashes já calculados das listas, guardados no diretório de índices
+DIGEST_MEMO_NAME = 'digests.json'
+DIGEST_MEMO_MAX = 256
+
+# Bytes do início e do fim da lista que entram na chave rápida do hash
+QUICK_SAMPLE_SIZE = 64 * 1024
+
+
+def file_digest(path):
+    """
+    Calcula o SHA-256 do conteúdo de um arquivo
+
+    Args:
+        path (str): Caminho do arquivo
+
+    Returns:
+        str: Hash em hexadecimal
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def quick_key(path):
+    """
+    Chave barata do conteúdo: tamanho, data de modificação, inode e amostras do início e do fim
+
+    Args:
+        path (str): Caminho do arquivo
+
+    Returns:
+        str: Chave que muda quando o arquivo é reescrito
+    """
+    with open(path, 'rb') as f:
+        st = os.fstat(f.fileno())
+        sample = hashlib.sha256(f.read(QUICK_SAMPLE_SIZE))
+        if st.st_size > 2 * QUICK_SAMPLE_SIZE:
+            f.seek(-QUICK_SAMPLE_SIZE, os.SEEK_END)
+        sample.update(f.read(QUICK_SAMPLE_SIZE))
+    return f"{st.st_size}:{st.st_mtime_ns}:{st.st_ino}:{sample.hexdigest()}"
+
+
+def quick_id(wordlist_path):
+    """
+    Identificação provisória da lista pela chave rápida, sem ler o conteúdo inteiro
+
+    Args:
+        wordlist_path (str): Lista de palavras em texto
+
+    Returns:
+        str: 'quick-' seguido do SHA-256 da chave rápida
+    """
+    return 'quick-' + hashlib.sha256(quick_key(os.path.abspath(wordlist_path)).encode()).hexdigest()
+
+
+def _digest_memo_path(path):
+    return os.path.join(os.path.dirname(path), INDEX_DIR_NAME, DIGEST_MEMO_NAME)
+
+
+def _load_digest_memo(memo_path):
+    try:
+        with open(memo_path, 'r', encoding='utf-8') as f:
+            return dict(json.load(f))
+    except (OSError, ValueError, TypeError):
+        return {}
+
+
+def known_digest(wordlist_path):
+    """
+    Hash da lista já registrado para o conteúdo atual, sem ler a lista inteira
+
+    Args:
+        wordlist_path (str): Lista de palavras em texto
+
+    Returns:
+        str: Hash em hexadecimal, ou None se ainda não foi calculado
+    """
+    path = os.path.abspath(wordlist_path)
+    entry = _load_digest_memo(_digest_memo_path(path)).get(path)
+    if isinstance(entry, dict) and entry.get('key') == quick_key(path) and entry.get('digest'):
+        return entry['digest']
+    return None
+
+
+def wordlist_digest(wordlist_path):
+    """
+    SHA-256 do conteúdo da lista, sem reler a lista inteira a cada execução
+
+    O hash completo fica guardado no diretório de índices junto com a chave
+    rápida (quick_key); enquanto a chave não muda ele é reaproveitado, e
+    quando muda (ou não há registro) a lista é lida e o registro atualizado.
+
+    Args:
+        wordlist_path (str): Lista de palavras em texto
+
+    Returns:
+        str: Hash em hexadecimal
+    """
+    path = os.path.abspath(wordlist_path)
+    memo_path = _digest_memo_path(path)
+    key = quick_key(path)
+    memo = _load_digest_memo(memo_path)
+    entry = memo.get(path)
+    if isinstance(entry, dict) and entry.get('key') == key and entry.get('digest'):
+        return entry['digest']
+
+    digest = file_digest(path)
+    # Relido depois do hash: outro processo pode ter gravado registros nesse meio tempo
+    memo = _load_digest_memo(memo_path)
+    memo.pop(path, None)
+    memo[path] = {'key': key, 'digest': digest}
+    # Os registros mais recentes ficam no fim (ordem de inserção)
+    memo = dict(list(memo.items())[-DIGEST_MEMO_MAX:])
+    tmp_path = f"{memo_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(memo_path), exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(memo, f, separators=(',', ':'))
+        os.replace(tmp_path, memo_path)
+    except OSError:
+        # Sem gravar o registro a próxima execução só volta a ler a lista inteira
+        pass
+    return digest
+
+
+class KeyspaceDigest:
+    """
+    Identificação de um espaço de busca nos checkpoints e no cache de resultados
+
+    Para uma lista é o hash do conteúdo (seguido do hash das regras). Enquanto
+    esse hash não foi calculado, o que o gerador de índice faz em segundo
+    plano, vale a identificação provisória da chave rápida (quick_id); listas
+    grandes demais para indexar ficam só com ela. Registros gravados com
+    qualquer das duas são reconhecidos, e o hash completo só é calculado na
+    hora quando há um registro com ele para comparar.
+    """
+
+    def __init__(self, wordlist_path=None, suffix='', fixed=None):
+        """
+        Args:
+            wordlist_path (str): Lista de palavras em texto
+            suffix (str): Complemento do hash da lista (regras de transformação)
+            fixed (str): Hash já conhecido do espaço de busca inteiro (máscara)
+        """
+        self.wordlist_path = wordlist_path
+        self.suffix = suffix
+        self.fixed = fixed
+        self.quick = None if fixed is not None else quick_id(wordlist_path) + suffix
+        self._content = None
+
+    def content_digest(self, compute=False):
+        """
+        Hash do conteúdo da lista
+
+        Args:
+            compute (bool): Ler a lista inteira se o hash ainda não foi registrado
+
+        Returns:
+            str: Hash em hexadecimal, ou None se não é conhecido (ou o espaço é uma máscara)
+        """
+        if self.fixed is None and self._content is None:
+            self._content = wordlist_digest(self.wordlist_path) if compute else known_digest(self.wordlist_path)
+        return self._content
+
+    def __str__(self):
+        if self.fixed is not None:
+            return self.fixed
+        content = self.content_digest()
+        return content + self.suffix if content else self.quick
+
+    def matches(self, recorded):
+        """
+        Verifica se um hash gravado num checkpoint ou no cache é deste espaço de busca
+
+        Args:
+            recorded (str): Hash gravado
+
+        Returns:
+            bool: True se identifica o mesmo espaço de busca
+        """
+        if self.fixed is not None:
+            return recorded == self.fixed
+        if recorded == self.quick:
+            return True
+        if recorded.startswith('quick-') or not recorded.endswith(self.suffix):
+            return False
+        return recorded == self.content_digest(compute=True) + self.suffix
+
+
+def build_index(wordlist_path, index_path, with_keys=True):
+    """
+    Gera o índice binário de uma lista de palavras (gravação atômica)
+
+    Args:
+        wordlist_path (str): Lista de palavras em texto
+        index_path (str): Caminho do índice a gerar
+        with_keys (bool): Pré-calcular o estado das chaves PKZIP (requer NumPy)
+
+    Returns:
+        int: Número de senhas únicas no índice
+    """
+    # dict.fromkeys remove repetições mantendo a ordem original da lista; as linhas
+    # são lidas uma a uma do mapeamento, sem copiar o arquivo inteiro para a memória
+    with Wordlist(wordlist_path) as wordlist:
+        lines = (line.strip() for line in iter(wordlist.data.readline, b''))
+        candidates = dict.fromkeys(itertools.chain.from_iterable(
+            expand_lines(batch) for batch in iter(lambda: list(itertools.islice(lines, KEYS_BATCH_SIZE)), [])))
+
+    offsets = array('Q', itertools.accumulate(map(len, candidates), initial=0))
+    with_keys = with_keys and np is not None
+
+    def batches():
+        iterator = iter(candidates)
+        return iter(lambda: list(itertools.islice(iterator, KEYS_BATCH_SIZE)), [])
+
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, len(candidates), FLAG_KEYS if with_keys else 0))
+            offsets.tofile(f)
+            del offsets
+            if with_keys:
+                for batch in batches():
+                    np.stack(init_keys_batch(batch), axis=1).astype(np.uint32).tofile(f)
+            for batch in batches():
+                f.write(b''.join(batch))
+        os.replace(tmp_path, index_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return len(candidates)
+
+
+def start_index_build(wordlist_path, index_dir):
+    """
+    Gera o índice num processo separado, que continua depois que esta execução termina
+
+    O gerador calcula o hash da lista (ver wordlist_digest) antes de gerar o
+    índice com esse nome. Uma marca no diretório evita que execuções
+    simultâneas gerem o mesmo índice duas vezes.
+
+    Args:
+        wordlist_path (str): Lista de palavras em texto
+        index_dir (str): Diretório de índices
+    """
+    marker = os.path.join(index_dir, quick_id(wordlist_path) + BUILDING_SUFFIX)
+    try:
+        if time.time() - os.path.getmtime(marker) > BUILDING_STALE_SECONDS:
+            os.remove(marker)
+    except FileNotFoundError:
+        pass
+    try:
+        os.close(os.open(marker, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        print(f"INFO: Índice da lista já está sendo gerado, usando o texto nesta execução", file=sys.stderr)
+        return
+    try:
+        # Sem herdar stdout/stderr: quem lê a saída desta execução não espera pelo gerador
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), os.path.abspath(wordlist_path), index_dir, marker],
+                         stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                         start_new_session=True)
+    except OSError:
+        os.remove(marker)
+        raise
+    print(f"INFO: Gerando índice pré-compilado da lista em segundo plano; usando o texto nesta execução",
+          file=sys.stderr)
+
+
+def evict_indexes(index_dir, keep=None, max_bytes=INDEX_CACHE_MAX_BYTES):
+    """
+    Remove os índices usados há mais tempo até o diretório caber no limite
+
+    Args:
+        index_dir (str): Diretório de índices
+        keep (str): Índice que não deve ser removido (o que está em uso)
+        max_bytes (int): Tamanho máximo do diretório
+    """
+    entries = []
+    for name in os.listdir(index_dir):
+        if not name.endswith(INDEX_SUFFIX):
+            continue
+        path = os.path.join(index_dir, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if keep is not None and os.path.samefile(path, keep):
+            continue
+        try:
+            os.remove(path)
+            total -= size
+            print(f"INFO: Índice removido do cache: {os.path.basename(path)}", file=sys.stderr)
+        except OSError:
+            pass
+
+
+def prepare_index(wordlist_path, digest=None, background=True):
+    """
+    Carrega ou gera o índice de uma lista de palavras
+
+    Args:
+        wordlist_path (str): Lista de palavras em texto
+        digest (str): Hash do conteúdo já calculado (opcional)
+        background (bool): Gerar um índice ausente em segundo plano (False: esperar a geração);
+            um hash ainda não calculado também fica para o processo gerador
+
+    Returns:
+        str: Caminho do índice, ou None se a lista não deve, não pode ou ainda não foi indexada
+    """
+    try:
+        if os.path.getsize(wordlist_path) > INDEX_MAX_SOURCE_SIZE:
+            return None
+
+        index_dir = os.path.join(os.path.dirname(os.path.abspath(wordlist_path)), INDEX_DIR_NAME)
+        os.makedirs(index_dir, exist_ok=True)
+        digest = digest or known_digest(wordlist_path)
+        if digest is None and background:
+            # Ler a lista inteira para o hash atrasaria o início do ataque
+            start_index_build(wordlist_path, index_dir)
+            return None
+        index_path = os.path.join(index_dir, (digest or wordlist_digest(wordlist_path)) + INDEX_SUFFIX)
+
+        if os.path.exists(index_path):
+            # Atualizar a data de modificação marca o índice como usado recentemente (LRU)
+            os.utime(index_path)
+            print(f"INFO: Usando índice pré-compilado da lista {os.path.basename(index_path)}", file=sys.stderr)
+        elif background:
+            start_index_build(wordlist_path, index_dir)
+            return None
+        else:
+            print(f"INFO: Gerando índice pré-compilado da lista...", file=sys.stderr)
+            count = build_index(wordlist_path, index_path)
+            print(f"INFO: Índice gerado com {count} senhas únicas", file=sys.stderr)
+
+        evict_indexes(index_dir, keep=index_path)
+        return index_path
+    except (OSError, MemoryError) as e:
+        print(f"AVISO: Não foi possível usar o índice da lista: {str(e)}", file=sys.stderr)
+        return None
+
+
+class WordlistIndex:
+    """Índice pré-compilado mapeado em memória"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, flags = INDEX_HEADER.unpack_from(self.data, 0)
+        if magic != INDEX_MAGIC:
+            self.data.close()
+            self._file.close()
+            raise ValueError(f"Índice inválido: {path}")
+
+        offsets_start = INDEX_HEADER.size
+        offsets_end = offsets_start + 8 * (self.count + 1)
+        self._view = memoryview(self.data)
+        self.offsets = self._view[offsets_start:offsets_end].cast('Q')
+
+        self.keys = None
+        keys_end = offsets_end
+        if flags & FLAG_KEYS:
+            keys_end += 12 * self.count
+            if np is not None:
+                self.keys = np.frombuffer(self.data, dtype=np.uint32, count=3 * self.count,
+                                          offset=offsets_end).reshape(self.count, 3)
+        self.blob_start = keys_end
+        # As fatias do índice são intervalos de senhas, não de bytes
+        self.size = self.count
+        self.data_size = self.offsets[self.count] if self.count else 0
+
+    def close(self):
+        self.keys = None
+        for view in (getattr(self, 'offsets', None), getattr(self, '_view', None)):
+            if view is not None:
+                view.release()
+        self.offsets = self._view = None
+        try:
+            self.data.close()
+        except BufferError:
+            # Ainda há arrays NumPy apontando para o mmap; ele é fechado quando forem coletados
+            pass
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def shards(self, shard_size):
+        """
+        Divide o índice em fatias de tamanho aproximado em bytes
+
+        Args:
+            shard_size (int): Tamanho aproximado de cada fatia em bytes de senhas
+
+        Yields:
+            tuple: (primeira senha, fim exclusivo, número de senhas)
+        """
+        step = max(1, shard_size * self.count // max(1, self.data_size))
+        for start in range(0, self.count, step):
+            end = min(start + step, self.count)
+            yield start, end, end - start
+
+    def batches(self, start, end, batch_size):
+        """
+        Divide uma fatia em lotes de senhas
+
+        Args:
+            start (int): Primeira senha da fatia
+            end (int): Fim exclusivo da fatia
+            batch_size (int): Senhas por lote
+
+        Yields:
+            tuple: (senhas, None, estado de chaves pré-calculado ou None)
+        """
+        offsets = self.offsets
+        for first in range(start, end, batch_size):
+            last = min(first + batch_size, end)
+            base = offsets[first]
+            blob = self.data[self.blob_start + base:self.blob_start + offsets[last]]
+            bounds = offsets[first:last + 1]
+            candidates = [blob[bounds[i] - base:bounds[i + 1] - base] for i in range(last - first)]
+
+            keys = None
+            if self.keys is not None:
+                block = self.keys[first:last]
+                keys = (block[:, 0], block[:, 1], block[:, 2])
+            yield candidates, None, keys
+
+
+def open_source(spec):
+    """
+    Abre a fonte de senhas descrita por prepare_source
+
+    Args:
+        spec (tuple): ('index', caminho), ('text', caminho) ou ('mask', parâmetros de Mask)
+
+    Returns:
+        Wordlist | WordlistIndex | Mask: Fonte com shards() e batches()
+    """
+    kind, path = spec
+    if kind == 'index':
+        return WordlistIndex(path)
+    if kind == 'mask':
+        return Mask(*path)
+    return Wordlist(path)
+
+
+def prepare_source(wordlist_path, use_index=True, digest=None, background=True):
+    """
+    Decide se a lista será lida pelo índice pré-compilado ou direto do texto
+
+    Args:
+        wordlist_path (str): Lista de palavras em texto
+        use_index (bool): Permitir o uso/geração do índice
+        digest (str): Hash do conteúdo já calculado (opcional)
+        background (bool): Gerar um índice ausente em segundo plano, usando o texto nesta execução
+
+    Returns:
+        tuple: Descrição da fonte para open_source (pode ser enviada aos workers)
+    """
+    index_path = prepare_index(wordlist_path, digest, background) if use_index else None
+    if index_path is not None:
+        return ('index', index_path)
+    return ('text', wordlist_path)
+
+
+def build_main(argv):
+    """Processo gerador de start_index_build: wordlist_index.py lista diretório marca"""
+    wordlist_path, index_dir, marker = argv
+    try:
+        # Prioridade baixa: o ataque em andamento continua com a CPU
+        os.nice(10)
+    except (AttributeError, OSError):
+        pass
+    try:
+        index_path = os.path.join(index_dir, wordlist_digest(wordlist_path) + INDEX_SUFFIX)
+        if not os.path.exists(index_path):
+            build_index(wordlist_path, index_path)
+        evict_indexes(index_dir, keep=index_path)
+    finally:
+        try:
+            os.remove(marker)
+        except OSError:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(build_main(sys.argv[1:]))
@@ -3,6 +3,151 @@ const path = require('path');
 const fs = require('fs');
 const readline = require('readline');
 
+// Serviço Python persistente (daemon.py), iniciado no primeiro uso e mantido
+// aberto entre os uploads para reaproveitar o interpretador e o pool de workers
+let daemon = null;
+let nextJobId = 1;
+const pendingJobs = new Map();
+
+// Versão do protocolo de eventos (events.py) e descritor usado pelo canal
+const EVENTS_VERSION = 1;
+const EVENTS_FD = 3;
+
+/**
+ * Monta o objeto de erro no mesmo formato do resultado do módulo Python
+ * @param {string} message - Mensagem de erro
+ * @returns {Object} - Resultado com success = false
+ */
+function errorResult(message) {
+  return {
+    success: false,
+    error: message,
+    executionTime: 0,
+    testedWords: 0,
+    totalWords: 0
+  };
+}
+
+/**
+ * Mantém o Node.js aberto apenas enquanto houver trabalhos aguardando o serviço
+ */
+function updateDaemonRef() {
+  if (!daemon) {
+    return;
+  }
+  const method = pendingJobs.size > 0 ? 'ref' : 'unref';
+  daemon[method]();
+  for (const stream of [daemon.stdin, daemon.stdout, daemon.stderr, daemon.stdio[EVENTS_FD]]) {
+    stream[method]();
+  }
+}
+
+/**
+ * Trata um evento JSON (um por linha) enviado pelo canal de eventos do serviço
+ * @param {string} line - Linha lida do canal de eventos
+ */
+function handleEvent(line) {
+  let message;
+  try {
+    message = JSON.parse(line);
+  } catch (parseError) {
+    console.error(`Aviso: Evento inválido do serviço Python: ${line}`);
+    return;
+  }
+
+  if (message.v !== EVENTS_VERSION) {
+    console.error(`Aviso: Versão de protocolo desconhecida do serviço Python: ${message.v}`);
+    return;
+  }
+
+  const job = pendingJobs.get(message.id);
+  if (!job) {
+    if (message.type === 'log' || message.type === 'error') {
+      console.error(`[python] ${message.level || 'ERRO'}: ${message.message || message.error}`);
+    }
+    return;
+  }
+
+  if (message.type === 'progress') {
+    if (typeof job.progressCallback === 'function') {
+      job.progressCallback(message.progress.toFixed(2), message.remainingTime.toFixed(0),
+                           message.current, message.workers);
+    }
+  } else if (message.type === 'log') {
+    console.error(`[python] ${message.level}: ${message.message}`);
+  } else if (message.type === 'result') {
+    pendingJobs.delete(message.id);
+    updateDaemonRef();
+
+    // Enviar progresso final
+    if (typeof job.progressCallback === 'function') {
+      job.progressCallback(100, 0, null, null);
+    }
+
+    job.resolve(message.result);
+  } else if (message.type === 'error') {
+    pendingJobs.delete(message.id);
+    updateDaemonRef();
+    job.reject(errorResult(`Erro no serviço Python: ${message.error}`));
+  }
+}
+
+/**
+ * Inicia o serviço Python se ele ainda não estiver em execução
+ * @returns {ChildProcess} - Processo do serviço
+ */
+function ensureDaemon() {
+  if (daemon) {
+    return daemon;
+  }
+
+  const scriptPath = path.join(__dirname, 'daemon.py');
+  if (!fs.existsSync(scriptPath)) {
+    throw errorResult(`Erro: Script Python não encontrado em ${scriptPath}`);
+  }
+
+  // Requisições vão pelo stdin; respostas e eventos chegam num descritor
+  // próprio, então nada impresso no stdout/stderr interfere no protocolo
+  const child = spawn('python3', [scriptPath, '--events-fd', String(EVENTS_FD)], {
+    cwd: __dirname,
+    stdio: ['pipe', 'pipe', 'pipe', 'pipe']
+  });
+
+  readline.createInterface({ input: child.stdio[EVENTS_FD], crlfDelay: Infinity }).on('line', handleEvent);
+
+  // Saída comum e logs do serviço (INFO, AVISO, ERRO) seguem para o console
+  for (const stream of [child.stdout, child.stderr]) {
+    readline.createInterface({ input: stream, crlfDelay: Infinity }).on('line', (line) => {
+      console.error(`[python] ${line}`);
+    });
+  }
+
+  const fail = (message) => {
+    if (daemon === child) {
+      daemon = null;
+    }
+    // Trabalhos em andamento não vão receber resposta: rejeitar todos
+    for (const job of pendingJobs.values()) {
+      job.reject(errorResult(message));
+    }
+    pendingJobs.clear();
+  };
+
+  child.on('close', (code) => {
+    fail(`Erro ao executar o módulo Python: código de saída ${code}`);
+  });
+
+  child.on('error', (error) => {
+    fail(`Erro ao executar o módulo Python: ${error.message}`);
+  });
+
+  // Um pipe quebrado é tratado pelo evento 'close'
+  child.stdin.on('error', () => {});
+
+  daemon = child;
+  return child;
+}
+
 /**
  * Função para chamar o módulo Python para quebrar a senha do ZIP
  * @param {string} zipFilePath - Caminho para o arquivo ZIP
@@ -12,113 +157,28 @@ const readline = require('readline');
  */
 function crackZip(zipFilePath, wordListPath, progressCallback = null) {
   return new Promise((resolve, reject) => {
-    // Verificar se o script Python existe
-    const scriptPath = path.join(__dirname, 'zip_cracker.py');
-    
-    if (!fs.existsSync(scriptPath)) {
-      return reject({
-        success: false,
-        error: `Erro: Script Python não encontrado em ${scriptPath}`,
-        executionTime: 0,
-        testedWords: 0,
-        totalWords: 0
-      });
-    }
-    
-    // Verificar se o Python está instalado
+    let child;
     try {
-      // Tornar o script executável
-      fs.chmodSync(scriptPath, '755');
+      child = ensureDaemon();
     } catch (error) {
-      console.error(`Aviso: Não foi possível tornar o script executável: ${error.message}`);
+      return reject(error);
     }
-    
-    // Executar o script Python
-    const process = spawn('python3', [scriptPath, zipFilePath, wordListPath]);
-    
-    let resultData = '';
-    let lastProgress = 0;
-    
-    // Configurar readline para processar a saída de erro linha por linha
-    const rl = readline.createInterface({
-      input: process.stderr,
-      crlfDelay: Infinity
-    });
-    
-    // Processar cada linha de saída
-    rl.on('line', (line) => {
-      // Verificar se é uma linha de progresso
-      if (line.includes('Progresso:') && typeof progressCallback === 'function') {
-        // Extrair informações de progresso
-        const progressMatch = line.match(/Progresso: ([\d.]+)%/);
-        const timeMatch = line.match(/Tempo restante: ([\d.]+)s/);
-        const threadsMatch = line.match(/Threads: (\d+)/);
-        const wordMatch = line.match(/Tentando: (.+)$/);
-        
-        if (progressMatch && timeMatch && wordMatch) {
-          const progress = parseFloat(progressMatch[1]);
-          const remainingTime = parseFloat(timeMatch[1]);
-          const currentWord = wordMatch[1].trim();
-          const threadCount = threadsMatch ? parseInt(threadsMatch[1]) : 1;
-          
-          // Sempre atualizar
-          progressCallback(progress.toFixed(2), remainingTime.toFixed(0), currentWord, threadCount);
-          lastProgress = progress;
-        }
-      }
-    });
-    
-    // Capturar saída padrão (onde o JSON final é escrito)
-    process.stdout.on('data', (data) => {
-      resultData += data.toString();
-    });
-    
-    // Quando o processo terminar
-    process.on('close', (code) => {
-      if (code !== 0) {
-        return reject({
-          success: false,
-          error: `Erro ao executar o módulo Python: código de saída ${code}`,
-          executionTime: 0,
-          testedWords: 0,
-          totalWords: 0
-        });
-      }
-      
-      try {
-        // Tentar analisar a saída como JSON
-        const result = JSON.parse(resultData);
-        
-        // Enviar progresso final
-        if (typeof progressCallback === 'function') {
-          progressCallback(100, 0, null, null);
-        }
-        
-        resolve(result);
-      } catch (parseError) {
-        reject({
-          success: false,
-          error: `Erro ao processar resultado do módulo Python: ${parseError.message}`,
-          executionTime: 0,
-          testedWords: 0,
-          totalWords: 0
-        });
+
+    const id = nextJobId++;
+    pendingJobs.set(id, { resolve, reject, progressCallback });
+    updateDaemonRef();
+
+    child.stdin.write(JSON.stringify({
+      id,
+      method: 'crack',
+      params: {
+        zipPath: path.resolve(zipFilePath),
+        wordlistPath: path.resolve(wordListPath)
       }
-    });
-    
-    // Tratar erros de execução
-    process.on('error', (error) => {
-      reject({
-        success: false,
-        error: `Erro ao executar o módulo Python: ${error.message}`,
-        executionTime: 0,
-        testedWords: 0,
-        totalWords: 0
-      });
-    });
+    }) + '\n');
   });
 }
 
 module.exports = {
   crackZip
-}; 
\ No newline at end of file
+};
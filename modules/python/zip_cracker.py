@@ -3,107 +3,59 @@ import sys
 import time
 import json
 import zipfile
-import subprocess
+import zlib
 import os
 import threading
 import queue
 import multiprocessing
+import itertools
+import argparse
+import signal
 from datetime import datetime
 
+from verifiers import open_verifier
+from external import ExternalPool, probe_tools
+from blocks import BlockSizer, iter_blocks, BLOCKS_PER_WORKER
+from zipcrypto import entry_cost, VERIFY_CHUNK_SIZE
+from archive_set import ArchiveSet
+from process_pool import ProcessPool
+from wordlist import ShardPlanner, shard_size_for, MAX_SHARD_SIZE
+from wordlist_index import prepare_source, open_source, KeyspaceDigest
+from checkpoint import Checkpoint, checkpoint_path, archive_fingerprint
+from result_cache import ResultCache
+from rules import RuleSet, load_rules, rules_digest
+from mask import Mask
+from events import EventChannel, LogForwarder, RateMeter
+from instrumentation import StageStats, merge_stats, run_profiled, PROFILERS
+
+# Motores de execução aceitos por crack_zip
+ENGINES = ('auto', 'processes', 'threads', 'external')
+
+# Pasta padrão dos perfis gravados com --profile
+DEFAULT_PROFILE_DIR = '.profiles'
+
+# Fatias de máscara em andamento por worker (o espaço de busca não é enfileirado de uma vez)
+MASK_PENDING_SHARDS = 4
+
 # Global variables
 found_password = None
 found_lock = threading.Lock()
 stop_threads = threading.Event()
 tested_words_counter = 0
-counter_lock = threading.Lock()
 active_threads = 0
 threads_lock = threading.Lock()
 
-def test_7z_password(zip_path, password):
-    """
-    Testa se uma senha funciona para um arquivo ZIP usando 7z
-    
-    Args:
-        zip_path (str): Caminho para o arquivo ZIP
-        password (str): Senha a ser testada
-        
-    Returns:
-        bool: True se a senha funcionar, False caso contrário
-    """
-    try:
-        # Comando 7z para testar senha
-        command = ['7z', 't', '-p' + password, zip_path]
-        
-        # Executar o comando e suprimindo saída
-        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        
-        # Verificar o código de retorno (0 = sucesso)
-        return result.returncode == 0
-    except Exception as e:
-        print(f"ERRO ao testar senha com 7z: {str(e)}", file=sys.stderr)
-        return False
-
-def test_unzip_password(zip_path, password):
+def test_zipfile_password(zip_path, password):
     """
-    Testa se uma senha funciona para um arquivo ZIP usando unzip
+    Testa se uma senha funciona para um arquivo ZIP usando o módulo zipfile nativo
     
     Args:
         zip_path (str): Caminho para o arquivo ZIP
-        password (str): Senha a ser testada
+        password (str | bytes): Senha a ser testada
         
     Returns:
-        bool: True se a senha funcionar, False caso contrário
+        bool: True se a senha funcionar, False se for recusada, None se não foi possível testar
     """
-    try:
-        # Escapa a senha para uso em shell
-        escaped_password = password.replace('"', '\\"')
-        
-        # Comando unzip para testar senha (-t apenas testa)
-        command = f'unzip -P "{escaped_password}" -t "{zip_path}" > /dev/null 2>&1'
-        
-        # Executar o comando
-        return subprocess.call(command, shell=True) == 0
-    except Exception as e:
-        print(f"ERRO ao testar senha com unzip: {str(e)}", file=sys.stderr)
-        return False
-
-def test_zip_password(zip_path, password):
-    """
-    Testa se uma senha funciona para um arquivo ZIP
-    Tenta primeiro com 7z, depois com unzip, e finalmente com zipfile nativo
-    
-    Args:
-        zip_path (str): Caminho para o arquivo ZIP
-        password (str): Senha a ser testada
-        
-    Returns:
-        bool: True se a senha funcionar, False caso contrário
-    """
-    # Primeiro tenta com 7z (se disponível)
-    try:
-        # Verificar se 7z está disponível
-        subprocess.run(['which', '7z'], stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
-        
-        # Testar com 7z
-        if test_7z_password(zip_path, password):
-            print(f"INFO: Senha correta encontrada com 7z: '{password}'", file=sys.stderr)
-            return True
-    except:
-        print("AVISO: 7z não está disponível, tentando unzip", file=sys.stderr)
-    
-    # Depois tenta com unzip (se disponível)
-    try:
-        # Verificar se unzip está disponível
-        subprocess.run(['which', 'unzip'], stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
-        
-        # Testar com unzip
-        if test_unzip_password(zip_path, password):
-            print(f"INFO: Senha correta encontrada com unzip: '{password}'", file=sys.stderr)
-            return True
-    except:
-        print("AVISO: unzip não está disponível, tentando módulo zipfile", file=sys.stderr)
-    
-    # Por último, tenta com o módulo zipfile nativo
     try:
         # Converte a senha para bytes se for string
         if isinstance(password, str):
@@ -126,7 +78,7 @@ def test_zip_password(zip_path, password):
                 # Se nenhuma codificação funcionar
                 if pwd_bytes is None:
                     print(f"ERRO: Não foi possível codificar a senha '{password}'", file=sys.stderr)
-                    return False
+                    return None
         else:
             pwd_bytes = password
             
@@ -139,56 +91,111 @@ def test_zip_password(zip_path, password):
                 print(f"INFO: Arquivo ZIP não está protegido por senha", file=sys.stderr)
                 return True
                 
-            # Tenta extrair o primeiro arquivo criptografado
-            for zip_info in encrypted_files:
-                try:
-                    zf.read(zip_info.filename, pwd=pwd_bytes)
-                    # Se chegou aqui, a senha está correta
-                    print(f"INFO: Senha correta encontrada com zipfile: '{password}'", file=sys.stderr)
-                    return True
-                except RuntimeError as e:
-                    # Senha incorreta
-                    if "Bad password" in str(e) or "incorrect password" in str(e).lower():
-                        return False
-                    # Outro erro de runtime
-                    raise
-                    
-            return False
+            # Extrair a entrada mais barata (menor, com método conhecido) lendo em
+            # blocos, sem carregar o arquivo inteiro na memória a cada tentativa
+            zip_info = min(encrypted_files, key=entry_cost)
+            try:
+                with zf.open(zip_info, pwd=pwd_bytes) as member:
+                    while member.read(VERIFY_CHUNK_SIZE):
+                        pass
+                # Se chegou aqui, a senha está correta
+                print(f"INFO: Senha correta encontrada com zipfile: '{os.fsdecode(password)}'", file=sys.stderr)
+                return True
+            except RuntimeError as e:
+                # Senha incorreta
+                if "Bad password" in str(e) or "incorrect password" in str(e).lower():
+                    return False
+                # Outro erro de runtime
+                raise
+            except (zlib.error, EOFError):
+                # A senha passou pelo byte de verificação mas os dados não descomprimem
+                return False
                 
     except zipfile.BadZipFile:
         print(f"ERRO: Arquivo ZIP inválido", file=sys.stderr)
     except Exception as e:
         print(f"ERRO ao testar senha com zipfile: {str(e)}", file=sys.stderr)
         
-    return False
+    # Erro ao testar: a senha não foi nem aceita nem recusada
+    return None
 
-def count_lines(file_path):
+def test_zip_password(zip_path, password):
     """
-    Conta o número de linhas em um arquivo
+    Testa se uma senha funciona para um arquivo ZIP
+    Tenta as ferramentas externas encontradas no PATH (7z, unzip) e, se nenhuma
+    concluir, o módulo zipfile nativo. Para muitas senhas, use ExternalPool.
     
     Args:
-        file_path (str): Caminho para o arquivo
+        zip_path (str): Caminho para o arquivo ZIP
+        password (str | bytes): Senha a ser testada
         
     Returns:
-        int: Número de linhas
+        bool: True se a senha funcionar, False caso contrário
     """
-    try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            return sum(1 for _ in f)
-    except Exception as e:
-        print(f"ERRO ao contar linhas: {str(e)}", file=sys.stderr)
-        return 0
+    # surrogateescape preserva os bytes originais nos argumentos dos processos externos
+    pwd_bytes = os.fsencode(password)
+    for tool in probe_tools():
+        matched = tool.test(zip_path, pwd_bytes)
+        if matched:
+            print(f"INFO: Senha correta encontrada com {tool.name}: '{password}'", file=sys.stderr)
+            return True
+        if matched is False:
+            return False
+    
+    return bool(test_zipfile_password(zip_path, password))
+
+def test_block(block, verifier, stats, external):
+    """
+    Testa um bloco de senhas
+    
+    Args:
+        block (list): Senhas (bytes) do bloco
+        verifier (ZipCryptoVerifier | AesVerifier): Verificador em processo (None usa as ferramentas externas)
+        stats (StageStats): Contadores de tempo das etapas desta thread
+        external (ExternalPool): Pool das ferramentas externas (criado por crack_zip sempre que não há verificador)
+        
+    Returns:
+        tuple: (senhas testadas, senha correta ou None)
+    """
+    # Em processo: o bloco inteiro de uma vez (vetorizado com NumPy no ZipCrypto)
+    if verifier is not None:
+        hits = verifier.check_batch(block, None, stats)
+        if hits:
+            return hits[0] + 1, block[hits[0]]
+        return len(block), None
+    
+    # Ferramentas externas: uma senha por vez, parando assim que outra thread acertar
+    for i, password in enumerate(block):
+        if stop_threads.is_set():
+            return i, None
+        verify_start = time.perf_counter()
+        matched = external.check(password)
+        if not matched and external.cancelled:
+            # Teste interrompido pelo acerto de outra thread: a senha não foi testada
+            return i, None
+        stats.add('verify', time.perf_counter() - verify_start)
+        if matched:
+            return i + 1, password
+    return len(block), None
 
-def password_test_worker(zip_path, password_queue, progress_callback=None):
+def password_test_worker(zip_path, block_queue, worker_id, counters, sizer, verifier=None, stats=None, external=None):
     """
     Worker thread para testar senhas
     
     Args:
         zip_path (str): Caminho para o arquivo ZIP
-        password_queue (Queue): Fila de senhas para testar
-        progress_callback (callable): Função de callback para atualizar o progresso
+        block_queue (Queue): Fila de blocos de senhas (listas de bytes) para testar
+        worker_id (int): Índice da thread em counters
+        counters (list): Senhas testadas por thread (cada thread só escreve na sua posição)
+        sizer (BlockSizer): Recebe o custo medido de cada bloco para ajustar o tamanho dos próximos
+        verifier (ZipCryptoVerifier | AesVerifier): Verificador em processo (None usa as ferramentas externas)
+        stats (StageStats): Contadores de tempo das etapas desta thread (opcional)
+        external (ExternalPool): Pool das ferramentas externas, compartilhado entre as threads
     """
-    global found_password, tested_words_counter, active_threads
+    global found_password, active_threads
+    
+    if stats is None:
+        stats = StageStats()
     
     # Incrementar contador de threads ativas
     with threads_lock:
@@ -200,33 +207,35 @@ def password_test_worker(zip_path, password_queue, progress_callback=None):
     try:
         while not stop_threads.is_set():
             try:
-                # Pegar próxima senha da fila (timeout para verificar o sinal de parada)
-                password = password_queue.get(timeout=0.1)
-                
-                # Incrementar contador de palavras testadas
-                with counter_lock:
-                    tested_words_counter += 1
-                
+                # Pegar o próximo bloco da fila (timeout para verificar o sinal de parada)
+                wait_start = time.perf_counter()
+                try:
+                    block = block_queue.get(timeout=0.1)
+                finally:
+                    stats.add('dequeue_wait', time.perf_counter() - wait_start)
+            except queue.Empty:
+                # Fila vazia, verificar se é para parar
+                continue
+            
+            try:
                 # Se já encontrou a senha, não precisa testar mais
                 if found_password is not None:
-                    password_queue.task_done()
                     continue
                 
-                # Testar senha
-                if test_zip_password(zip_path, password):
+                test_start = time.perf_counter()
+                tested, password = test_block(block, verifier, stats, external)
+                sizer.record(tested, time.perf_counter() - test_start)
+                counters[worker_id] += tested
+                
+                if password is not None:
                     # Encontrou a senha, marcar e parar as threads
                     with found_lock:
                         if found_password is None:  # Evitar sobrescrever se outra thread já encontrou
-                            found_password = password
-                            print(f"SUCESSO: Thread encontrou a senha: '{password}'", file=sys.stderr)
+                            found_password = password.decode('utf-8', errors='replace')
+                            print(f"SUCESSO: Thread encontrou a senha: '{found_password}'", file=sys.stderr)
                             stop_threads.set()
-                
-                password_queue.task_done()
-                
-            except queue.Empty:
-                # Fila vazia, verificar se é para parar
-                if stop_threads.is_set():
-                    break
+            finally:
+                block_queue.task_done()
     finally:
         # Decrementar contador de threads ativas
         with threads_lock:
@@ -235,19 +244,537 @@ def password_test_worker(zip_path, password_queue, progress_callback=None):
         
         print(f"INFO: Thread finalizada. Total de threads ativas: {current_active}", file=sys.stderr)
 
-def crack_zip(zip_path, wordlist_path):
+def estimate_progress(tested, total_words, start_time):
     """
-    Tenta quebrar a senha de um arquivo ZIP usando ataque de dicionário com múltiplas threads
+    Calcula o percentual concluído e o tempo restante estimado
+    
+    Args:
+        tested (int): Senhas testadas até agora
+        total_words (int): Total de senhas na lista
+        start_time (float): Início da execução
+        
+    Returns:
+        tuple: (percentual, segundos restantes)
+    """
+    progress = (tested / total_words) * 100 if total_words > 0 else 0
+    total_elapsed_time = time.time() - start_time
+    
+    # Evitar divisão por zero
+    if progress > 0:
+        remaining_time = (total_elapsed_time / progress) * 100 - total_elapsed_time
+    else:
+        remaining_time = 0
+    return progress, remaining_time
+
+def progress_snapshot(tested, total_words, start_time, workers, password, worker_rates=None, queue_depth=None):
+    """
+    Monta o retrato de progresso enviado pelo canal de eventos
+    
+    Args:
+        tested (int): Senhas testadas até agora
+        total_words (int): Total de senhas na lista
+        start_time (float): Início da execução
+        workers (int): Threads ou processos ativos
+        password (str): Última senha testada
+        worker_rates (list): Senhas por segundo de cada worker (opcional)
+        queue_depth (int): Fatias ou senhas aguardando os workers (opcional)
+        
+    Returns:
+        dict: Campos do evento de progresso
+    """
+    progress, remaining_time = estimate_progress(tested, total_words, start_time)
+    if worker_rates:
+        rate = sum(worker_rates)
+    else:
+        rate = tested / max(time.time() - start_time, 1e-6)
+    snapshot = {
+        "progress": round(progress, 2),
+        "remainingTime": round(remaining_time, 2),
+        "tested": tested,
+        "total": total_words,
+        "rate": round(rate),
+        "workers": workers,
+        "queueDepth": queue_depth,
+        "current": password
+    }
+    if worker_rates is not None:
+        snapshot["workerRates"] = [round(r) for r in worker_rates]
+    return snapshot
+
+def print_progress(tested, total_words, start_time, workers, password, events=None, worker_rates=None, queue_depth=None):
+    """
+    Publica o progresso: evento JSON no canal de eventos ou linha legível no stderr
+    
+    Args:
+        tested (int): Senhas testadas até agora
+        total_words (int): Total de senhas na lista
+        start_time (float): Início da execução
+        workers (int): Threads ou processos ativos
+        password (str): Senha sendo enviada no momento
+        events (EventChannel): Canal de eventos (None imprime a linha "Progresso:")
+        worker_rates (list): Senhas por segundo de cada worker (opcional)
+        queue_depth (int): Fatias ou senhas aguardando os workers (opcional)
+    """
+    if events is not None:
+        # O canal coalesce os retratos: chamadas frequentes não viram escrita a cada vez
+        events.progress(progress_snapshot(tested, total_words, start_time, workers, password,
+                                          worker_rates, queue_depth))
+        return
+    progress, remaining_time = estimate_progress(tested, total_words, start_time)
+    print(f"Progresso: {progress:.2f}%, Tempo restante: {remaining_time:.2f}s, Testadas: {tested}, Threads: {workers}, Tentando: {password}", 
+          file=sys.stderr, flush=True)
+
+def crack_zip_processes(zip_path, source_spec, start_time, batch_size, num_workers=None, checkpoint=None, rules=None,
+                        events=None, profile=None):
+    """
+    Executa o ataque de dicionário com um pool de processos
+    
+    O processo principal apenas divide a lista em fatias; cada worker abre o
+    arquivo ZIP e a lista (ou seu índice) uma vez, lê as senhas da própria
+    fatia e reporta contagens e acerto por memória compartilhada.
+    
+    Args:
+        zip_path (str | tuple): Caminho para o arquivo ZIP, ou tupla de caminhos
+            para testar vários arquivos na mesma passada (resultado por arquivo)
+        source_spec (tuple): Fonte de senhas (ver wordlist_index.prepare_source)
+        start_time (float): Início da execução
+        batch_size (int): Senhas por lote enviado ao verificador
+        num_workers (int): Número de processos (padrão: núcleos físicos)
+        checkpoint (Checkpoint): Checkpoint a atualizar; fatias já concluídas nele são puladas
+        rules (list): Regras de transformação aplicadas a cada palavra (opcional)
+        events (EventChannel): Canal de eventos estruturados (opcional)
+        profile (tuple): (profiler, pasta) para perfilar cada worker (opcional)
+        
+    Returns:
+        dict: Resultado no mesmo formato de crack_zip (ou de crack_archives)
+    """
+    pool = ProcessPool(zip_path, source_spec, batch_size, num_workers, rules, profile)
+    meter = RateMeter()
+    # Cada regra gera exatamente uma candidata por palavra
+    multiplier = len(rules) if rules else 1
+    state = pool.state
+    print(f"INFO: Usando {pool.num_workers} processos para processamento paralelo", file=sys.stderr)
+    
+    archives = zip_path if isinstance(zip_path, tuple) else None
+    # Arquivo -> (tempo em ms, senhas testadas) no momento em que foi resolvido
+    solved_at = {}
+    
+    def report_solved():
+        # Anunciar os arquivos resolvidos desde a última verificação
+        for archive, path in enumerate(archives or ()):
+            if archive in solved_at or not state.is_solved(archive):
+                continue
+            solved_at[archive] = (int((time.time() - start_time) * 1000),
+                                  planner.skipped_lines * multiplier + state.tested())
+            password = state.found_password(archive).decode('utf-8', errors='replace')
+            if events is not None:
+                events.hit(password, path)
+            else:
+                print(f"SUCESSO: Senha de {path} encontrada: '{password}'", file=sys.stderr)
+    
+    error = None
+    exhausted = False
+    with open_source(source_spec) as source:
+        if checkpoint is not None and checkpoint.shard_size:
+            # As fatias precisam ser as mesmas da execução anterior
+            shard_size = checkpoint.shard_size
+        else:
+            shard_size = shard_size_for(source.data_size, pool.num_workers, batch_size)
+        skip = None
+        if checkpoint is not None:
+            checkpoint.shard_size = shard_size
+            skip = checkpoint.is_done
+        # O espaço de uma máscara pode ser enorme: só manter algumas fatias na fila por worker
+        max_pending = pool.num_workers * MASK_PENDING_SHARDS if source_spec[0] == 'mask' else None
+        planner = ShardPlanner(source, pool.submit, shard_size, skip, max_pending)
+        
+        def collect_completed():
+            # Registrar no checkpoint as fatias que os workers concluíram
+            for start, end in pool.completed_shards():
+                lines = planner.shard_lines.pop(start, 0)
+                if checkpoint is not None:
+                    checkpoint.add(start, end, lines * multiplier)
+        
+        pool.start()
+        planner.start()
+        
+        try:
+            # Acompanhar o progresso até a senha aparecer ou os workers terminarem
+            finished = False
+            while pool.active_workers() and not state.is_found():
+                if planner.error is not None:
+                    raise planner.error
+                if planner.done and not finished:
+                    print(f"INFO: Total de {planner.total_lines} palavras na lista ({planner.total_lines * multiplier} candidatas)", file=sys.stderr)
+                    pool.finish()
+                    finished = True
+                time.sleep(0.1)
+                collect_completed()
+                pool.collect_stats()
+                report_solved()
+                if checkpoint is not None:
+                    checkpoint.save_if_due()
+                current = state.current_password().decode('utf-8', errors='replace')
+                print_progress(planner.skipped_lines * multiplier + state.tested(), planner.estimated_total() * multiplier, start_time,
+                               pool.active_workers(), current, events, meter.update(state.counters), len(planner.shard_lines))
+            
+            collect_completed()
+            report_solved()
+            exhausted = planner.done and planner.error is None and not planner.shard_lines
+        except Exception as e:
+            print(f"ERRO ao processar lista de palavras: {str(e)}", file=sys.stderr)
+            error = str(e)
+        finally:
+            planner.stop()
+            pool.stop(drain=collect_completed)
+            planner.join()
+            
+            if checkpoint is not None:
+                if state.found_password() is not None or exhausted:
+                    checkpoint.remove()
+                else:
+                    # Execução interrompida: guardar o progresso para --resume
+                    checkpoint.save()
+        
+        total_words = planner.estimated_total() * multiplier
+    
+    if archives is not None:
+        report_solved()
+        tested = planner.skipped_lines * multiplier + state.tested()
+        if events is None:
+            print(f"Progresso: 100%, Tempo restante: 0s, Testadas: {tested}, Threads: 0, "
+                  f"Resolvidos: {len(solved_at)} de {len(archives)}", file=sys.stderr, flush=True)
+        results = []
+        for archive, path in enumerate(archives):
+            found = state.found_password(archive)
+            execution_time, tested_at = solved_at.get(archive, (None, None))
+            results.append({
+                "zipPath": path,
+                "success": found is not None,
+                "password": found.decode('utf-8', errors='replace') if found is not None else None,
+                "executionTime": execution_time,
+                "testedWords": tested_at
+            })
+        result = {
+            "success": len(solved_at) == len(archives),
+            "solved": len(solved_at),
+            "executionTime": int((time.time() - start_time) * 1000),
+            "testedWords": tested,
+            "totalWords": total_words,
+            "threadsUsed": pool.num_workers,
+            "stages": pool.stats.to_dict(),
+            "archives": results
+        }
+        if error is not None:
+            result["error"] = error
+        return result
+    
+    found = state.found_password()
+    found_password = found.decode('utf-8', errors='replace') if found is not None else None
+    tested = planner.skipped_lines * multiplier + state.tested()
+    
+    if events is not None:
+        # Retrato final: sai antes do acerto e do resultado, que encerram o progresso
+        print_progress(tested, total_words, start_time, 0, found_password or '', events)
+        if found_password is not None:
+            events.hit(found_password)
+    else:
+        print(f"Progresso: 100%, Tempo restante: 0s, Testadas: {tested}, Threads: 0, Senha: {found_password or 'Não encontrada'}", 
+              file=sys.stderr, flush=True)
+    
+    result = {
+        "success": found_password is not None,
+        "password": found_password,
+        "executionTime": int((time.time() - start_time) * 1000),
+        "testedWords": tested,
+        "totalWords": total_words,
+        "threadsUsed": pool.num_workers,
+        "stages": pool.stats.to_dict()
+    }
+    if error is not None and found_password is None:
+        result["error"] = error
+    return result
+
+def cache_prepass(cache, fingerprint, zip_path, verifier):
+    """
+    Testa a senha já registrada para o arquivo e, depois, as encontradas recentemente
+    
+    Args:
+        cache (ResultCache): Cache de resultados
+        fingerprint (str): Impressão digital do arquivo
+        zip_path (str): Caminho para o arquivo ZIP
+        verifier (ZipCryptoVerifier | AesVerifier): Verificador em processo (None usa as ferramentas externas)
+        
+    Returns:
+        tuple: (senha em bytes, origem 'cache' ou 'known', senhas testadas), ou None
+    """
+    stored = cache.password(fingerprint)
+    known = [p for p in cache.known_passwords() if p != stored]
+    if verifier is not None and not verifier.confirmable:
+        # Senhas de outros arquivos passariam só pelo byte de verificação (1 em 256)
+        known = []
+    groups = (('cache', [stored] if stored is not None else []), ('known', known))
+    tested = 0
+    for origin, passwords in groups:
+        if not passwords:
+            continue
+        if verifier is not None:
+            hits = verifier.check_batch(passwords)
+            index = hits[0] if hits else None
+        else:
+            index = next((i for i, password in enumerate(passwords) if test_zip_password(zip_path, password)), None)
+        if index is not None:
+            return passwords[index], origin, tested + index + 1
+        tested += len(passwords)
+    return None
+
+def flag_unconfirmed(result, verifier):
+    """
+    Marca no resultado um acerto que o verificador não tinha como confirmar
+    
+    Com todas as entradas criptografadas vazias, qualquer senha que passe pelo
+    byte de verificação é aceita: ela abre o arquivo, mas pode não ser a original.
+    
+    Args:
+        result (dict): Resultado da execução
+        verifier (ZipCryptoVerifier | AesVerifier): Verificador em processo (None: ferramentas externas)
+        
+    Returns:
+        bool: True se o acerto não foi confirmado ("unconfirmed" no resultado)
+    """
+    if not result.get("success") or verifier is None or verifier.confirmable:
+        return False
+    result["unconfirmed"] = True
+    print(f"AVISO: Todas as entradas criptografadas estão vazias; a senha encontrada só passou pelo "
+          f"byte de verificação e pode não ser a original", file=sys.stderr)
+    return True
+
+def cache_result(start_time, password=None, origin='exhausted', tested=0):
+    """
+    Monta o resultado de uma execução respondida pelo cache, sem ataque
+    
+    Args:
+        start_time (float): Início da execução
+        password (str): Senha encontrada (None quando o espaço de busca já estava esgotado)
+        origin (str): 'cache' (senha registrada para o arquivo), 'known' (senha de outro
+            arquivo) ou 'exhausted' (lista já testada inteira contra o arquivo)
+        tested (int): Senhas testadas na pré-passada
+        
+    Returns:
+        dict: Resultado no formato de crack_zip, com a origem em "cache"
+    """
+    return {
+        "success": password is not None,
+        "password": password,
+        "executionTime": int((time.time() - start_time) * 1000),
+        "testedWords": tested,
+        "totalWords": tested,
+        "threadsUsed": 0,
+        "cache": origin
+    }
+
+def open_checkpoint(zip_path, keyspace, source_spec, resume, wordlist_path=None, path=None):
+    """
+    Carrega o checkpoint a retomar ou cria um novo para a execução
+    
+    Os intervalos do checkpoint são posições na fonte usada quando ele foi
+    gravado (bytes do texto ou senhas do índice). Ao retomar, a execução volta
+    a usar essa fonte, mesmo que o índice tenha ficado pronto desde então.
     
     Args:
         zip_path (str): Caminho para o arquivo ZIP
+        keyspace (KeyspaceDigest): Espaço de busca (lista e regras, ou máscara)
+        source_spec (tuple): Fonte de senhas escolhida para esta execução (ver prepare_source)
+        resume (bool): Tentar retomar uma execução anterior
+        wordlist_path (str): Lista de palavras em texto (para voltar à fonte do checkpoint)
+        path (str): Caminho do checkpoint (padrão: ao lado do ZIP, ver checkpoint_path)
+        
+    Returns:
+        tuple: (Checkpoint da execução, fonte de senhas a usar)
+    """
+    path = path or checkpoint_path(zip_path)
+    archive = archive_fingerprint(zip_path)
+    
+    if resume:
+        checkpoint = Checkpoint.load(path)
+        if checkpoint is not None and checkpoint.matches(archive, keyspace):
+            resumed_spec = checkpoint_source(checkpoint.source_kind, source_spec, wordlist_path)
+            if resumed_spec is not None:
+                print(f"INFO: Retomando do checkpoint ({checkpoint.tested} palavras já testadas)", file=sys.stderr)
+                return checkpoint, resumed_spec
+        print(f"AVISO: Nenhum checkpoint compatível encontrado, começando do início", file=sys.stderr)
+    
+    return Checkpoint(path, archive, keyspace, source_spec[0], None), source_spec
+
+def checkpoint_source(source_kind, source_spec, wordlist_path):
+    """
+    Fonte de senhas em que os intervalos de um checkpoint foram gravados
+    
+    Args:
+        source_kind (str): Tipo da fonte registrado no checkpoint
+        source_spec (tuple): Fonte escolhida para esta execução
+        wordlist_path (str): Lista de palavras em texto
+        
+    Returns:
+        tuple: Fonte para open_source, ou None se a do checkpoint não estiver disponível
+    """
+    if source_kind == source_spec[0]:
+        return source_spec
+    if wordlist_path is None:
+        return None
+    if source_kind == 'text':
+        # O índice ficou pronto depois do checkpoint: continuar pelo texto
+        print(f"INFO: Checkpoint gravado sobre o texto da lista, continuando pelo texto", file=sys.stderr)
+        return ('text', wordlist_path)
+    if source_kind == 'index':
+        # O índice do checkpoint foi removido ou ainda não foi usado aqui: gerar agora
+        spec = prepare_source(wordlist_path, background=False)
+        return spec if spec[0] == 'index' else None
+    return None
+
+def prepare_keyspace(wordlist_path=None, rules_path=None, mask=None, charsets=(), min_length=None, max_length=None):
+    """
+    Monta o espaço de busca: máscara, ou lista de palavras com regras opcionais
+    
+    A máscara é validada e as regras compiladas uma vez aqui, antes de iniciar os
+    workers; a lista é indexada na primeira vez que é usada.
+    
+    Args:
         wordlist_path (str): Caminho para o arquivo de lista de palavras
+        rules_path (str): Arquivo de regras de transformação (opcional)
+        mask (str): Máscara de força bruta, usada no lugar da lista
+        charsets (tuple): Conjuntos personalizados ?1 a ?4 da máscara
+        min_length (int): Menor comprimento testado com a máscara
+        max_length (int): Maior comprimento testado com a máscara
+        
+    Returns:
+        tuple: (fonte para open_source, regras ou None, KeyspaceDigest do espaço de busca)
+        
+    Raises:
+        OSError: Lista ou arquivo de regras inacessível
+        ValueError: Máscara, regras ou combinação de opções inválida
+    """
+    if mask is not None:
+        if rules_path:
+            raise ValueError("Regras de transformação não se aplicam ao modo máscara")
+        mask_source = Mask(mask, charsets, min_length, max_length)
+        print(f"INFO: Máscara com {mask_source.count} candidatas "
+              f"(comprimento {mask_source.min_length} a {mask_source.max_length})", file=sys.stderr)
+        # Na máscara cada candidata é um índice: não há lista a ler nem indexar
+        return mask_source.spec(), None, KeyspaceDigest(fixed=mask_source.digest())
+    
+    rules = None
+    if rules_path:
+        rules = load_rules(rules_path)
+        if not rules:
+            raise ValueError(f"Nenhuma regra válida em {rules_path}")
+        print(f"INFO: {len(rules)} regras de transformação carregadas de {rules_path}", file=sys.stderr)
+    
+    # O espaço de busca é a lista combinada com as regras; o hash da lista só é
+    # usado se já foi calculado (o gerador do índice o calcula em segundo plano)
+    keyspace = KeyspaceDigest(wordlist_path, f"+{rules_digest(rules)}" if rules else '')
+    # Usar o índice pré-compilado da lista quando possível (gerado na primeira vez)
+    source_spec = prepare_source(wordlist_path, digest=keyspace.content_digest())
+    return source_spec, rules, keyspace
+
+def crack_archives(zip_paths, wordlist_path=None, engine='auto', rules_path=None, mask=None, charsets=(),
+                   min_length=None, max_length=None, events=None, num_workers=None, profile=None):
+    """
+    Tenta quebrar as senhas de vários arquivos ZIP numa única passada pela lista
+    
+    Cada candidata é lida, transformada e tem o key schedule calculado uma vez
+    só, e é testada contra todos os arquivos ainda não resolvidos; o ataque
+    termina quando todos forem resolvidos ou o espaço de busca acabar. Usa
+    sempre o pool de processos, então todos os arquivos precisam de um
+    verificador em processo (ZipCrypto ou AES); não há checkpoint neste modo.
+    
+    Args:
+        zip_paths (list): Caminhos dos arquivos ZIP
+        wordlist_path (str): Caminho para o arquivo de lista de palavras
+        engine (str): 'auto' ou 'processes' (os outros motores não suportam vários arquivos)
+        rules_path (str): Arquivo de regras de transformação aplicadas a cada palavra (opcional)
+        mask (str): Máscara de força bruta, usada no lugar da lista
+        charsets (tuple): Conjuntos personalizados ?1 a ?4 da máscara
+        min_length (int): Menor comprimento testado com a máscara
+        max_length (int): Maior comprimento testado com a máscara
+        events (EventChannel): Canal de eventos estruturados (um evento hit por arquivo)
+        num_workers (int): Número de processos (padrão: núcleos físicos)
+        profile (tuple): (profiler, pasta) para perfilar cada worker (opcional)
+        
+    Returns:
+        dict: Resultado agregado (sucesso quando todos foram resolvidos) com a
+            lista "archives": senha, tempo e senhas testadas até o acerto de cada arquivo
+    """
+    start_time = time.time()
+    zip_paths = tuple(zip_paths)
+    
+    def failure(message):
+        print(f"ERRO: {message}", file=sys.stderr)
+        return {
+            "success": False,
+            "error": message,
+            "executionTime": int((time.time() - start_time) * 1000),
+            "testedWords": 0,
+            "totalWords": 0,
+            "threadsUsed": 0,
+            "archives": [{"zipPath": path, "success": False, "password": None,
+                          "executionTime": None, "testedWords": None} for path in zip_paths]
+        }
+    
+    source_name = f"máscara {mask}" if mask is not None else f"lista {wordlist_path}"
+    print(f"INFO: Iniciando quebra de senha para {len(zip_paths)} arquivos usando {source_name}", file=sys.stderr)
+    if engine not in ('auto', 'processes'):
+        return failure(f"Motor {engine} não suporta vários arquivos; use o motor de processos")
+    
+    try:
+        archive_set = ArchiveSet.from_zips(zip_paths)
+    except Exception as e:
+        return failure(f"Erro ao verificar arquivo ZIP: {str(e)}")
+    print(f"INFO: Usando verificadores em processo ({archive_set.count('ZipCrypto')} ZipCrypto, "
+          f"{archive_set.count('WinZip AES')} AES, {len(archive_set.entries)} entradas criptografadas)", file=sys.stderr)
+    
+    try:
+        source_spec, rules, _ = prepare_keyspace(wordlist_path, rules_path, mask, charsets, min_length, max_length)
+    except (OSError, ValueError) as e:
+        return failure(f"Erro ao preparar o ataque: {str(e)}")
+    
+    return crack_zip_processes(zip_paths, source_spec, start_time, archive_set.batch_size, num_workers,
+                               rules=rules, events=events, profile=profile)
+
+def crack_zip(zip_path, wordlist_path=None, engine='auto', resume=False, rules_path=None,
+              mask=None, charsets=(), min_length=None, max_length=None, events=None, num_workers=None,
+              profile=None, use_cache=True):
+    """
+    Tenta quebrar a senha de um arquivo ZIP usando ataque de dicionário com múltiplas threads
+    
+    Args:
+        zip_path (str | list): Caminho para o arquivo ZIP; uma lista de caminhos
+            testa todos na mesma passada (ver crack_archives)
+        wordlist_path (str): Caminho para o arquivo de lista de palavras
+        engine (str): 'processes', 'threads', 'external' (threads com as ferramentas externas)
+            ou 'auto' (processos quando há verificador em processo)
+        resume (bool): Retomar a partir do checkpoint de uma execução interrompida
+        rules_path (str): Arquivo de regras de transformação aplicadas a cada palavra (opcional)
+        mask (str): Máscara de força bruta (ex.: '?l?l?d?d?d'), usada no lugar da lista
+        charsets (tuple): Conjuntos personalizados ?1 a ?4 da máscara
+        min_length (int): Menor comprimento testado com a máscara (padrão: a máscara inteira)
+        max_length (int): Maior comprimento testado com a máscara (padrão: a máscara inteira)
+        events (EventChannel): Canal de eventos estruturados (None imprime o progresso no stderr)
+        num_workers (int): Número de processos ou threads (padrão: escolhido pelo motor)
+        profile (tuple): (profiler, pasta) para executar cada worker sob cProfile ou tracemalloc
+        use_cache (bool): Consultar e atualizar o cache de resultados (ver result_cache)
         
     Returns:
         dict: Resultado do teste com tempo de execução e senha (se encontrada)
     """
     global found_password, tested_words_counter, active_threads
     
+    if isinstance(zip_path, (list, tuple)):
+        if resume:
+            print(f"AVISO: Checkpoint não se aplica a vários arquivos, começando do início", file=sys.stderr)
+        return crack_archives(zip_path, wordlist_path, engine, rules_path, mask, charsets, min_length, max_length,
+                              events, num_workers, profile)
+    
     # Resetar variáveis globais
     found_password = None
     stop_threads.clear()
@@ -256,7 +783,10 @@ def crack_zip(zip_path, wordlist_path):
     
     start_time = time.time()
     
-    print(f"INFO: Iniciando quebra de senha para {zip_path} usando lista {wordlist_path}", file=sys.stderr)
+    if mask is not None:
+        print(f"INFO: Iniciando quebra de senha para {zip_path} usando máscara {mask}", file=sys.stderr)
+    else:
+        print(f"INFO: Iniciando quebra de senha para {zip_path} usando lista {wordlist_path}", file=sys.stderr)
     print(f"INFO: Verificando arquivo ZIP...", file=sys.stderr)
     
     # Verificar se o arquivo ZIP está protegido por senha
@@ -265,6 +795,15 @@ def crack_zip(zip_path, wordlist_path):
             encrypted_files = [f for f in zf.infolist() if f.flag_bits & 0x1]
             if not encrypted_files:
                 print(f"ALERTA: Arquivo ZIP não possui arquivos protegidos por senha!", file=sys.stderr)
+        
+        # Ler os cabeçalhos de criptografia uma única vez para o verificador em processo
+        verifier = open_verifier(zip_path) if engine != 'external' else None
+        if engine == 'external':
+            print(f"INFO: Usando ferramentas externas (7z, unzip, zipfile) por escolha do motor", file=sys.stderr)
+        elif verifier is not None:
+            print(f"INFO: Usando verificador {verifier.name} em processo ({len(verifier.entries)} entradas criptografadas)", file=sys.stderr)
+        else:
+            print(f"INFO: Criptografia não suportada pelo verificador em processo, usando ferramentas externas", file=sys.stderr)
     except Exception as e:
         print(f"ERRO ao verificar arquivo ZIP: {str(e)}", file=sys.stderr)
         return {
@@ -276,26 +815,102 @@ def crack_zip(zip_path, wordlist_path):
             "threadsUsed": 0
         }
     
-    # Contar o número total de palavras
-    print(f"INFO: Contando linhas em {wordlist_path}...", file=sys.stderr)
-    total_words = count_lines(wordlist_path)
-    print(f"INFO: Total de {total_words} palavras na lista", file=sys.stderr)
+    # Cópias do mesmo arquivo: senha já registrada, ou uma das encontradas recentemente
+    cache = fingerprint = None
+    if use_cache:
+        try:
+            cache = ResultCache.for_archive(zip_path)
+            fingerprint = archive_fingerprint(zip_path)
+            hit = cache_prepass(cache, fingerprint, zip_path, verifier)
+        except (OSError, ValueError, zipfile.BadZipFile) as e:
+            print(f"AVISO: Cache de resultados indisponível: {str(e)}", file=sys.stderr)
+            cache = hit = None
+        if hit is not None:
+            password, origin, tested = hit
+            found_password = password.decode('utf-8', errors='replace')
+            if origin == 'known':
+                cache.record_password(fingerprint, password)
+            print(f"SUCESSO: Senha encontrada no cache de resultados: '{found_password}'", file=sys.stderr)
+            if events is not None:
+                events.hit(found_password)
+            return cache_result(start_time, found_password, origin, tested)
+    
+    try:
+        source_spec, rules, keyspace = prepare_keyspace(wordlist_path, rules_path, mask, charsets,
+                                                               min_length, max_length)
+    except (OSError, ValueError) as e:
+        print(f"ERRO ao preparar o ataque: {str(e)}", file=sys.stderr)
+        return {
+            "success": False,
+            "error": f"Erro ao preparar o ataque: {str(e)}",
+            "executionTime": int((time.time() - start_time) * 1000),
+            "testedWords": 0,
+            "totalWords": 0,
+            "threadsUsed": 0
+        }
+    
+    if cache is not None and cache.is_exhausted(fingerprint, keyspace):
+        print(f"INFO: Este espaço de busca já foi testado inteiro contra o arquivo, sem acerto", file=sys.stderr)
+        return cache_result(start_time)
+    
+    def remember(result, conclusive=True):
+        """
+        Registra no cache a senha encontrada ou o espaço de busca esgotado
+        
+        O espaço só é registrado como esgotado quando toda candidata teve
+        resposta definitiva (conclusive): uma ferramenta externa que não
+        concluiu não prova que a senha estava fora da lista.
+        """
+        # Um acerto não confirmado não vai para o cache (nem para as senhas conhecidas)
+        unconfirmed = flag_unconfirmed(result, verifier)
+        if cache is not None and "error" not in result:
+            if result["success"] and not unconfirmed:
+                cache.record_password(fingerprint, result["password"].encode('utf-8', errors='surrogateescape'))
+            elif conclusive and result["totalWords"] and result["testedWords"] >= result["totalWords"]:
+                cache.record_exhausted(fingerprint, keyspace)
+        return result
+    
+    # A verificação em processo é CPU-bound: usar processos para escapar do GIL
+    if verifier is not None and engine in ('auto', 'processes'):
+        checkpoint, source_spec = open_checkpoint(zip_path, keyspace, source_spec, resume, wordlist_path)
+        return remember(crack_zip_processes(zip_path, source_spec, start_time, verifier.batch_size, num_workers,
+                                            checkpoint=checkpoint, rules=rules, events=events, profile=profile))
+    
+    rule_set = RuleSet(rules if rules else [':'])
     
     # Determinar número de threads - limitando para evitar sobrecarga
     num_cores = multiprocessing.cpu_count()
     # Limitar a um número razoável de threads para evitar travamentos (2 por core é geralmente o ideal)
     num_threads = max(2, min(num_cores * 2, 16))  # Mínimo 2, máximo 16 threads
+    if num_workers is not None:
+        num_threads = num_workers
     print(f"INFO: Usando {num_threads} threads para processamento paralelo", file=sys.stderr)
     
-    # Criar fila de senhas com tamanho limitado para evitar consumo excessivo de memória
-    password_queue = queue.Queue(maxsize=5000)
+    # Ferramentas externas: um loop asyncio com número limitado de processos filhos,
+    # calibrado uma vez para tentar primeiro a ferramenta mais rápida que funciona
+    external = None
+    if verifier is None:
+        external = ExternalPool(zip_path, concurrency=num_workers, fallback=test_zipfile_password)
+        if external.calibrate():
+            print(f"INFO: Até {external.concurrency} processos externos simultâneos", file=sys.stderr)
+    
+    # Fila limitada em blocos de senhas (não em senhas) e contadores por thread, sem lock
+    block_queue = queue.Queue(maxsize=BLOCKS_PER_WORKER * num_threads)
+    counters = [0] * num_threads
+    sizer = BlockSizer()
+    meter = RateMeter()
+    
+    # Contadores de tempo por thread (sem locks) e do produtor, somados no resultado
+    thread_stats = [StageStats() for _ in range(num_threads)]
+    producer_stats = StageStats()
     
     # Iniciar threads worker
     workers = []
     for i in range(num_threads):
         worker = threading.Thread(
-            target=password_test_worker,
-            args=(zip_path, password_queue),
+            target=run_profiled,
+            args=(profile, f'thread-{i}', password_test_worker, zip_path, block_queue, i, counters, sizer, verifier,
+                  thread_stats[i], external),
             daemon=True
         )
         worker.start()
@@ -303,148 +918,128 @@ def crack_zip(zip_path, wordlist_path):
     
     # Variáveis para controle de progresso
     last_update_time = start_time
-    batch_size = 100  # Processar palavras em lotes para melhor performance
     heartbeat_time = time.time()  # Para detecção de travamentos
     
+    # A lista é lida uma única vez, em fatias, direto dos bytes do arquivo (ou do índice)
+    source = open_source(source_spec)
+    shard_queue = queue.Queue()
+    max_pending = MASK_PENDING_SHARDS if source_spec[0] == 'mask' else None
+    planner = ShardPlanner(source, shard_queue.put, MAX_SHARD_SIZE, max_pending=max_pending)
+    planner.start()
+    
     try:
-        # Lista de codificações para tentar
-        encodings = ['utf-8', 'latin1', 'cp1252', 'ascii']
-        
-        for encoding_idx, encoding in enumerate(encodings):
-            if found_password is not None or stop_threads.is_set():
-                break
-                
+        while found_password is None and not stop_threads.is_set():
             try:
-                # Abrir a lista de palavras com a codificação atual
-                print(f"INFO: Lendo lista com codificação {encoding}...", file=sys.stderr)
-                
-                # Processar o arquivo em lotes para evitar sobrecarregar a memória
-                with open(wordlist_path, 'r', encoding=encoding, errors='ignore') as wordlist:
-                    current_batch = []
-                    
-                    for line in wordlist:
-                        if found_password is not None or stop_threads.is_set():
-                            break
-                            
-                        password = line.strip()
-                        
-                        # Ignorar linhas vazias
-                        if not password:
-                            continue
-                        
-                        current_batch.append(password)
-                        
-                        # Processar o lote quando atingir o tamanho definido
-                        if len(current_batch) >= batch_size:
-                            # Adicionar lote à fila
-                            for pwd in current_batch:
-                                # Verificar se a fila está quase cheia (90%) e aguardar se estiver
-                                while password_queue.qsize() > password_queue.maxsize * 0.9:
-                                    time.sleep(0.01)  # Pequena pausa para dar tempo às threads de consumir a fila
-                                    
-                                    # Verificar heartbeat a cada 5 segundos
-                                    current_time = time.time()
-                                    if current_time - heartbeat_time > 5:
-                                        heartbeat_time = current_time
-                                        print(f"HEARTBEAT: Fila com {password_queue.qsize()} senhas, {active_threads} threads ativas", 
-                                              file=sys.stderr, flush=True)
-                                    
-                                    # Sair se a senha foi encontrada ou se as threads foram paradas
-                                    if found_password is not None or stop_threads.is_set():
-                                        break
-                                
-                                # Adicionar senha à fila se não encontrou ainda
-                                if found_password is None and not stop_threads.is_set():
-                                    password_queue.put(pwd)
-                            
-                            # Limpar lote
-                            current_batch = []
-                        
-                        # Atualizar o progresso a cada 100ms
-                        current_time = time.time()
-                        elapsed_time = current_time - last_update_time
-                        
-                        if elapsed_time > 0.1:
-                            progress = (tested_words_counter / total_words) * 100 if total_words > 0 else 0
-                            total_elapsed_time = current_time - start_time
-                            
-                            # Evitar divisão por zero
-                            if progress > 0:
-                                estimated_total_time = (total_elapsed_time / progress) * 100
-                                remaining_time = estimated_total_time - total_elapsed_time
-                            else:
-                                remaining_time = 0
-                            
-                            # Enviar progresso para stderr
-                            print(f"Progresso: {progress:.2f}%, Tempo restante: {remaining_time:.2f}s, Testadas: {tested_words_counter}, Threads: {active_threads}, Tentando: {password}", 
-                                  file=sys.stderr, flush=True)
-                            last_update_time = current_time
+                shard = shard_queue.get(timeout=0.1)
+            except queue.Empty:
+                if planner.error is not None:
+                    raise planner.error
+                if planner.done and shard_queue.empty():
+                    break
+                continue
+            planner.shard_lines.pop(shard[0], None)
+            
+            batches = producer_stats.timed('read', source.batches(shard[0], shard[1], MAX_SHARD_SIZE))
+            candidates = itertools.chain.from_iterable(
+                batch
+                for words, _, _ in batches
+                for batch, _ in producer_stats.timed('rules', rule_set.apply(words)))
+            for block in iter_blocks(candidates, sizer):
+                wait_start = time.perf_counter()
+                # Espera bloqueante (sem polling) por espaço na fila, acordando para o sinal de parada
+                while found_password is None and not stop_threads.is_set():
+                    try:
+                        block_queue.put(block, timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
                     
-                    # Processar o lote restante, se houver
-                    if current_batch and found_password is None and not stop_threads.is_set():
-                        for pwd in current_batch:
-                            # Verificar se a fila está quase cheia (90%) e aguardar se estiver
-                            while password_queue.qsize() > password_queue.maxsize * 0.9:
-                                time.sleep(0.01)
-                                if found_password is not None or stop_threads.is_set():
-                                    break
-                                    
-                            # Adicionar senha à fila se não encontrou ainda
-                            if found_password is None and not stop_threads.is_set():
-                                password_queue.put(pwd)
+                    # Verificar heartbeat a cada 5 segundos
+                    current_time = time.time()
+                    if current_time - heartbeat_time > 5:
+                        heartbeat_time = current_time
+                        print(f"HEARTBEAT: Fila com {block_queue.qsize()} blocos de até {sizer.size()} senhas, {active_threads} threads ativas", 
+                              file=sys.stderr, flush=True)
                 
-                # Esperar todas as senhas serem processadas se não encontrou ainda
-                if found_password is None and not stop_threads.is_set() and encoding_idx == len(encodings) - 1:
-                    print(f"INFO: Aguardando threads finalizarem o processamento...", file=sys.stderr)
-                    
-                    # Aguardar a fila estar vazia ou uma senha ser encontrada
-                    while not password_queue.empty() and found_password is None and not stop_threads.is_set():
-                        time.sleep(0.1)
-                        
-                        # Verificar se houve progresso
-                        current_time = time.time()
-                        if current_time - heartbeat_time > 5:
-                            heartbeat_time = current_time
-                            print(f"HEARTBEAT: Fila com {password_queue.qsize()} senhas, {active_threads} threads ativas, {tested_words_counter} testadas", 
-                                  file=sys.stderr, flush=True)
-                    
-            except UnicodeDecodeError:
-                print(f"AVISO: Erro de decodificação com {encoding}, tentando próxima codificação", file=sys.stderr)
-                continue
-            except Exception as e:
-                print(f"ERRO ao processar lista de palavras com {encoding}: {str(e)}", file=sys.stderr)
-                if encoding == encodings[-1] and found_password is None:
-                    stop_threads.set()
-                    return {
-                        "success": False,
-                        "error": str(e),
-                        "executionTime": int((time.time() - start_time) * 1000),
-                        "testedWords": tested_words_counter,
-                        "totalWords": total_words,
-                        "threadsUsed": num_threads
-                    }
+                # Sair se a senha foi encontrada ou se as threads foram paradas
+                if found_password is not None or stop_threads.is_set():
+                    break
+                producer_stats.add('enqueue_wait', time.perf_counter() - wait_start, len(block))
+                
+                # Atualizar o progresso a cada 100ms
+                if time.time() - last_update_time > 0.1:
+                    print_progress(sum(counters), planner.estimated_total() * len(rule_set), start_time, active_threads,
+                                   block[0].decode('utf-8', errors='replace'), events, meter.update(counters),
+                                   queue_depth=block_queue.qsize())
+                    last_update_time = time.time()
+        
+        # Esperar todos os blocos serem processados se não encontrou ainda
+        if found_password is None and not stop_threads.is_set():
+            print(f"INFO: Aguardando threads finalizarem o processamento...", file=sys.stderr)
+            
+            # Aguardar os blocos na fila e os em teste terminarem ou uma senha ser encontrada
+            while block_queue.unfinished_tasks and found_password is None and not stop_threads.is_set():
+                time.sleep(0.1)
+                
+                # Verificar se houve progresso
+                current_time = time.time()
+                if current_time - heartbeat_time > 5:
+                    heartbeat_time = current_time
+                    print(f"HEARTBEAT: Fila com {block_queue.qsize()} blocos, {active_threads} threads ativas, {sum(counters)} testadas", 
+                          file=sys.stderr, flush=True)
+
+    except Exception as e:
+        print(f"ERRO ao processar lista de palavras: {str(e)}", file=sys.stderr)
+        if found_password is None:
+            stop_threads.set()
+            return {
+                "success": False,
+                "error": str(e),
+                "executionTime": int((time.time() - start_time) * 1000),
+                "testedWords": sum(counters),
+                "totalWords": planner.estimated_total() * len(rule_set),
+                "threadsUsed": num_threads,
+                "stages": merge_stats(thread_stats + [producer_stats]).to_dict()
+            }
     finally:
         # Garantir que as threads sejam paradas
         stop_threads.set()
         
+        # Encerrar os processos externos ainda em execução
+        if external is not None:
+            external.close()
+        
         # Esvaziar a fila para liberar threads bloqueadas
-        while not password_queue.empty():
+        while not block_queue.empty():
             try:
-                password_queue.get_nowait()
-                password_queue.task_done()
-            except:
+                block_queue.get_nowait()
+                block_queue.task_done()
+            except queue.Empty:
                 pass
     
+        planner.stop()
+        planner.join()
+        source.close()
+    
     # Aguardar todas as threads finalizarem com timeout
     for worker in workers:
         worker.join(timeout=1.0)
+    tested_words_counter = sum(counters)
+    stages = merge_stats(thread_stats + [producer_stats]).to_dict()
+    
+    total_words = planner.estimated_total() * len(rule_set)
     
     end_time = time.time()
     execution_time = int((end_time - start_time) * 1000)
     
     # Enviar progresso final
-    print(f"Progresso: 100%, Tempo restante: 0s, Testadas: {tested_words_counter}, Threads: {active_threads}, Senha: {found_password or 'Não encontrada'}", 
-          file=sys.stderr, flush=True)
+    if events is not None:
+        print_progress(tested_words_counter, total_words, start_time, 0, found_password or '', events)
+        if found_password:
+            events.hit(found_password)
+    else:
+        print(f"Progresso: 100%, Tempo restante: 0s, Testadas: {tested_words_counter}, Threads: {active_threads}, Senha: {found_password or 'Não encontrada'}", 
+              file=sys.stderr, flush=True)
     
     # Retornar o resultado
     if found_password:
@@ -454,7 +1049,8 @@ def crack_zip(zip_path, wordlist_path):
             "executionTime": execution_time,
             "testedWords": tested_words_counter,
             "totalWords": total_words,
-            "threadsUsed": num_threads
+            "threadsUsed": num_threads,
+            "stages": stages
         }
     else:
         result = {
@@ -463,24 +1059,114 @@ def crack_zip(zip_path, wordlist_path):
             "executionTime": execution_time,
             "testedWords": tested_words_counter,
             "totalWords": total_words,
-            "threadsUsed": num_threads
+            "threadsUsed": num_threads,
+            "stages": stages
         }
     
-    return result
+    # Em processo toda resposta é definitiva; com ferramentas externas, só se todas concluíram
+    conclusive = verifier is not None or external.inconclusive == 0
+    if not conclusive and not found_password:
+        print(f"AVISO: {external.inconclusive} senhas não puderam ser testadas de forma conclusiva; "
+              f"o espaço de busca não será registrado como esgotado", file=sys.stderr)
+    return remember(result, conclusive)
 
 def main():
     """Função principal"""
-    if len(sys.argv) != 3:
-        print(f"Uso: {sys.argv[0]} <arquivo_zip> <lista_palavras>", file=sys.stderr)
-        sys.exit(1)
+    # 'zip_cracker.py bench ...' executa a suíte de benchmark (ver bench.py)
+    if len(sys.argv) > 1 and sys.argv[1] == 'bench':
+        import bench
+        sys.exit(bench.main(sys.argv[2:]))
+    # 'zip_cracker.py worker host:porta' atende um coordenador do modo distribuído (ver cluster.py)
+    if len(sys.argv) > 1 and sys.argv[1] == 'worker':
+        import cluster
+        sys.exit(cluster.worker_main(sys.argv[2:]))
+    
+    parser = argparse.ArgumentParser(description="Quebra de senha de arquivos ZIP por ataque de dicionário ou máscara")
+    parser.add_argument('zip_path', metavar='arquivo_zip', help="Arquivo ZIP protegido por senha")
+    parser.add_argument('wordlist_path', metavar='lista_palavras', nargs='?',
+                        help="Lista de palavras (uma por linha); opcional com --mask")
+    parser.add_argument('-z', '--zip', dest='extra_zips', action='append', default=[], metavar='arquivo_zip',
+                        help="Arquivo ZIP adicional testado na mesma passada pela lista (pode repetir)")
+    parser.add_argument('--resume', action='store_true',
+                        help="Retomar a partir do checkpoint de uma execução interrompida")
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false',
+                        help="Não consultar nem atualizar o cache de resultados (senhas encontradas e listas esgotadas)")
+    parser.add_argument('--rules', metavar='arquivo_regras',
+                        help="Arquivo de regras de transformação (sintaxe do hashcat) aplicadas a cada palavra")
+    parser.add_argument('--mask', metavar='mascara',
+                        help="Força bruta por máscara no lugar da lista (ex.: '?l?l?d?d?d')")
+    for n in range(1, 5):
+        parser.add_argument(f'-{n}', f'--charset{n}', metavar='conjunto',
+                            help=f"Conjunto personalizado ?{n} da máscara (ex.: '?l?d_')")
+    parser.add_argument('--min-length', type=int, metavar='N',
+                        help="Testar também prefixos da máscara a partir de N caracteres")
+    parser.add_argument('--max-length', type=int, metavar='N',
+                        help="Maior prefixo da máscara testado (padrão: a máscara inteira)")
+    parser.add_argument('--events-fd', type=int, metavar='fd',
+                        help="Descritor de arquivo para o canal de eventos JSON (progresso, acerto, resultado)")
+    parser.add_argument('--engine', choices=ENGINES, default='auto',
+                        help="Motor de execução (padrão: processos quando há verificador em processo)")
+    parser.add_argument('--workers', type=int, metavar='N',
+                        help="Número de processos ou threads (padrão: escolhido pelo motor)")
+    parser.add_argument('--profile', choices=PROFILERS,
+                        help="Executar cada worker sob cProfile ou tracemalloc e gravar um perfil por worker")
+    parser.add_argument('--profile-dir', default=DEFAULT_PROFILE_DIR, metavar='pasta',
+                        help=f"Pasta dos perfis gravados por --profile (padrão: {DEFAULT_PROFILE_DIR})")
+    parser.add_argument('--listen', metavar='host:porta',
+                        help="Coordenar nós worker remotos ('zip_cracker.py worker host:porta') em vez de testar localmente "
+                             "(host padrão: 127.0.0.1; outros endereços exigem --token)")
+    parser.add_argument('--lease-timeout', type=float, metavar='segundos',
+                        help="Com --listen: tempo sem notícias de um nó até suas fatias serem reemitidas (padrão: 30)")
+    parser.add_argument('--token', default=os.environ.get('SUPERZIP_CLUSTER_TOKEN'),
+                        help="Com --listen: segredo exigido dos nós (padrão: $SUPERZIP_CLUSTER_TOKEN)")
+    parser.add_argument('--shared-archive', action='store_true',
+                        help="Com --listen: os nós abrem o ZIP por um caminho compartilhado em vez de receber a cópia reduzida")
+    # Intercalado: a lista pode vir depois dos -z (zip_cracker.py a.zip -z b.zip lista.txt)
+    args = parser.parse_intermixed_args()
     
-    zip_path = sys.argv[1]
-    wordlist_path = sys.argv[2]
+    if (args.wordlist_path is None) == (args.mask is None):
+        parser.error("informe uma lista de palavras ou --mask (apenas um dos dois)")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers precisa ser pelo menos 1")
+    if args.listen is not None and (args.extra_zips or args.resume or args.engine != 'auto' or args.profile):
+        parser.error("--listen não pode ser combinado com --zip, --resume, --engine ou --profile")
+    if args.lease_timeout is not None and args.lease_timeout <= 0:
+        parser.error("--lease-timeout precisa ser positivo")
+    
+    # Encerrar de forma ordenada ao receber SIGTERM para gravar o checkpoint
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+    
+    events = EventChannel.from_fd(args.events_fd) if args.events_fd is not None else None
+    if events is not None:
+        # As mensagens INFO/AVISO/ERRO do stderr também saem como eventos log
+        sys.stderr = LogForwarder(sys.stderr, events)
+    
+    charsets = (args.charset1, args.charset2, args.charset3, args.charset4)
+    if args.listen is not None:
+        import cluster
+        try:
+            address = cluster.parse_address(args.listen)
+        except ValueError as e:
+            parser.error(str(e))
+        result = cluster.coordinate(args.zip_path, address, args.wordlist_path, rules_path=args.rules,
+                                    mask=args.mask, charsets=charsets, min_length=args.min_length,
+                                    max_length=args.max_length,
+                                    lease_timeout=args.lease_timeout or cluster.DEFAULT_LEASE_TIMEOUT,
+                                    token=args.token, push_archive=not args.shared_archive, events=events)
+    else:
+        zip_paths = [args.zip_path] + args.extra_zips if args.extra_zips else args.zip_path
+        result = crack_zip(zip_paths, args.wordlist_path, resume=args.resume, rules_path=args.rules,
+                           mask=args.mask, charsets=charsets,
+                           min_length=args.min_length, max_length=args.max_length, events=events,
+                           engine=args.engine, num_workers=args.workers,
+                           profile=(args.profile, args.profile_dir) if args.profile else None,
+                           use_cache=args.use_cache)
     
-    result = crack_zip(zip_path, wordlist_path)
+    if events is not None:
+        events.result(result)
     
     # Imprimir o resultado como JSON
     print(json.dumps(result))
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
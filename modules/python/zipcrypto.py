@@ -0,0 +1,566 @@
+#!/usr/bin/env python3
+"""
+Verificador ZipCrypto (criptografia PKZIP tradicional) executado em processo.
+
+O arquivo ZIP é lido uma única vez: para cada entrada criptografada guardamos
+o cabeçalho de criptografia de 12 bytes e o byte de verificação. Cada senha
+candidata passa pelo key schedule do PKZIP e só as que acertam o byte de
+verificação (~1/256) são descriptografadas e conferidas pelo CRC.
+
+As entradas são ordenadas uma vez pelo custo de confirmação (tamanho
+comprimido e método): a mais barata é a usada na confirmação, e os bytes de
+verificação de algumas outras descartam mais falsos positivos antes de
+qualquer descompressão. A confirmação descriptografa e descomprime em
+blocos, abortando no primeiro bloco deflate inválido, então a memória não
+cresce com o tamanho da entrada.
+"""
+import bz2
+import struct
+import time
+import zipfile
+import zlib
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional: sem ele os lotes são verificados senha a senha
+    np = None
+
+# Estrutura do cabeçalho local de um arquivo dentro do ZIP
+LOCAL_HEADER_STRUCT = struct.Struct('<4s5H3L2H')
+LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+
+# Registro do diretório central e registro final do ZIP
+CENTRAL_HEADER_STRUCT = struct.Struct('<4s6H3L5H2L')
+CENTRAL_HEADER_SIGNATURE = b'PK\x01\x02'
+END_RECORD_STRUCT = struct.Struct('<4s4H2LH')
+END_RECORD_SIGNATURE = b'PK\x05\x06'
+
+# Tamanho do cabeçalho de criptografia que precede os dados
+ENCRYPTION_HEADER_SIZE = 12
+
+# Valores iniciais das três chaves do PKZIP
+KEY0_INIT = 0x12345678
+KEY1_INIT = 0x23456789
+KEY2_INIT = 0x34567890
+
+# Métodos de compressão que sabemos descomprimir sem o zipfile
+STORED = 0
+DEFLATED = 8
+BZIP2 = 12
+AES_METHOD = 99
+NATIVE_METHODS = (STORED, DEFLATED, BZIP2)
+
+# Entradas além da principal cujo byte de verificação também filtra as senhas
+# (cada uma descarta ~255/256 dos falsos positivos restantes)
+EXTRA_CHECK_ENTRIES = 3
+
+# Blocos da confirmação em streaming: o primeiro é pequeno para que uma senha
+# errada seja descartada cedo, e os seguintes crescem até o máximo
+VERIFY_FIRST_CHUNK = 1024
+VERIFY_CHUNK_SIZE = 64 * 1024
+
+
+def _build_crc_table():
+    """
+    Monta a tabela CRC32 (polinômio refletido 0xEDB88320) usada pelo key schedule
+
+    Returns:
+        list: 256 valores de 32 bits
+    """
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            if crc & 1:
+                crc = (crc >> 1) ^ 0xEDB88320
+            else:
+                crc >>= 1
+        table.append(crc)
+    return table
+
+
+CRC_TABLE = _build_crc_table()
+CRC_TABLE_NP = np.array(CRC_TABLE, dtype=np.uint32) if np is not None else None
+
+# Tamanho de lote padrão: com NumPy lotes maiores diluem o custo por coluna
+DEFAULT_BATCH_SIZE = 4096 if np is not None else 1000
+
+
+def init_keys(password):
+    """
+    Calcula o estado das chaves do PKZIP após processar a senha
+
+    Args:
+        password (bytes): Senha candidata
+
+    Returns:
+        tuple: (key0, key1, key2)
+    """
+    crc = CRC_TABLE
+    k0, k1, k2 = KEY0_INIT, KEY1_INIT, KEY2_INIT
+    for c in password:
+        k0 = crc[(k0 ^ c) & 0xff] ^ (k0 >> 8)
+        k1 = ((k1 + (k0 & 0xff)) * 134775813 + 1) & 0xffffffff
+        k2 = crc[(k2 ^ (k1 >> 24)) & 0xff] ^ (k2 >> 8)
+    return k0, k1, k2
+
+
+def pack_passwords(passwords):
+    """
+    Empacota senhas em uma matriz uint8 preenchida com zeros e um vetor de tamanhos
+
+    Args:
+        passwords (list): Senhas (bytes)
+
+    Returns:
+        tuple: (matriz n x maior_tamanho, vetor de tamanhos)
+    """
+    count = len(passwords)
+    lengths = np.fromiter(map(len, passwords), dtype=np.int64, count=count)
+    width = int(lengths.max()) if count else 0
+    matrix = np.zeros((count, width), dtype=np.uint8)
+    if width:
+        flat = np.frombuffer(b''.join(passwords), dtype=np.uint8)
+        rows = np.repeat(np.arange(count), lengths)
+        starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+        matrix[rows, np.arange(flat.size) - starts] = flat
+    return matrix, lengths
+
+
+def update_keys_batch(keys, chars):
+    """
+    Avança o estado das chaves de um lote por um byte de senha em cada linha
+
+    Args:
+        keys (tuple): Vetores uint32 (key0, key1, key2)
+        chars (ndarray): Byte (uint8) processado por cada linha
+
+    Returns:
+        tuple: Novos vetores (key0, key1, key2)
+    """
+    table = CRC_TABLE_NP
+    k0, k1, k2 = keys
+    k0 = table[(k0 ^ chars) & 0xff] ^ (k0 >> 8)
+    # A aritmética uint32 do NumPy já descarta o estouro (mod 2^32)
+    k1 = (k1 + (k0 & 0xff)) * np.uint32(134775813) + np.uint32(1)
+    k2 = table[(k2 ^ (k1 >> 24)) & 0xff] ^ (k2 >> 8)
+    return k0, k1, k2
+
+
+def init_keys_batch(passwords):
+    """
+    Calcula o estado das chaves para um lote inteiro de senhas, coluna a coluna
+
+    Args:
+        passwords (list): Senhas (bytes)
+
+    Returns:
+        tuple: Vetores uint32 (key0, key1, key2), um elemento por senha
+    """
+    matrix, lengths = pack_passwords(passwords)
+    count = len(passwords)
+    k0 = np.full(count, KEY0_INIT, dtype=np.uint32)
+    k1 = np.full(count, KEY1_INIT, dtype=np.uint32)
+    k2 = np.full(count, KEY2_INIT, dtype=np.uint32)
+
+    for column in range(matrix.shape[1]):
+        n0, n1, n2 = update_keys_batch((k0, k1, k2), matrix[:, column])
+        # Senhas mais curtas que a coluna atual mantêm o estado anterior
+        active = lengths > column
+        k0 = np.where(active, n0, k0)
+        k1 = np.where(active, n1, k1)
+        k2 = np.where(active, n2, k2)
+
+    return k0, k1, k2
+
+
+def decrypt(keys, data):
+    """
+    Descriptografa um bloco de dados a partir de um estado de chaves
+
+    Args:
+        keys (tuple): Estado (key0, key1, key2)
+        data (bytes): Dados criptografados
+
+    Returns:
+        tuple: (dados descriptografados, novo estado das chaves)
+    """
+    crc = CRC_TABLE
+    k0, k1, k2 = keys
+    out = bytearray(len(data))
+    for i, c in enumerate(data):
+        t = (k2 | 2) & 0xffff
+        p = c ^ (((t * (t ^ 1)) >> 8) & 0xff)
+        out[i] = p
+        k0 = crc[(k0 ^ p) & 0xff] ^ (k0 >> 8)
+        k1 = ((k1 + (k0 & 0xff)) * 134775813 + 1) & 0xffffffff
+        k2 = crc[(k2 ^ (k1 >> 24)) & 0xff] ^ (k2 >> 8)
+    return bytes(out), (k0, k1, k2)
+
+
+def encrypt(keys, data):
+    """
+    Criptografa um bloco de dados a partir de um estado de chaves (inverso de decrypt)
+
+    Args:
+        keys (tuple): Estado (key0, key1, key2)
+        data (bytes): Dados em claro
+
+    Returns:
+        tuple: (dados criptografados, novo estado das chaves)
+    """
+    crc = CRC_TABLE
+    k0, k1, k2 = keys
+    out = bytearray(len(data))
+    for i, p in enumerate(data):
+        t = (k2 | 2) & 0xffff
+        out[i] = p ^ (((t * (t ^ 1)) >> 8) & 0xff)
+        k0 = crc[(k0 ^ p) & 0xff] ^ (k0 >> 8)
+        k1 = ((k1 + (k0 & 0xff)) * 134775813 + 1) & 0xffffffff
+        k2 = crc[(k2 ^ (k1 >> 24)) & 0xff] ^ (k2 >> 8)
+    return bytes(out), (k0, k1, k2)
+
+
+def entry_cost(zip_info):
+    """
+    Custo relativo de confirmar uma senha descomprimindo uma entrada
+
+    Entradas vazias não confirmam nada (o CRC de zero bytes é sempre 0) e
+    métodos que não sabemos descomprimir aqui passam pelo zipfile; entre as
+    demais, vale o tamanho comprimido.
+
+    Args:
+        zip_info (ZipInfo): Entrada do arquivo ZIP
+
+    Returns:
+        tuple: Chave de ordenação (menor é mais barato)
+    """
+    return (zip_info.file_size == 0, zip_info.compress_type not in NATIVE_METHODS, zip_info.compress_size)
+
+
+def is_zipcrypto(zip_info):
+    """
+    Indica se uma entrada usa a criptografia PKZIP tradicional
+
+    Args:
+        zip_info (ZipInfo): Entrada do arquivo ZIP
+
+    Returns:
+        bool: True para ZipCrypto, False para entradas abertas, AES ou "strong encryption"
+    """
+    return bool(zip_info.flag_bits & 0x1) and not zip_info.flag_bits & 0x40 \
+        and zip_info.compress_type != AES_METHOD
+
+
+class ZipCryptoEntry:
+    """Dados de uma entrada ZipCrypto necessários para testar senhas"""
+
+    def __init__(self, zip_info, data_offset, header, check_byte):
+        self.info = zip_info
+        self.data_offset = data_offset
+        self.header = header
+        self.check_byte = check_byte
+
+    @classmethod
+    def from_zip_info(cls, fp, zip_info):
+        """
+        Lê o cabeçalho local de uma entrada e extrai o cabeçalho de criptografia
+
+        Args:
+            fp (file): Arquivo ZIP aberto em modo binário
+            zip_info (ZipInfo): Entrada do diretório central
+
+        Returns:
+            ZipCryptoEntry: Entrada pronta para verificação
+        """
+        fp.seek(zip_info.header_offset)
+        fields = LOCAL_HEADER_STRUCT.unpack(fp.read(LOCAL_HEADER_STRUCT.size))
+        signature, _, flags, _, mod_time, _, _, _, _, name_len, extra_len = fields
+        if signature != LOCAL_HEADER_SIGNATURE:
+            raise zipfile.BadZipFile(f"Cabeçalho local inválido para {zip_info.filename}")
+
+        data_offset = zip_info.header_offset + LOCAL_HEADER_STRUCT.size + name_len + extra_len
+        fp.seek(data_offset)
+        header = fp.read(ENCRYPTION_HEADER_SIZE)
+        if len(header) != ENCRYPTION_HEADER_SIZE:
+            raise zipfile.BadZipFile(f"Cabeçalho de criptografia truncado em {zip_info.filename}")
+
+        # Com descritor de dados (bit 3) o CRC ainda não é conhecido ao gravar o
+        # cabeçalho, então o byte de verificação vem da hora de modificação
+        if flags & 0x8:
+            check_byte = (mod_time >> 8) & 0xff
+        else:
+            check_byte = (zip_info.CRC >> 24) & 0xff
+
+        return cls(zip_info, data_offset, header, check_byte)
+
+    def check_header(self, keys):
+        """
+        Descriptografa o cabeçalho de 12 bytes e confere o byte de verificação
+
+        Args:
+            keys (tuple): Estado das chaves após a senha
+
+        Returns:
+            bool: True se o byte de verificação bater
+        """
+        crc = CRC_TABLE
+        k0, k1, k2 = keys
+        p = 0
+        for c in self.header:
+            t = (k2 | 2) & 0xffff
+            p = c ^ (((t * (t ^ 1)) >> 8) & 0xff)
+            k0 = crc[(k0 ^ p) & 0xff] ^ (k0 >> 8)
+            k1 = ((k1 + (k0 & 0xff)) * 134775813 + 1) & 0xffffffff
+            k2 = crc[(k2 ^ (k1 >> 24)) & 0xff] ^ (k2 >> 8)
+        return p == self.check_byte
+
+
+    def check_header_batch(self, keys):
+        """
+        Versão vetorizada de check_header para um lote de estados de chaves
+
+        Args:
+            keys (tuple): Vetores (key0, key1, key2) de init_keys_batch
+
+        Returns:
+            ndarray: Índices das linhas que acertaram o byte de verificação
+        """
+        table = CRC_TABLE_NP
+        k0, k1, k2 = keys
+        p = None
+        for c in self.header:
+            t = (k2 | 2) & 0xffff
+            p = (((t * (t ^ 1)) >> 8) & 0xff) ^ c
+            k0 = table[(k0 ^ p) & 0xff] ^ (k0 >> 8)
+            k1 = (k1 + (k0 & 0xff)) * np.uint32(134775813) + np.uint32(1)
+            k2 = table[(k2 ^ (k1 >> 24)) & 0xff] ^ (k2 >> 8)
+        return np.nonzero(p == self.check_byte)[0]
+
+
+class ZipCryptoVerifier:
+    """
+    Testa senhas contra as entradas ZipCrypto de um arquivo ZIP sem abrir
+    processos externos nem reabrir o arquivo a cada tentativa
+    """
+
+    name = 'ZipCrypto'
+    batch_size = DEFAULT_BATCH_SIZE
+
+    def __init__(self, zip_path, entries):
+        self.zip_path = zip_path
+        # Ordenadas uma única vez: a mais barata confirma, as seguintes só filtram
+        self.entries = sorted(entries, key=lambda e: entry_cost(e.info))
+        self.primary = self.entries[0]
+        self.secondary = self.entries[1:1 + EXTRA_CHECK_ENTRIES]
+        # Só entradas vazias (a mais barata é vazia só se todas forem): tamanho e CRC
+        # não distinguem senhas, e um acerto do byte de verificação não é confirmado
+        self.confirmable = self.primary.info.file_size > 0
+
+    @classmethod
+    def from_zip(cls, zip_path):
+        """
+        Analisa o arquivo ZIP uma única vez e monta o verificador
+
+        Args:
+            zip_path (str): Caminho para o arquivo ZIP
+
+        Returns:
+            ZipCryptoVerifier: Verificador, ou None se não houver entradas ZipCrypto
+        """
+        with zipfile.ZipFile(zip_path) as zf:
+            infos = [f for f in zf.infolist() if is_zipcrypto(f)]
+        if not infos:
+            return None
+
+        with open(zip_path, 'rb') as fp:
+            entries = [ZipCryptoEntry.from_zip_info(fp, info) for info in infos]
+        return cls(zip_path, entries)
+
+    def check(self, password, stats=None):
+        """
+        Testa uma senha: filtro pelo byte de verificação e confirmação completa
+
+        Args:
+            password (bytes): Senha candidata
+            stats (StageStats): Contadores de tempo das etapas (opcional)
+
+        Returns:
+            bool: True se a senha estiver correta
+        """
+        if stats is not None:
+            start = time.perf_counter()
+        keys = init_keys(password)
+        matched = self.check_headers(keys)
+        if stats is not None:
+            checked = time.perf_counter()
+            stats.add('header_check', checked - start)
+        if not matched:
+            return False
+        matched = self.verify(password, keys)
+        if stats is not None:
+            stats.add('verify', time.perf_counter() - checked)
+        return matched
+
+    def check_batch(self, passwords, keys=None, stats=None):
+        """
+        Testa um lote de senhas de uma vez
+
+        Com NumPy o key schedule e o cabeçalho são calculados para o lote todo;
+        apenas as senhas que passam pelos bytes de verificação seguem para a
+        confirmação completa.
+
+        Args:
+            passwords (list): Senhas candidatas (bytes)
+            keys (tuple): Estado das chaves já calculado para o lote (ex.: índice pré-compilado)
+            stats (StageStats): Contadores de tempo das etapas (opcional)
+
+        Returns:
+            list: Índices (em ordem crescente) das senhas corretas
+        """
+        if not passwords:
+            return []
+
+        if np is None:
+            return [i for i, password in enumerate(passwords) if self.check(password, stats)]
+
+        if stats is not None:
+            start = time.perf_counter()
+        if keys is None:
+            keys = init_keys_batch(passwords)
+        candidates = self.primary.check_header_batch(keys)
+        for entry in self.secondary:
+            if not len(candidates):
+                break
+            # Só as sobreviventes do filtro anterior seguem para o próximo cabeçalho
+            candidates = candidates[entry.check_header_batch(tuple(k[candidates] for k in keys))]
+        if stats is not None:
+            checked = time.perf_counter()
+            stats.add('header_check', checked - start, len(passwords))
+        hits = [int(i) for i in candidates if self.verify(passwords[i])]
+        if stats is not None and len(candidates):
+            stats.add('verify', time.perf_counter() - checked, len(candidates))
+        return hits
+
+    def check_headers(self, keys):
+        """
+        Confere o byte de verificação da entrada principal e das secundárias
+
+        Args:
+            keys (tuple): Estado das chaves após a senha
+
+        Returns:
+            bool: True se todos os bytes de verificação baterem
+        """
+        return self.primary.check_header(keys) and all(entry.check_header(keys) for entry in self.secondary)
+
+    def confirm(self, password, keys=None):
+        """
+        Confirma uma senha que já passou pelo byte de verificação da entrada principal
+
+        Args:
+            password (bytes): Senha candidata
+            keys (tuple): Estado das chaves já calculado (opcional)
+
+        Returns:
+            bool: True se a senha estiver correta
+        """
+        if keys is None:
+            keys = init_keys(password)
+        if not all(entry.check_header(keys) for entry in self.secondary):
+            return False
+        return self.verify(password, keys)
+
+    def verify(self, password, keys=None):
+        """
+        Descriptografa e descomprime a entrada principal em blocos conferindo o CRC
+
+        Uma senha errada normalmente produz um bloco deflate inválido logo no
+        início, e a confirmação é abortada sem ler o resto da entrada.
+
+        Args:
+            password (bytes): Senha candidata
+            keys (tuple): Estado das chaves já calculado (opcional)
+
+        Returns:
+            bool: True se os dados conferirem com o CRC
+        """
+        entry = self.primary
+        info = entry.info
+        if keys is None:
+            keys = init_keys(password)
+
+        if info.compress_type not in NATIVE_METHODS:
+            # Métodos menos comuns (LZMA, etc.) ficam a cargo do zipfile, também em blocos
+            try:
+                with zipfile.ZipFile(self.zip_path) as zf, zf.open(info, pwd=password) as member:
+                    while member.read(VERIFY_CHUNK_SIZE):
+                        pass
+                return True
+            except (RuntimeError, zipfile.BadZipFile, zlib.error, EOFError, OSError, NotImplementedError):
+                return False
+
+        if info.compress_type == DEFLATED:
+            decompressor = zlib.decompressobj(-15)
+        elif info.compress_type == BZIP2:
+            decompressor = bz2.BZ2Decompressor()
+        else:
+            decompressor = None
+
+        crc = 0
+        size = 0
+        chunk_size = VERIFY_FIRST_CHUNK
+        with open(self.zip_path, 'rb') as fp:
+            fp.seek(entry.data_offset)
+            # O cabeçalho de criptografia só avança as chaves
+            _, keys = decrypt(keys, fp.read(ENCRYPTION_HEADER_SIZE))
+            remaining = info.compress_size - ENCRYPTION_HEADER_SIZE
+            while remaining > 0:
+                encrypted = fp.read(min(chunk_size, remaining))
+                if not encrypted:
+                    return False
+                remaining -= len(encrypted)
+                chunk_size = min(chunk_size * 2, VERIFY_CHUNK_SIZE)
+                plain, keys = decrypt(keys, encrypted)
+                try:
+                    for data in _inflate(decompressor, plain):
+                        size += len(data)
+                        if size > info.file_size:
+                            return False
+                        crc = zlib.crc32(data, crc)
+                except (zlib.error, OSError, EOFError, ValueError):
+                    return False
+
+        if decompressor is not None and not decompressor.eof:
+            return False
+        return size == info.file_size and crc & 0xffffffff == info.CRC
+
+
+def _inflate(decompressor, data):
+    """
+    Descomprime um bloco gerando a saída em pedaços de no máximo VERIFY_CHUNK_SIZE bytes
+
+    Args:
+        decompressor: zlib.decompressobj, bz2.BZ2Decompressor, ou None para dados armazenados
+        data (bytes): Bloco descriptografado
+
+    Yields:
+        bytes: Dados descomprimidos
+    """
+    if decompressor is None:
+        yield data
+        return
+    if isinstance(decompressor, bz2.BZ2Decompressor):
+        yield decompressor.decompress(data, VERIFY_CHUNK_SIZE)
+        while not decompressor.eof and not decompressor.needs_input:
+            yield decompressor.decompress(b'', VERIFY_CHUNK_SIZE)
+        return
+    while data:
+        yield decompressor.decompress(data, VERIFY_CHUNK_SIZE)
+        data = decompressor.unconsumed_tail
+    # Mesmo com a entrada consumida o zlib pode guardar saída pendente (limitada por max_length)
+    while not decompressor.eof:
+        pending = decompressor.decompress(b'', VERIFY_CHUNK_SIZE)
+        if not pending:
+            break
+        yield pending
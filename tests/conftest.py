@@ -0,0 +1,6 @@
+"""Testes dos módulos Python (modules/python), executados com pytest na raiz do repositório."""
+import os
+import sys
+
+PYTHON_MODULES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'modules', 'python')
+sys.path.insert(0, PYTHON_MODULES)
@@ -0,0 +1,52 @@
+import fixtures
+from archive_set import ArchiveSet
+from winzip_aes import AesVerifier
+from zipcrypto import ZipCryptoVerifier
+
+
+def archive_set(tmp_path, passwords):
+    paths = []
+    for name, (encryption, password) in passwords.items():
+        path = str(tmp_path / name)
+        fixtures.write_encrypted_zip(path, password, encryption, 1, 512)
+        paths.append(path)
+    return ArchiveSet.from_zips(paths)
+
+
+def test_aes_does_not_shrink_the_zipcrypto_batch(tmp_path, monkeypatch):
+    archives = archive_set(tmp_path, {'a.zip': ('zipcrypto', 'w0010'), 'b.zip': ('aes', 'w0150')})
+    assert archives.batch_size == ZipCryptoVerifier.batch_size
+
+    sizes = []
+    check_batch = AesVerifier.check_batch
+    monkeypatch.setattr(AesVerifier, 'check_batch',
+                        lambda self, passwords, keys=None, stats=None:
+                        sizes.append(len(passwords)) or check_batch(self, passwords, keys, stats))
+    passwords = [f'w{i:04d}'.encode() for i in range(200)]
+    assert archives.check_batch(passwords) == [150]
+    assert archives.passwords == [b'w0010', b'w0150']
+    # Sub-lotes do AES até o acerto, e nenhum depois dele
+    assert sizes == [AesVerifier.batch_size] * (150 // AesVerifier.batch_size + 1)
+
+
+def test_aes_sub_batches_stop_when_solved_elsewhere(tmp_path, monkeypatch):
+    archives = archive_set(tmp_path, {'a.zip': ('zipcrypto', 'x'), 'b.zip': ('aes', 'y')})
+    solved = []
+
+    class State:
+        def is_found(self):
+            return False
+
+        def is_solved(self, archive):
+            return archive in solved
+
+        def record_hit(self, password, archive):
+            solved.append(archive)
+
+    archives.state = State()
+    calls = []
+    monkeypatch.setattr(AesVerifier, 'check_batch',
+                        lambda self, passwords, keys=None, stats=None: calls.append(len(passwords)) or solved.append(1) or [])
+    assert archives.check_batch([f'w{i:04d}'.encode() for i in range(200)]) == []
+    # Outro worker resolveu o AES durante o primeiro sub-lote
+    assert calls == [AesVerifier.batch_size]
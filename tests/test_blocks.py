@@ -0,0 +1,52 @@
+from blocks import BlockSizer, iter_blocks, COST_SMOOTHING
+
+
+def feed(sizer, cost, times, count=100):
+    sizes = []
+    for _ in range(times):
+        sizer.record(count, cost * count)
+        sizes.append(sizer.size())
+    return sizes
+
+
+def test_initial_size_before_any_measurement():
+    sizer = BlockSizer(target=0.05, initial=16)
+    assert sizer.size() == 16
+    sizer.record(0, 1.0)
+    assert sizer.size() == 16
+
+
+def test_grows_and_shrinks_toward_the_target():
+    sizer = BlockSizer(target=0.05, minimum=1, maximum=8192)
+    sizer.record(10, 10 * 1e-3)
+    assert sizer.size() == 50
+
+    # Candidatas 10x mais baratas: o bloco cresce a cada medição até ~0.05s / 1e-4
+    growing = feed(sizer, 1e-4, 40)
+    assert growing == sorted(growing)
+    assert growing[0] == int(0.05 / (1e-3 + COST_SMOOTHING * (1e-4 - 1e-3)))
+    assert abs(growing[-1] - 500) <= 1
+
+    # Mais caras de novo: o bloco encolhe até ~0.05s / 1e-2
+    shrinking = feed(sizer, 1e-2, 40)
+    assert shrinking == sorted(shrinking, reverse=True)
+    assert shrinking[-1] == 5
+
+
+def test_size_is_clamped():
+    sizer = BlockSizer(target=0.05, minimum=2, maximum=1000)
+    feed(sizer, 1e-9, 5)
+    assert sizer.size() == 1000
+    feed(sizer, 10.0, 60)
+    assert sizer.size() == 2
+    sizer.cost = 0.0
+    assert sizer.size() == 1000
+
+
+def test_iter_blocks_follows_the_sizer():
+    sizer = BlockSizer(initial=3)
+    blocks = iter_blocks(range(20), sizer)
+    assert next(blocks) == [0, 1, 2]
+    sizer.cost = sizer.target / 5
+    assert next(blocks) == [3, 4, 5, 6, 7]
+    assert [len(block) for block in blocks] == [5, 5, 2]
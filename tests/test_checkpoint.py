@@ -0,0 +1,56 @@
+import os
+import time
+
+import fixtures
+import wordlist_index
+import zip_cracker
+from checkpoint import Checkpoint, checkpoint_path
+from wordlist import Wordlist
+
+SHARD_SIZE = 4096
+
+
+def wait_for_index(wordlist_path):
+    index_dir = os.path.join(os.path.dirname(wordlist_path), wordlist_index.INDEX_DIR_NAME)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if os.path.isdir(index_dir) and any(name.endswith(wordlist_index.INDEX_SUFFIX) for name in os.listdir(index_dir)):
+            return
+        time.sleep(0.05)
+    raise AssertionError("índice não foi gerado")
+
+
+def test_resume_uses_the_source_of_the_checkpoint(tmp_path, capfd):
+    zip_path = str(tmp_path / 'alvo.zip')
+    fixtures.write_encrypted_zip(zip_path, 'w00010', 'zipcrypto', 1, 1024)
+    wordlist_path = str(tmp_path / 'lista.txt')
+    with open(wordlist_path, 'w') as f:
+        f.write(''.join(f'w{i:05d}\n' for i in range(5000)))
+
+    # Primeira execução: índice ainda em geração, checkpoint gravado sobre o texto
+    source_spec, _, keyspace = zip_cracker.prepare_keyspace(wordlist_path)
+    assert source_spec[0] == 'text'
+    checkpoint, _ = zip_cracker.open_checkpoint(zip_path, keyspace, source_spec, False, wordlist_path)
+    checkpoint.shard_size = SHARD_SIZE
+    # Interrompida depois de concluir a primeira fatia (onde está a senha)
+    with Wordlist(wordlist_path) as wordlist:
+        start, end, lines = next(wordlist.shards(SHARD_SIZE))
+    checkpoint.add(start, end, lines)
+    checkpoint.save()
+
+    wait_for_index(wordlist_path)
+    assert zip_cracker.prepare_keyspace(wordlist_path)[0][0] == 'index'
+    capfd.readouterr()
+
+    result = zip_cracker.crack_zip(zip_path, wordlist_path, resume=True, num_workers=2, use_cache=False)
+    assert "Retomando do checkpoint" in capfd.readouterr().err
+    # A fatia concluída foi pulada: a senha, que estava nela, não é testada de novo
+    assert not result["success"]
+    assert result["testedWords"] == 5000
+    assert not os.path.exists(checkpoint_path(zip_path))
+
+
+def test_checkpoint_matches_regardless_of_source_kind(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / 'c.json'), 'arquivo', 'lista', 'text', 4096)
+    assert checkpoint.matches('arquivo', wordlist_index.KeyspaceDigest(fixed='lista'))
+    assert not checkpoint.matches('arquivo', wordlist_index.KeyspaceDigest(fixed='outra'))
@@ -0,0 +1,22 @@
+import json
+import os
+import subprocess
+import sys
+
+import fixtures
+
+ZIP_CRACKER = os.path.join(os.path.dirname(fixtures.__file__), 'zip_cracker.py')
+
+
+def test_wordlist_after_extra_zips(tmp_path):
+    passwords = {'a.zip': 'alfa', 'b.zip': 'beta', 'c.zip': 'gama'}
+    for name, password in passwords.items():
+        fixtures.write_encrypted_zip(str(tmp_path / name), password, 'zipcrypto', 1, 1024)
+    (tmp_path / 'lista.txt').write_text('x\nalfa\nbeta\ngama\n')
+    completed = subprocess.run([sys.executable, ZIP_CRACKER, 'a.zip', '-z', 'b.zip', '-z', 'c.zip', 'lista.txt',
+                                '--no-cache'], cwd=tmp_path, capture_output=True, text=True, timeout=120)
+    assert completed.returncode == 0, completed.stderr
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    assert result["success"]
+    found = {os.path.basename(archive["zipPath"]): archive["password"] for archive in result["archives"]}
+    assert found == passwords
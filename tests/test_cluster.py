@@ -0,0 +1,135 @@
+import json
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+import cluster
+import fixtures
+from verifiers import open_verifier
+
+ZIP_CRACKER = os.path.join(os.path.dirname(fixtures.__file__), 'zip_cracker.py')
+
+
+@pytest.fixture
+def coordinator(tmp_path):
+    zip_path = str(tmp_path / 'alvo.zip')
+    fixtures.write_encrypted_zip(zip_path, 'segredo', 'zipcrypto', 2, 4096)
+    return cluster.Coordinator(('127.0.0.1', 0), {}, ('text', 'lista.txt'), open_verifier(zip_path))
+
+
+def remote_node():
+    return types.SimpleNamespace(name='nó', leases={}, tested=0)
+
+
+def test_hit_with_wrong_password_is_ignored(coordinator):
+    coordinator.on_message(remote_node(), {"type": "hit", "password": "errada", "tested": 10})
+    assert coordinator.found is None
+
+
+def test_hit_with_correct_password_is_accepted(coordinator):
+    coordinator.on_message(remote_node(), {"type": "hit", "password": "segredo", "tested": 10})
+    assert coordinator.found == 'segredo'
+    assert coordinator.found_by == 'nó'
+
+
+def test_parse_address_defaults_to_loopback():
+    assert cluster.parse_address(':7000') == ('127.0.0.1', 7000)
+    assert cluster.is_loopback('127.0.0.1') and cluster.is_loopback('::1')
+    assert not cluster.is_loopback('0.0.0.0')
+
+
+def test_non_loopback_listen_requires_token(tmp_path):
+    zip_path = str(tmp_path / 'alvo.zip')
+    fixtures.write_encrypted_zip(zip_path, 'segredo', 'zipcrypto', 1, 1024)
+    result = cluster.coordinate(zip_path, ('0.0.0.0', 0), mask='?d')
+    assert not result["success"] and 'token' in result["error"]
+
+
+class LogLines(threading.Thread):
+    """Lê o stderr de um processo em segundo plano e permite esperar por uma linha"""
+
+    def __init__(self, stream):
+        super().__init__(daemon=True)
+        self.stream = stream
+        self.lines = []
+        self.changed = threading.Condition()
+
+    def run(self):
+        for line in self.stream:
+            with self.changed:
+                self.lines.append(line)
+                self.changed.notify_all()
+
+    def wait_for(self, pattern, timeout=60):
+        deadline = time.monotonic() + timeout
+        with self.changed:
+            while True:
+                for line in self.lines:
+                    match = re.search(pattern, line)
+                    if match:
+                        return match
+                remaining = deadline - time.monotonic()
+                assert remaining > 0, f"{pattern!r} não apareceu:\n{''.join(self.lines)}"
+                self.changed.wait(remaining)
+
+
+def start_worker(port, name):
+    return subprocess.Popen([sys.executable, ZIP_CRACKER, 'worker', f'127.0.0.1:{port}', '--workers', '1',
+                             '--name', name], stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.DEVNULL, start_new_session=True)
+
+
+def test_killed_worker_lease_is_reassigned(tmp_path):
+    # AES deixa cada candidata lenta o bastante para matar um nó no meio do ataque
+    fixtures.write_encrypted_zip(str(tmp_path / 'alvo.zip'), '6666', 'aes', 1, 256)
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+
+    coordinator = subprocess.Popen([sys.executable, ZIP_CRACKER, 'alvo.zip', '--mask', '?1?1?1?1', '-1', '0123456',
+                                    '--no-cache', '--listen', f'127.0.0.1:{port}'],
+                                   cwd=tmp_path, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    log = LogLines(coordinator.stderr)
+    log.start()
+    workers = []
+    try:
+        log.wait_for('Coordenador aguardando nós')
+        workers.append(start_worker(port, 'a'))
+        log.wait_for(r'Testadas: [1-9]')
+        workers.append(start_worker(port, 'b'))
+        log.wait_for(r'Nó b .* conectado')
+        os.killpg(workers[0].pid, signal.SIGKILL)
+
+        requeued = log.wait_for(r'Nó a desconectado; (\d+) fatias voltaram para a fila')
+        assert int(requeued.group(1)) > 0
+        # stderr é lido pela thread de log: esperar o fim e só então ler o resultado
+        coordinator.wait(timeout=120)
+        output = coordinator.stdout.read()
+    finally:
+        for worker in workers:
+            try:
+                os.killpg(worker.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            worker.wait()
+        if coordinator.poll() is None:
+            coordinator.kill()
+            coordinator.wait()
+        coordinator.stdout.close()
+    log.join(timeout=5)
+
+    result = json.loads(output.strip().splitlines()[-1])
+    assert result["success"]
+    assert result["password"] == '6666'
+    # As fatias devolvidas voltam para o início da fila: o nó b as testa antes de chegar à senha
+    assert sum(1 for line in log.lines if 'encontrou a senha' in line) == 1
+    assert any('Nó b encontrou a senha' in line for line in log.lines)
+    assert [node["name"] for node in result["nodes"]] == ['a', 'b']
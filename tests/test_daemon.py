@@ -0,0 +1,102 @@
+import io
+import json
+import os
+import time
+
+import pytest
+
+import daemon
+import fixtures
+from checkpoint import Checkpoint, archive_fingerprint, fingerprint_checkpoint_path
+from events import EventChannel
+from wordlist import Wordlist
+
+SHARD_SIZE = 4096
+
+
+class Events(io.StringIO):
+    def events(self, job=None):
+        events = [json.loads(line) for line in self.getvalue().splitlines()]
+        return [event for event in events if job is None or event.get('id') == job]
+
+    def wait_result(self, job, timeout=60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            for event in self.events(job):
+                if event['type'] == 'result':
+                    return event['result']
+            time.sleep(0.05)
+        raise AssertionError(f"trabalho {job} sem resultado")
+
+
+@pytest.fixture
+def service():
+    stream = Events()
+    service = daemon.CrackService(num_workers=2, num_slots=2, events=EventChannel(stream, 0))
+    service.start()
+    service.stream = stream
+    yield service
+    service.stop()
+
+
+def write_wordlist(path, count):
+    with open(path, 'w') as f:
+        f.write(''.join(f'w{i:05d}\n' for i in range(count)))
+
+
+def test_job_resumes_from_fingerprint_checkpoint(service, tmp_path):
+    zip_path = str(tmp_path / 'envio-1.zip')
+    fixtures.write_encrypted_zip(zip_path, 'w00010', 'zipcrypto', 1, 1024)
+    wordlist_path = str(tmp_path / 'lista.txt')
+    write_wordlist(wordlist_path, 5000)
+
+    # Execução anterior (outro upload do mesmo arquivo) concluiu a primeira fatia, onde está a senha
+    digest = daemon.prepare_keyspace(wordlist_path)[2]
+    fingerprint = archive_fingerprint(zip_path)
+    with Wordlist(wordlist_path) as wordlist:
+        start, end, lines = next(wordlist.shards(SHARD_SIZE))
+    checkpoint = Checkpoint(fingerprint_checkpoint_path(zip_path, fingerprint), fingerprint, digest, 'text',
+                            SHARD_SIZE)
+    checkpoint.add(start, end, lines)
+    checkpoint.save()
+
+    copy_path = str(tmp_path / 'envio-2.zip')
+    os.link(zip_path, copy_path)
+    service.handle({"id": 1, "method": "crack", "params": {"zipPath": copy_path, "wordlistPath": wordlist_path,
+                                                           "noCache": True}})
+    result = service.stream.wait_result(1)
+    assert any(event['type'] == 'log' and 'Retomando' in event['message'] for event in service.stream.events(1))
+    assert not result["success"]
+    assert result["testedWords"] == 5000
+    # Esgotado: o checkpoint não serve mais
+    assert not os.path.exists(checkpoint.path)
+
+
+def test_cancelled_job_keeps_its_progress(service, tmp_path):
+    zip_path = str(tmp_path / 'alvo.zip')
+    fixtures.write_encrypted_zip(zip_path, 'fora-da-lista', 'aes', 1, 512)
+    wordlist_path = str(tmp_path / 'lista.txt')
+    write_wordlist(wordlist_path, 50000)
+    params = {"zipPath": zip_path, "wordlistPath": wordlist_path, "noCache": True}
+    path = fingerprint_checkpoint_path(zip_path, archive_fingerprint(zip_path))
+
+    service.handle({"id": 1, "method": "crack", "params": params})
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        job = service.jobs.get(1)
+        if job is not None and job.checkpoint is not None and job.checkpoint.ranges:
+            break
+        time.sleep(0.05)
+    service.handle({"id": 2, "method": "cancel", "params": {"job": 1}})
+    service.stream.wait_result(1)
+    saved = Checkpoint.load(path)
+    assert saved is not None and saved.ranges
+
+    service.handle({"id": 3, "method": "crack", "params": params})
+    deadline = time.monotonic() + 30
+    while not any(event['type'] == 'log' and 'Retomando' in event['message']
+                  for event in service.stream.events(3)):
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    service.handle({"id": 4, "method": "cancel", "params": {"job": 3}})
+    service.stream.wait_result(3)
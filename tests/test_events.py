@@ -0,0 +1,54 @@
+import io
+import json
+import os
+import subprocess
+import sys
+
+import fixtures
+from events import EventChannel, LogForwarder
+
+ZIP_CRACKER = os.path.join(os.path.dirname(fixtures.__file__), 'zip_cracker.py')
+
+
+def read_events(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_hit_flushes_pending_progress_and_closes_it():
+    stream = io.StringIO()
+    events = EventChannel(stream, progress_interval=60).bind('job')
+    events.progress({"progress": 0.0})
+    events.progress({"progress": 10.0})
+    events.hit('segredo')
+    events.progress({"progress": 0.0})
+    events.result({"success": True})
+    types = [(event["type"], event.get("progress")) for event in read_events(stream)]
+    assert types == [("progress", 0.0), ("progress", 10.0), ("hit", None), ("result", None)]
+
+
+def test_log_forwarder_emits_leveled_lines():
+    stream, stderr = io.StringIO(), io.StringIO()
+    forwarder = LogForwarder(stderr, EventChannel(stream))
+    print("INFO: Iniciando", file=forwarder)
+    print("Progresso: 10%", file=forwarder)
+    forwarder.write("ERRO ao ler a lista: ")
+    forwarder.write("sem permissão\n")
+    assert stderr.getvalue().count('\n') == 3
+    logs = [(event["level"], event["message"]) for event in read_events(stream)]
+    assert logs == [("INFO", "Iniciando"), ("ERRO", "ERRO ao ler a lista: sem permissão")]
+
+
+def test_cli_events_end_with_hit_and_result(tmp_path):
+    fixtures.write_encrypted_zip(str(tmp_path / 'a.zip'), 'k7', 'zipcrypto', 1, 1024)
+    read_fd, write_fd = os.pipe()
+    with subprocess.Popen([sys.executable, ZIP_CRACKER, 'a.zip', '--mask', '?l?d', '--no-cache',
+                           '--events-fd', str(write_fd)], cwd=tmp_path, pass_fds=(write_fd,),
+                          stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL) as process:
+        os.close(write_fd)
+        with os.fdopen(read_fd, encoding='utf-8') as channel:
+            events = [json.loads(line) for line in channel]
+    assert process.returncode == 0
+    types = [event["type"] for event in events]
+    assert types[-2:] == ["hit", "result"]
+    assert "progress" not in types[types.index("hit"):]
+    assert any(event["type"] == "log" and event["level"] == "INFO" for event in events)
@@ -0,0 +1,55 @@
+import shutil
+
+import pytest
+
+import external
+import fixtures
+import zip_cracker
+from result_cache import ResultCache
+from zipcrypto import ZipCryptoVerifier, init_keys
+
+
+def test_pool_counts_inconclusive_fallback(tmp_path):
+    zip_path = str(tmp_path / 'alvo.zip')
+    fixtures.write_encrypted_zip(zip_path, 'segredo', 'zipcrypto', 1, 1024)
+    pool = external.ExternalPool(zip_path, tools=[], fallback=lambda path, password: None)
+    try:
+        assert pool.check(b'errada') is False
+        assert pool.inconclusive == 1
+    finally:
+        pool.close()
+
+
+def test_inconclusive_run_is_not_recorded_as_exhausted(tmp_path, monkeypatch):
+    # AES sem ferramentas externas: o módulo zipfile não consegue testar nenhuma senha
+    zip_path = str(tmp_path / 'alvo.zip')
+    fixtures.write_encrypted_zip(zip_path, 'segredo', 'aes', 1, 1024)
+    wordlist = tmp_path / 'lista.txt'
+    wordlist.write_text('a\nb\nc\n')
+    monkeypatch.setattr(external, 'probe_tools', lambda: ())
+    result = zip_cracker.crack_zip(zip_path, str(wordlist), engine='external', num_workers=2)
+    assert not result["success"]
+    cache = ResultCache.for_archive(zip_path)
+    assert all(not entry.get('exhausted') for entry in cache.archives.values())
+
+
+def test_unzip_result_only_refuses_on_password_errors():
+    assert external.unzip_result(0, b'') is True
+    assert external.unzip_result(82, b'') is False
+    assert external.unzip_result(2, b'  error:  invalid compressed data to inflate a.txt\n') is False
+    assert external.unzip_result(2, b'a.txt  bad CRC 1234abcd  (should be 0badcafe)\n') is False
+    # Arquivo ilegível, método não suportado, falta de memória, interrupção
+    for returncode in (2, 3, 9, 11, 50, 51, 81):
+        assert external.unzip_result(returncode, b'') is None
+
+
+@pytest.mark.skipif(shutil.which('unzip') is None, reason="unzip não encontrado")
+def test_unzip_refuses_password_that_passes_check_byte(tmp_path):
+    zip_path = str(tmp_path / 'alvo.zip')
+    fixtures.write_encrypted_zip(zip_path, 'segredo', 'zipcrypto', 1, 4096)
+    verifier = ZipCryptoVerifier.from_zip(zip_path)
+    password = next(password for password in (f'p{i}'.encode() for i in range(100000))
+                    if verifier.check_headers(init_keys(password)) and not verifier.check(password))
+    tool = external.ExternalTool('unzip', shutil.which('unzip'))
+    assert tool.test(zip_path, password) is False
+    assert tool.test(zip_path, b'segredo') is True
@@ -0,0 +1,80 @@
+import itertools
+
+import pytest
+
+import mask as mask_module
+from mask import Mask, MaskError, BUILTIN_CHARSETS
+from zipcrypto import init_keys
+
+
+def expected_candidates(positions, min_length, max_length):
+    return [bytes(chars) for length in range(min_length, max_length + 1)
+            for chars in itertools.product(*positions[:length])]
+
+
+def enumerate_mask(source, batch_size):
+    candidates = []
+    for start, end, count in source.shards(16):
+        batch = [word for words, _, _ in source.batches(start, end, batch_size) for word in words]
+        assert len(batch) == count
+        candidates += batch
+    return candidates
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def generator(request, monkeypatch):
+    if request.param == 'python':
+        monkeypatch.setattr(mask_module, 'np', None)
+    elif mask_module.np is None:
+        pytest.skip("requer NumPy")
+    return request.param
+
+
+@pytest.mark.parametrize('text, charsets, min_length, max_length, positions', [
+    ('?d?l', (), None, None, [BUILTIN_CHARSETS['d'], BUILTIN_CHARSETS['l']]),
+    ('a?1?2', ('xy', '?d'), None, None, [b'a', b'xy', BUILTIN_CHARSETS['d']]),
+    ('?3?4?1', ('ab', None, '?dz', 'Q?u'), None, None,
+     # Conjuntos personalizados sem repetição, na ordem dada
+     [BUILTIN_CHARSETS['d'] + b'z', b'Q' + BUILTIN_CHARSETS['u'].replace(b'Q', b''), b'ab']),
+    ('?1?1?1?1', ('aab',), 1, 4, [b'ab'] * 4),
+    ('?h?d?1', ('-_',), 2, 3, [BUILTIN_CHARSETS['h'], BUILTIN_CHARSETS['d'], b'-_']),
+])
+def test_enumeration_matches_product(generator, text, charsets, min_length, max_length, positions):
+    source = Mask(text, charsets, min_length, max_length)
+    expected = expected_candidates(positions, source.min_length, source.max_length)
+    assert source.count == len(expected)
+    # Lotes de tamanho primo atravessam fronteiras de prefixo e de fatia
+    assert enumerate_mask(source, 7) == expected
+
+
+def test_batch_keys_match_scalar(generator):
+    source = Mask('?1?d?d', ('ab',), 1, 3)
+    for words, _, keys in source.batches(0, source.count, 13):
+        if keys is None:
+            assert generator == 'python'
+            continue
+        assert list(zip(*(k.tolist() for k in keys))) == [init_keys(word) for word in words]
+
+
+@pytest.mark.parametrize('shard_size', [1, 5, 64, 10 ** 6])
+def test_shards_cover_the_keyspace_without_gaps(shard_size):
+    source = Mask('?l?d?d', (), 1, 3)
+    shards = list(source.shards(shard_size))
+    assert shards[0][0] == 0
+    assert shards[-1][1] == source.count
+    for (_, end, _), (start, _, _) in zip(shards, shards[1:]):
+        assert end == start
+    assert all(count == end - start > 0 for start, end, count in shards)
+
+
+@pytest.mark.parametrize('text, charsets, min_length, max_length', [
+    ('', (), None, None),
+    ('?x', (), None, None),
+    ('?1', (), None, None),
+    ('?d?d', (), 3, None),
+    ('?d?d', (), 2, 1),
+    ('?d', ('a', 'b', 'c', 'd', 'e'), None, None),
+])
+def test_invalid_masks(text, charsets, min_length, max_length):
+    with pytest.raises(MaskError):
+        Mask(text, charsets, min_length, max_length)
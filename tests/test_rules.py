@@ -0,0 +1,48 @@
+import pytest
+
+from rules import RuleError, RuleSet, compile_rule, load_rules
+
+
+@pytest.mark.parametrize('rule, word, expected', [
+    (':', b'Senha', b'Senha'),
+    ('c', b'sENHA', b'Senha'),
+    ('u', b'Senha1', b'SENHA1'),
+    ('l', b'SeNHA1', b'senha1'),
+    ('r', b'abc', b'cba'),
+    ('d', b'ab', b'abab'),
+    ('$1', b'senha', b'senha1'),
+    ('$1 $2 $3', b'senha', b'senha123'),
+    ('^X', b'senha', b'Xsenha'),
+    ('^2^1', b'senha', b'12senha'),
+    ('sa@', b'banana', b'b@n@n@'),
+    ('sa@ s@4', b'banana', b'b4n4n4'),
+    ('@a', b'banana', b'bnn'),
+    ('T0', b'senha', b'Senha'),
+    ('T2', b'senha', b'seNha'),
+    ('T9', b'senha', b'senha'),
+    ('[', b'senha', b'enha'),
+    (']', b'senha', b'senh'),
+    ('[', b'', b''),
+    ('c $1 ^!', b'senha', b'!Senha1'),
+    ('$1 sa4', b'a', b'41'),
+])
+def test_rule_operators(rule, word, expected):
+    transform = compile_rule(rule)
+    assert (word if transform is None else transform(word)) == expected
+
+
+@pytest.mark.parametrize('rule', ['x', '$', 'sa', 'T', 'T#'])
+def test_invalid_rules_raise(rule):
+    with pytest.raises(RuleError):
+        compile_rule(rule)
+
+
+def test_invalid_rule_line_is_reported_and_skipped(tmp_path, capsys):
+    path = tmp_path / 'regras.rule'
+    path.write_text('# comentário\n:\nc\nx\n\n$1\nT#\n')
+    rules = load_rules(str(path))
+    err = capsys.readouterr().err
+    assert rules == [':', 'c', '$1']
+    assert "AVISO: Linha 4" in err and "'x'" in err
+    assert "AVISO: Linha 7" in err
+    assert [batch for batch, _ in RuleSet(rules).apply([b'senha'])] == [[b'senha'], [b'Senha'], [b'senha1']]
@@ -0,0 +1,33 @@
+import pytest
+
+import fixtures
+from winzip_aes import AesVerifier, AES_STRENGTHS, PASSWORD_VERIFIER_SIZE
+
+
+@pytest.mark.parametrize('version', [1, 2])
+@pytest.mark.parametrize('strength', sorted(AES_STRENGTHS))
+def test_all_key_strengths(tmp_path, strength, version):
+    zip_path = str(tmp_path / 'alvo.zip')
+    fixtures.write_encrypted_zip(zip_path, 'segredo', 'aes', 2, 512, aes_strength=strength, aes_version=version)
+    verifier = AesVerifier.from_zip(zip_path)
+    assert verifier.primary.key_size == AES_STRENGTHS[strength][0]
+    assert verifier.primary.version == version
+    assert verifier.check_batch([b'errada', b'segredo', b'Segredo']) == [1]
+
+
+def test_wrong_password_passing_the_verifier_is_rejected_by_hmac(tmp_path):
+    zip_path = str(tmp_path / 'alvo.zip')
+    fixtures.write_encrypted_zip(zip_path, 'segredo', 'aes', 1, 512)
+    entry = AesVerifier.from_zip(zip_path).primary
+
+    # Colisão do PV de 2 bytes (~1 em 65536 senhas): gravar no arquivo o PV da senha errada
+    collision = entry.derive(b'errada')[-PASSWORD_VERIFIER_SIZE:]
+    with open(zip_path, 'r+b') as f:
+        f.seek(entry.data_offset - PASSWORD_VERIFIER_SIZE)
+        f.write(collision)
+
+    verifier = AesVerifier.from_zip(zip_path)
+    assert verifier.primary.verifier == collision
+    assert verifier.primary.derive(b'errada')[-PASSWORD_VERIFIER_SIZE:] == verifier.primary.verifier
+    assert not verifier.check(b'errada')
+    assert verifier.check_batch([b'errada']) == []
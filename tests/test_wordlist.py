@@ -0,0 +1,25 @@
+import wordlist_index
+from wordlist import Wordlist, ShardPlanner
+
+
+def test_shard_counts_skip_blank_lines(tmp_path):
+    path = tmp_path / 'lista.txt'
+    path.write_bytes(b'\n'.join(f'w{i:04d}'.encode() + (b'\n  \r\n\t' if i % 7 == 0 else b'') for i in range(3000)))
+    with Wordlist(str(path)) as wordlist:
+        shards = list(wordlist.shards(1024))
+        assert len(shards) > 1
+        assert sum(lines for _, _, lines in shards) == 3000
+        for start, end, lines in shards:
+            assert len(wordlist.lines(start, end)) == lines
+
+
+def test_text_total_matches_index_for_a_list_without_repetitions(tmp_path):
+    path = tmp_path / 'lista.txt'
+    path.write_bytes(b'alfa\n\nbeta\r\n   \ngama\n\n')
+    planner = ShardPlanner(Wordlist(str(path)), lambda shard: None, 4096)
+    planner.run()
+    assert planner.estimated_total() == 3
+
+    index_path = wordlist_index.prepare_index(str(path), background=False)
+    with wordlist_index.WordlistIndex(index_path) as index:
+        assert index.count == planner.estimated_total()
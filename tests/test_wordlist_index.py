@@ -0,0 +1,94 @@
+import os
+import time
+
+import wordlist_index
+from wordlist import expand_lines
+
+
+def test_wordlist_digest_is_reused_until_the_file_changes(tmp_path, monkeypatch):
+    wordlist = tmp_path / 'lista.txt'
+    wordlist.write_bytes(b'alfa\nbeta\n' * 50000)
+    expected = wordlist_index.file_digest(str(wordlist))
+    assert wordlist_index.wordlist_digest(str(wordlist)) == expected
+
+    calls = []
+    file_digest = wordlist_index.file_digest
+    monkeypatch.setattr(wordlist_index, 'file_digest', lambda path: calls.append(path) or file_digest(path))
+    assert wordlist_index.wordlist_digest(str(wordlist)) == expected
+    assert not calls
+
+    wordlist.write_bytes(b'gama\n')
+    assert wordlist_index.wordlist_digest(str(wordlist)) == file_digest(str(wordlist))
+    assert len(calls) == 1
+
+
+def test_index_is_built_in_background(tmp_path):
+    wordlist = tmp_path / 'lista.txt'
+    wordlist.write_bytes('alfa\nbeta\n\nalfa\nsenhã\ngama'.encode('utf-8'))
+    assert wordlist_index.prepare_source(str(wordlist)) == ('text', str(wordlist))
+
+    index_path = os.path.join(str(tmp_path), wordlist_index.INDEX_DIR_NAME,
+                              wordlist_index.wordlist_digest(str(wordlist)) + wordlist_index.INDEX_SUFFIX)
+    deadline = time.monotonic() + 30
+    while not os.path.exists(index_path) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert wordlist_index.prepare_source(str(wordlist)) == ('index', index_path)
+
+    lines = [line.strip() for line in wordlist.read_bytes().split(b'\n')]
+    expected = list(dict.fromkeys(expand_lines(lines)))
+    with wordlist_index.WordlistIndex(index_path) as index:
+        words = [word for batch, _, _ in index.batches(0, index.count, 2) for word in batch]
+    assert words == expected
+
+
+def wait_for_digest(path):
+    deadline = time.monotonic() + 30
+    while wordlist_index.known_digest(path) is None and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+
+def test_keyspace_uses_quick_id_until_the_background_digest(tmp_path, monkeypatch):
+    wordlist = tmp_path / 'lista.txt'
+    wordlist.write_bytes(b'alfa\nbeta\n' * 1000)
+    path = str(wordlist)
+    file_digest = wordlist_index.file_digest
+    calls = []
+    monkeypatch.setattr(wordlist_index, 'file_digest', lambda p: calls.append(p) or file_digest(p))
+
+    keyspace = wordlist_index.KeyspaceDigest(path, '+regras')
+    assert wordlist_index.prepare_source(path, digest=keyspace.content_digest()) == ('text', path)
+    assert str(keyspace) == wordlist_index.quick_id(path) + '+regras'
+    # Nenhuma leitura da lista inteira antes do ataque
+    assert not calls
+
+    wait_for_digest(path)
+    expected = file_digest(path)
+    assert str(keyspace) == expected + '+regras'
+    # Registros gravados antes e depois do hash ficar pronto valem para o mesmo espaço
+    assert keyspace.matches(wordlist_index.quick_id(path) + '+regras')
+    assert keyspace.matches(expected + '+regras')
+    assert not keyspace.matches(expected)
+    assert not calls
+
+
+def test_recorded_digest_is_compared_by_hashing_on_demand(tmp_path):
+    first = tmp_path / 'envio-1.txt'
+    second = tmp_path / 'envio-2.txt'
+    first.write_bytes(b'alfa\nbeta\n')
+    second.write_bytes(b'alfa\nbeta\n')
+    recorded = wordlist_index.wordlist_digest(str(first))
+
+    keyspace = wordlist_index.KeyspaceDigest(str(second))
+    assert keyspace.content_digest() is None
+    assert keyspace.matches(recorded)
+    assert not keyspace.matches(wordlist_index.quick_id(str(first)))
+
+
+def test_large_wordlist_is_not_hashed(tmp_path, monkeypatch):
+    wordlist = tmp_path / 'lista.txt'
+    wordlist.write_bytes(b'alfa\nbeta\n' * 1000)
+    monkeypatch.setattr(wordlist_index, 'INDEX_MAX_SOURCE_SIZE', 1024)
+    monkeypatch.setattr(wordlist_index, 'file_digest', lambda p: (_ for _ in ()).throw(AssertionError(p)))
+
+    assert wordlist_index.prepare_source(str(wordlist)) == ('text', str(wordlist))
+    assert not os.path.exists(tmp_path / wordlist_index.INDEX_DIR_NAME)
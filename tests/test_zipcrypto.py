@@ -0,0 +1,95 @@
+import random
+import zlib
+
+import pytest
+
+import fixtures
+import zip_cracker
+from checkpoint import archive_fingerprint
+from result_cache import ResultCache
+from zipcrypto import ZipCryptoVerifier, VERIFY_CHUNK_SIZE, _inflate, init_keys, init_keys_batch, np
+
+
+@pytest.mark.parametrize('size', [VERIFY_CHUNK_SIZE + 7, 2 * VERIFY_CHUNK_SIZE + 1, 3 * VERIFY_CHUNK_SIZE + 100])
+def test_inflate_drains_pending_output(size):
+    # Zeros comprimem tanto que o zlib consome a entrada inteira antes de entregar toda a saída
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -15)
+    compressed = compressor.compress(bytes(size)) + compressor.flush()
+    decompressor = zlib.decompressobj(-15)
+    output = b''.join(_inflate(decompressor, compressed))
+    assert len(output) == size
+    assert decompressor.eof
+
+
+def test_verify_accepts_output_just_past_chunk_multiple(tmp_path, monkeypatch):
+    monkeypatch.setattr(fixtures, '_entry_content', lambda rng, size: bytes(size))
+    zip_path = str(tmp_path / 'zeros.zip')
+    fixtures.write_encrypted_zip(zip_path, 'segredo', 'zipcrypto', 1, VERIFY_CHUNK_SIZE + 7)
+    verifier = ZipCryptoVerifier.from_zip(zip_path)
+    assert verifier.confirm(b'segredo')
+    assert verifier.check_batch([b'errada', b'segredo']) == [1]
+
+
+def random_passwords(seed, count=2000):
+    rng = random.Random(seed)
+    # Tamanhos misturados (o lote é preenchido com zeros até a maior), vazias e bytes >= 0x80
+    passwords = [bytes(rng.randrange(256) for _ in range(rng.randrange(25))) for _ in range(count)]
+    passwords[::97] = [b''] * len(passwords[::97])
+    passwords[5] = bytes(range(0x80, 0x100))
+    return passwords
+
+
+@pytest.mark.skipif(np is None, reason="requer NumPy")
+def test_batch_key_schedule_matches_scalar():
+    passwords = random_passwords(1)
+    k0, k1, k2 = init_keys_batch(passwords)
+    assert [init_keys(password) for password in passwords] == list(zip(k0.tolist(), k1.tolist(), k2.tolist()))
+
+
+@pytest.mark.skipif(np is None, reason="requer NumPy")
+def test_batch_header_check_matches_scalar(tmp_path):
+    zip_path = str(tmp_path / 'alvo.zip')
+    fixtures.write_encrypted_zip(zip_path, 'sénha', 'zipcrypto', 3, 2048)
+    verifier = ZipCryptoVerifier.from_zip(zip_path)
+    passwords = random_passwords(2) + ['sénha'.encode('utf-8')]
+    keys = init_keys_batch(passwords)
+
+    for entry in verifier.entries:
+        expected = [i for i, password in enumerate(passwords) if entry.check_header(init_keys(password))]
+        # Cerca de 1 em 256 senhas acerta o byte de verificação de cada entrada
+        assert len(expected) > 1
+        assert entry.check_header_batch(keys).tolist() == expected
+
+    expected = [i for i, password in enumerate(passwords) if verifier.check_headers(init_keys(password))]
+    assert expected[-1] == len(passwords) - 1
+    assert verifier.check_batch(passwords) == [i for i, password in enumerate(passwords) if verifier.check(password)]
+    assert verifier.check_batch(passwords) == [len(passwords) - 1]
+
+
+def test_hit_on_empty_entries_is_unconfirmed(tmp_path):
+    zip_path = str(tmp_path / 'vazio.zip')
+    fixtures.write_encrypted_zip(zip_path, 'segredo', 'zipcrypto', 1, 0)
+    verifier = ZipCryptoVerifier.from_zip(zip_path)
+    assert not verifier.confirmable
+
+    wordlist_path = str(tmp_path / 'lista.txt')
+    with open(wordlist_path, 'w') as f:
+        f.write(''.join(f'w{i:05d}\n' for i in range(3000)) + 'segredo\n')
+    result = zip_cracker.crack_zip(zip_path, wordlist_path, num_workers=1)
+    assert result["success"]
+    assert result["unconfirmed"]
+    # Um acerto só pelo byte de verificação não é gravado no cache de resultados
+    cache = ResultCache.for_archive(zip_path)
+    assert cache.password(archive_fingerprint(zip_path)) is None
+
+
+def test_hit_with_content_is_confirmed(tmp_path):
+    zip_path = str(tmp_path / 'alvo.zip')
+    fixtures.write_encrypted_zip(zip_path, 'segredo', 'zipcrypto', 2, 64)
+    assert ZipCryptoVerifier.from_zip(zip_path).confirmable
+    wordlist_path = str(tmp_path / 'lista.txt')
+    with open(wordlist_path, 'w') as f:
+        f.write('errada\nsegredo\n')
+    result = zip_cracker.crack_zip(zip_path, wordlist_path, num_workers=1)
+    assert result["password"] == 'segredo'
+    assert "unconfirmed" not in result